@@ -0,0 +1,400 @@
+# account_store.py
+"""
+Account configuration store
+Account configs ({"persona": ..., "schedule": ..., "model": ...} per account)
+used to be read from accounts.json on every request and written back whole on
+every update, so two concurrent updates could lose one of them. The store
+keeps them behind one interface with per-account partial updates:
+
+    all()                      -> {account_id: config}
+    get(account_id)            -> config or None
+    update(account_id, **kw)   -> merged config (creates the account if missing)
+    replace(accounts)          -> overwrite every account
+    version()                  -> changes whenever the stored accounts change
+
+on_change(callback) registers a callable run after every update()/replace()
+made in this process (the scheduler's wake(), so an edit from the web
+interface reschedules at once); remove_listener() unregisters it.
+
+Backends (REDNOTE_ACCOUNTS_BACKEND):
+  - json:   accounts.json (default). Parsed once and cached until the file's
+            mtime/size/inode changes; updates take an exclusive lock
+            (accounts.json.lock), re-read the file, apply the change and
+            write-rename atomically, so concurrent writers never lose updates
+  - sqlite: one row per account in REDNOTE_ACCOUNTS_DB (default
+            .rednote_accounts.sqlite), primary-key lookups; seeded from
+            accounts.json on first use
+  - memory: per-process dict seeded with DEFAULT_ACCOUNTS (Vercel without a KV store)
+  - kv:     Vercel KV / Upstash Redis over REST (KV_REST_API_URL,
+            KV_REST_API_TOKEN), one hash with a JSON config per account;
+            survives serverless cold starts. Reads are cached for
+            REDNOTE_ACCOUNTS_CACHE_TTL seconds, updates merge atomically on the server
+"""
+import contextlib
+import copy
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from generator_core import DEFAULT_ACCOUNTS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ACCOUNTS_FILE = Path("accounts.json")
+ACCOUNTS_DB = Path(os.getenv("REDNOTE_ACCOUNTS_DB", ".rednote_accounts.sqlite"))
+KV_CACHE_TTL = float(os.getenv("REDNOTE_ACCOUNTS_CACHE_TTL", "5"))
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on `path` across processes (fcntl on POSIX, msvcrt on Windows)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_listeners = []
+
+
+def on_change(callback):
+    """Run callback() after every update()/replace() in this process; returns callback"""
+    _listeners.append(callback)
+    return callback
+
+
+def remove_listener(callback):
+    with contextlib.suppress(ValueError):
+        _listeners.remove(callback)
+
+
+def _changed():
+    for callback in list(_listeners):
+        callback()
+
+
+class AccountStore:
+    """Interface shared by the backends"""
+
+    name = None
+
+    def all(self):
+        raise NotImplementedError
+
+    def get(self, account_id):
+        config = self.all().get(account_id)
+        return dict(config) if config is not None else None
+
+    def update(self, account_id, **fields):
+        raise NotImplementedError
+
+    def replace(self, accounts):
+        raise NotImplementedError
+
+    def version(self):
+        return None
+
+
+class JsonAccountStore(AccountStore):
+    """accounts.json with an mtime-validated cache and locked atomic writes"""
+
+    name = "json"
+
+    def __init__(self, path=ACCOUNTS_FILE, defaults=DEFAULT_ACCOUNTS):
+        self.path = Path(path)
+        self.defaults = defaults
+        self._cache = None
+        self._key = None
+        self._lock = threading.Lock()
+
+    @property
+    def lock_path(self):
+        return self.path.with_name(self.path.name + ".lock")
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _read(self):
+        if not self.path.exists():
+            return copy.deepcopy(self.defaults)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _accounts(self):
+        """Parsed accounts; the file is re-read only after it changed on disk"""
+        key = self._stat_key()
+        with self._lock:
+            if self._cache is None or key != self._key:
+                self._cache, self._key = self._read(), key
+            return self._cache
+
+    def _write(self, accounts):
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(accounts, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._cache, self._key = accounts, self._stat_key()
+
+    def all(self):
+        return {account_id: dict(config) for account_id, config in self._accounts().items()}
+
+    def get(self, account_id):
+        config = self._accounts().get(account_id)
+        return dict(config) if config is not None else None
+
+    def update(self, account_id, **fields):
+        # Re-read under the lock: another process may have written since our cached copy
+        with self._lock, file_lock(self.lock_path):
+            accounts = self._read()
+            accounts[account_id] = {**accounts.get(account_id, {}), **fields}
+            self._write(accounts)
+        _changed()
+        return dict(accounts[account_id])
+
+    def replace(self, accounts):
+        with self._lock, file_lock(self.lock_path):
+            self._write(copy.deepcopy(accounts))
+        _changed()
+
+    def version(self):
+        return self._stat_key()
+
+
+ACCOUNTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id TEXT PRIMARY KEY,
+    config TEXT NOT NULL,            -- JSON object
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteAccountStore(AccountStore):
+    """One row per account; lookups by primary key"""
+
+    name = "sqlite"
+
+    def __init__(self, path=ACCOUNTS_DB, seed_file=ACCOUNTS_FILE, defaults=DEFAULT_ACCOUNTS):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connect().executescript(ACCOUNTS_SCHEMA)
+        # Check-and-seed in one transaction so concurrent first users cannot wipe each other's updates
+        with self._transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == 0:
+                self._insert(conn, JsonAccountStore(seed_file, defaults).all())
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3  # only the sqlite backend needs it
+
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # serialises read-modify-write across processes
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _insert(conn, accounts):
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO accounts (account_id, config, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(account_id) DO UPDATE SET config = excluded.config, updated_at = excluded.updated_at",
+            [(account_id, json.dumps(config, ensure_ascii=False), now) for account_id, config in accounts.items()]
+        )
+
+    def all(self):
+        return {account_id: json.loads(config) for account_id, config in
+                self._connect().execute("SELECT account_id, config FROM accounts ORDER BY account_id")}
+
+    def get(self, account_id):
+        row = self._connect().execute("SELECT config FROM accounts WHERE account_id = ?", (account_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, account_id, **fields):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT config FROM accounts WHERE account_id = ?", (account_id,)).fetchone()
+            config = {**(json.loads(row[0]) if row else {}), **fields}
+            self._insert(conn, {account_id: config})
+        _changed()
+        return config
+
+    def replace(self, accounts):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM accounts")
+            self._insert(conn, accounts)
+        _changed()
+
+    def version(self):
+        return tuple(self._connect().execute("SELECT COUNT(*), MAX(updated_at) FROM accounts").fetchone())
+
+
+class MemoryAccountStore(AccountStore):
+    """Per-process accounts, lost on restart"""
+
+    name = "memory"
+
+    def __init__(self, defaults=DEFAULT_ACCOUNTS):
+        self._accounts = copy.deepcopy(defaults)
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def all(self):
+        with self._lock:
+            return {account_id: dict(config) for account_id, config in self._accounts.items()}
+
+    def update(self, account_id, **fields):
+        with self._lock:
+            config = self._accounts[account_id] = {**self._accounts.get(account_id, {}), **fields}
+            self._version += 1
+        _changed()
+        return dict(config)
+
+    def replace(self, accounts):
+        with self._lock:
+            self._accounts = copy.deepcopy(accounts)
+            self._version += 1
+        _changed()
+
+    def version(self):
+        return self._version
+
+
+# Merge a JSON patch into one hash field atomically on the Redis server
+KV_UPDATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local config = current and cjson.decode(current) or {}
+for k, v in pairs(cjson.decode(ARGV[2])) do config[k] = v end
+local encoded = cjson.encode(config)
+redis.call('HSET', KEYS[1], ARGV[1], encoded)
+return encoded
+"""
+
+KV_REPLACE_SCRIPT = """
+redis.call('DEL', KEYS[1])
+for i = 1, #ARGV, 2 do redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1]) end
+return #ARGV / 2
+"""
+
+
+class KVAccountStore(AccountStore):
+    """Vercel KV / Upstash Redis REST API: hash REDNOTE_ACCOUNTS_KV_KEY, field = account_id, value = JSON config"""
+
+    name = "kv"
+
+    def __init__(self, url=None, token=None, key=None, defaults=DEFAULT_ACCOUNTS, ttl=KV_CACHE_TTL):
+        self.url = (url or os.getenv("KV_REST_API_URL") or "").rstrip("/")
+        self.token = token or os.getenv("KV_REST_API_TOKEN")
+        if not self.url or not self.token:
+            raise ValueError("kv account store: 请设置 KV_REST_API_URL 和 KV_REST_API_TOKEN")
+        self.key = key or os.getenv("REDNOTE_ACCOUNTS_KV_KEY", "rednote:accounts")
+        self.defaults = defaults
+        self.ttl = ttl
+        self._cache = None
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+
+    def _command(self, *args):
+        from http_client import default_timeout, get_session
+
+        response = get_session().post(self.url, json=[str(a) for a in args],
+                                      headers={"Authorization": f"Bearer {self.token}"},
+                                      timeout=default_timeout())
+        body = response.json()
+        if response.status_code != 200 or "error" in body:
+            raise RuntimeError(f"KV {args[0]} failed: {body.get('error', response.status_code)}")
+        return body.get("result")
+
+    def _load(self):
+        flat = self._command("HGETALL", self.key) or []
+        accounts = {flat[i]: json.loads(flat[i + 1]) for i in range(0, len(flat), 2)}
+        if not accounts:
+            for account_id, config in self.defaults.items():
+                self._command("HSETNX", self.key, account_id, json.dumps(config, ensure_ascii=False))
+            flat = self._command("HGETALL", self.key) or []
+            accounts = {flat[i]: json.loads(flat[i + 1]) for i in range(0, len(flat), 2)}
+        return accounts
+
+    def _accounts(self):
+        with self._lock:
+            if self._cache is None or time.monotonic() - self._cached_at > self.ttl:
+                self._cache, self._cached_at = self._load(), time.monotonic()
+            return self._cache
+
+    def all(self):
+        return {account_id: dict(config) for account_id, config in self._accounts().items()}
+
+    def update(self, account_id, **fields):
+        encoded = self._command("EVAL", KV_UPDATE_SCRIPT, 1, self.key, account_id,
+                                json.dumps(fields, ensure_ascii=False))
+        config = json.loads(encoded)
+        with self._lock:
+            if self._cache is not None:
+                self._cache[account_id] = config
+        _changed()
+        return dict(config)
+
+    def replace(self, accounts):
+        args = [item for account_id, config in accounts.items()
+                for item in (account_id, json.dumps(config, ensure_ascii=False))]
+        self._command("EVAL", KV_REPLACE_SCRIPT, 1, self.key, *args)
+        with self._lock:
+            self._cache, self._cached_at = copy.deepcopy(accounts), time.monotonic()
+        _changed()
+
+
+BACKENDS = {
+    "json": JsonAccountStore,
+    "sqlite": SQLiteAccountStore,
+    "memory": MemoryAccountStore,
+    "kv": KVAccountStore,
+}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_account_store(backend=None):
+    """Process-wide account store (default REDNOTE_ACCOUNTS_BACKEND, else json)"""
+    backend = (backend or os.getenv("REDNOTE_ACCOUNTS_BACKEND") or "json").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的账户存储 / unknown account store {backend!r} (choose from {', '.join(BACKENDS)})")
+    store = _stores.get(backend)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(backend)
+            if store is None:
+                store = _stores[backend] = BACKENDS[backend]()
+    return store
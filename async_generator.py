@@ -0,0 +1,171 @@
+# async_generator.py
+"""
+Native asyncio generation API
+AsyncRedNoteContentGenerator shares prompts, payloads and post assembly with
+RedNoteContentGenerator but awaits the DeepSeek call on an httpx.AsyncClient,
+so thousands of in-flight generations can share one event loop instead of one
+OS thread each. The sync API is inherited unchanged for existing callers.
+"""
+import asyncio
+import os
+import time
+import weakref
+
+import httpx
+
+from generator_core import POSTS_PER_RUN
+from http_client import CONNECT_TIMEOUT, READ_TIMEOUT, POOL_MAXSIZE
+from resilience import GENERATION_DEADLINE, aresilient_post_json
+from rednote_content_generator import RedNoteContentGenerator, load_accounts
+
+DEFAULT_CONCURRENCY = 100
+
+# One AsyncClient per event loop (clients cannot be shared across loops)
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Return the pooled keep-alive AsyncClient for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=POOL_MAXSIZE),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_client():
+    """Close the AsyncClient bound to the running event loop"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class AsyncRedNoteContentGenerator(RedNoteContentGenerator):
+    """Async counterpart of RedNoteContentGenerator"""
+
+    async def acall_deepseek_api(self, prompt, use_cache=False, cache_seed=None):
+        """异步调用DeepSeek API生成内容 (缓存读写和遥测在线程中执行, 不阻塞事件循环)"""
+        prompt_index = self.prompt_index(prompt)
+        try:
+            headers, data = self.build_api_request(prompt)
+            cache_key, cached = await asyncio.to_thread(self.cached_completion, data, use_cache, cache_seed,
+                                                        prompt_index)
+            if cached is not None:
+                return cached
+            response = await self.apost_completion(data)
+            return await asyncio.to_thread(self.completion_content, response, prompt_index, cache_key)
+        except Exception as e:
+            return await asyncio.to_thread(self.call_failed, prompt_index, e)
+
+    async def acall_deepseek_batch(self, prompts, use_cache=False, cache_seed=None):
+        """Async counterpart of call_deepseek_batch"""
+        try:
+            headers, data = self.build_batch_request(prompts)
+            cache_key, cached = await asyncio.to_thread(self.cached_completion, data, use_cache, cache_seed,
+                                                        "batch", len(prompts))
+            if cached is not None:
+                return cached
+            response = await self.apost_completion(data)
+            return await asyncio.to_thread(self.completion_content, response, "batch", cache_key, len(prompts))
+        except Exception as e:
+            return await asyncio.to_thread(self.call_failed, "batch", e, len(prompts))
+
+    async def apost_completion(self, data):
+        """Async counterpart of post_completion: walk the route, failing over on errors"""
+        expires = self.expires or time.monotonic() + GENERATION_DEADLINE
+        for i, target in enumerate(self.route):
+            last = i == len(self.route) - 1
+            remaining = self.time_left(expires, target)
+            try:
+                response = await aresilient_post_json(get_async_client(), target.url, dict(data, model=target.model),
+                                                      headers=target.headers, deadline=remaining)
+            except Exception as e:
+                if last:
+                    raise
+                print(f"  [FAILOVER] {target.name}: {e} -> {self.route[i + 1].name}")
+                continue
+            response.route = target.name
+            if response.status_code == 200 or last:
+                return response
+            print(f"  [FAILOVER] {target.name}: HTTP {response.status_code} -> {self.route[i + 1].name}")
+
+    async def agenerate_daily_posts(self, use_cache=False, cache_seed=None, count=None):
+        """
+        异步生成小红书内容: 默认1条 (REDNOTE_POSTS_PER_RUN)
+        count > 1 时批量生成, 批量输出无效则改为并发单条调用 (same as generate_daily_posts)
+        Prompt rotation, dedup and the usage log touch SQLite or files, so they run in threads.
+        """
+        count = count or POSTS_PER_RUN
+        self.log_generation_start()
+        with self.generation_deadline():
+            if count <= 1:
+                prompt = await asyncio.to_thread(self.select_prompt, use_cache)
+                content = await self.acall_deepseek_api(prompt, use_cache=use_cache, cache_seed=cache_seed)
+            else:
+                prompts = await asyncio.to_thread(self.select_prompts, count, use_cache)
+                content = await self.acall_deepseek_batch(prompts, use_cache=use_cache, cache_seed=cache_seed)
+                if content is None:
+                    print(f"  [FALLBACK] 改为并发单条调用 / Falling back to {count} concurrent single calls")
+                    content = list(await asyncio.gather(*(
+                        self.acall_deepseek_api(prompt, use_cache=use_cache, cache_seed=cache_seed)
+                        for prompt in prompts
+                    )))
+            # Index lookups and any regeneration are blocking; keep them off the event loop
+            content = await asyncio.to_thread(self.dedupe, content)
+        await asyncio.to_thread(self.report_usage)
+        return self.build_posts(content)
+
+    async def arun_daily_generation(self):
+        """异步运行每日生成任务，数据/PDF/TXT写入放到线程中执行"""
+        try:
+            posts = await self.agenerate_daily_posts()
+            if not posts:
+                print("[ERROR] 内容生成失败 / Content generation failed")
+                return False
+
+            pdf_file = await asyncio.to_thread(self.persist, posts)
+            print(f"[OK] Account {self.account_id} 完成 / done: {pdf_file}")
+            return True
+
+        except Exception as e:
+            print(f"[ERROR] 生成过程中出现错误 / Error during generation: {e}")
+            return False
+
+
+async def agenerate_all_accounts(api_key=None, accounts=None, concurrency=None):
+    """
+    在单个事件循环中为所有账户并发生成内容 / Generate every account on one event loop
+
+    Returns {account_id: posts}. A semaphore bounds in-flight API calls.
+    """
+    api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
+    accounts = accounts if accounts is not None else load_accounts()
+    semaphore = asyncio.Semaphore(concurrency or DEFAULT_CONCURRENCY)
+
+    async def one(account_id, config):
+        generator = AsyncRedNoteContentGenerator(
+            api_key,
+            persona_id=config.get("persona", "forex_gold_trader"),
+            account_id=account_id,
+            account_config=config
+        )
+        async with semaphore:
+            return account_id, await generator.agenerate_daily_posts()
+
+    results = await asyncio.gather(*(one(a, c) for a, c in accounts.items()))
+    return dict(results)
+
+
+def generate_all_accounts_async(api_key=None, accounts=None, concurrency=None):
+    """Sync wrapper around agenerate_all_accounts for scripts and cron jobs"""
+    async def main():
+        try:
+            return await agenerate_all_accounts(api_key, accounts, concurrency)
+        finally:
+            await aclose_client()
+
+    return asyncio.run(main())
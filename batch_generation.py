@@ -0,0 +1,131 @@
+# batch_generation.py
+"""
+Concurrent multi-account batch generation
+Generates every configured account in parallel with a bounded worker pool.
+The post store and TXT are written on a single writer thread and PDFs are laid
+out on a RenderService process pool, so neither disk I/O nor ReportLab layout
+sits on the network critical path. With a non-filesystem storage backend
+(REDNOTE_STORAGE) the writer thread hands posts to that backend instead and no
+PDFs are rendered.
+"""
+import contextlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from rednote_content_generator import RedNoteContentGenerator, load_accounts
+from storage import FilesystemStorage, get_storage
+from usage_report import UsageReport
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def _generate_one(api_key, account_id, config):
+    """Generate posts for a single account (runs on a worker thread)"""
+    started = time.perf_counter()
+    generator = RedNoteContentGenerator(api_key, persona_id=config.get("persona", "forex_gold_trader"),
+                                        account_id=account_id, account_config=config)
+    posts = generator.generate_daily_posts()
+    return generator, posts, time.perf_counter() - started
+
+
+def _persist(generator, posts, generated_at):
+    """Write the post store and TXT for one account (runs on the writer thread)"""
+    generator.save_posts(posts, generated_at)
+    generator.save_as_text(posts, generated_at)
+
+
+def generate_all_accounts(api_key=None, accounts=None, max_workers=None, persist=True, render_service=None):
+    """
+    为所有账户并发生成内容 / Generate content for every account concurrently
+
+    Returns a dict keyed by account_id:
+        {"success": bool, "posts": [...], "pdf": path or None, "elapsed": seconds,
+         "render_seconds": seconds or None, "usage": usage summary or None, "error": str or None}
+    """
+    api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
+    if not api_key:
+        raise ValueError("请设置DEEPSEEK_API_KEY环境变量或传入api_key参数")
+
+    accounts = accounts if accounts is not None else load_accounts()
+    if not accounts:
+        return {}
+
+    max_workers = max_workers or int(os.getenv("REDNOTE_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+    max_workers = max(1, min(max_workers, len(accounts)))
+
+    print(f"\n{'='*60}")
+    print(f"批量生成 / Batch generation - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Accounts: {len(accounts)} | Workers: {max_workers}")
+    print(f"{'='*60}")
+
+    results = {}
+    usage = UsageReport()
+    write_futures = {}
+    render_futures = {}
+    generators = {}
+    batch_started = time.perf_counter()
+    render_pdfs = persist and isinstance(get_storage(), FilesystemStorage)
+    if render_pdfs and render_service is None:
+        from pdf_renderer import RenderService
+        renderer = RenderService()  # ours: shut down on the way out, also when a generator or write raises
+    else:
+        renderer = contextlib.nullcontext(render_service)
+
+    # Exits run in reverse: the generators finish, the writer drains and is joined, then the render pool stops
+    with renderer as render_service, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="rednote-writer") as writer, \
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rednote-gen") as pool:
+        futures = {
+            pool.submit(_generate_one, api_key, account_id, config): account_id
+            for account_id, config in accounts.items()
+        }
+
+        for future in as_completed(futures):
+            account_id = futures[future]
+            try:
+                generator, posts, elapsed = future.result()
+            except Exception as e:
+                results[account_id] = {"success": False, "posts": [], "pdf": None, "elapsed": None,
+                                       "render_seconds": None, "usage": None, "error": str(e)}
+                print(f"  [ERROR] Account {account_id}: {e}")
+                continue
+
+            if generator.last_usage is not None:
+                usage.merge(generator.last_usage)
+            results[account_id] = {"success": bool(posts), "posts": posts, "pdf": None, "elapsed": elapsed,
+                                   "render_seconds": None,
+                                   "usage": generator.last_usage.summary() if generator.last_usage else None,
+                                   "error": None}
+            if posts and persist and not render_pdfs:
+                write_futures[account_id] = writer.submit(generator.persist, posts)
+            elif posts and persist:
+                generated_at = datetime.now()
+                generators[account_id] = (generator, generated_at)
+                write_futures[account_id] = writer.submit(_persist, generator, posts, generated_at)
+                render_futures[account_id] = render_service.submit(
+                    generator.pdf_path(generated_at), account_id, generator.persona['name'], posts, generated_at
+                )
+
+        for account_id, future in write_futures.items():
+            try:
+                future.result()
+                if account_id not in render_futures:
+                    continue
+                pdf_file, render_seconds = render_futures[account_id].result()
+                generator, generated_at = generators[account_id]
+                generator.record_pdf(pdf_file, generated_at)
+                results[account_id]["pdf"] = pdf_file
+                results[account_id]["render_seconds"] = render_seconds
+                print(f"  [OK] Account {account_id} PDF rendered in {render_seconds:.2f}s")
+            except Exception as e:
+                results[account_id]["success"] = False
+                results[account_id]["error"] = f"persist failed: {e}"
+                print(f"  [ERROR] Account {account_id} persist: {e}")
+
+    ok = sum(1 for r in results.values() if r["success"])
+    print(f"\n[OK] 批量生成完成 / Batch complete: {ok}/{len(results)} accounts "
+          f"in {time.perf_counter() - batch_started:.1f}s")
+    print(f"[USAGE] {usage.format()}")
+    return results
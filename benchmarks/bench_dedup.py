@@ -0,0 +1,134 @@
+"""
+Near-duplicate index benchmark
+Fills a DedupIndex (temporary SQLite file) with synthetic posts -- sentences
+drawn from a shared pool of Chinese text, so posts overlap the way templated
+content does -- then measures:
+
+  signature   MinHash of one candidate post
+  find        index lookup for a fresh post / a near-duplicate (signature excluded)
+  add         fingerprint insert
+  recall      near-duplicates (REDNOTE_DEDUP_THRESHOLD-ish edits of stored posts) caught
+  false pos.  fresh posts wrongly rejected
+
+Usage: python benchmarks/bench_dedup.py [--posts 100000] [--queries 2000] [--json FILE]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dedup import DedupIndex, shingles, signature  # noqa: E402
+
+ALPHABET = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)] + list("，。！？：0123456789%$")
+
+
+def make_pool(rng, size):
+    """Sentences of 8-30 characters; a Zipf-like character choice makes common n-grams common"""
+    weights = [1 / (rank + 1) for rank in range(len(ALPHABET))]
+    return ["".join(rng.choices(ALPHABET, weights, k=rng.randint(8, 30))) for _ in range(size)]
+
+
+def make_post(rng, pool):
+    return "\n".join(rng.choices(pool, k=rng.randint(6, 14))) + "\n\n#美股 #投资"
+
+
+def mutate(rng, text, fraction):
+    """Replace a fraction of the characters (a reworded copy)"""
+    chars = list(text)
+    for _ in range(int(len(chars) * fraction)):
+        chars[rng.randrange(len(chars))] = rng.choice(ALPHABET)
+    return "".join(chars)
+
+
+def jaccard(a, b):
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {"p50": ordered[len(ordered) // 2] * 1000,
+            "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            "mean": statistics.fmean(ordered) * 1000}
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash LSH dedup index benchmark")
+    parser.add_argument("--posts", type=int, default=100_000, help="posts stored before measuring")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--edit", type=float, default=0.05, help="fraction of characters changed in near-duplicates")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = make_pool(rng, 50_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DedupIndex(Path(tmp) / "dedup.sqlite", days=0)
+
+        stored, add_times, started = [], [], time.perf_counter()
+        for i in range(args.posts):
+            text = make_post(rng, pool)
+            _, elapsed = timed(index.add, text, f"A{i % 500}", "bench")
+            add_times.append(elapsed)
+            if i % 10 == 0:
+                stored.append(text)
+            if (i + 1) % 20_000 == 0:
+                print(f"  stored {i + 1} posts ({time.perf_counter() - started:.0f}s)")
+        print(f"filled {args.posts} posts in {time.perf_counter() - started:.1f}s")
+
+        sig_times, fresh_times, dup_times = [], [], []
+        false_positives = caught = 0
+        similarities = []
+        for _ in range(args.queries):
+            fresh = make_post(rng, pool)
+            sig, elapsed = timed(signature, fresh)
+            sig_times.append(elapsed)
+            match, elapsed = timed(index.find, fresh, sig=sig)
+            fresh_times.append(elapsed)
+            false_positives += match is not None
+
+            original = rng.choice(stored)
+            near = mutate(rng, original, args.edit)
+            similarities.append(jaccard(original, near))
+            sig = signature(near)
+            match, elapsed = timed(index.find, near, sig=sig)
+            dup_times.append(elapsed)
+            caught += match is not None
+
+    results = {
+        "posts": args.posts,
+        "queries": args.queries,
+        "signature_ms": percentiles(sig_times),
+        "find_fresh_ms": percentiles(fresh_times),
+        "find_duplicate_ms": percentiles(dup_times),
+        "add_ms": percentiles(add_times),
+        "near_duplicate_jaccard": round(statistics.fmean(similarities), 3),
+        "recall": caught / args.queries,
+        "false_positive_rate": false_positives / args.queries,
+    }
+    for name in ("signature_ms", "find_fresh_ms", "find_duplicate_ms", "add_ms"):
+        stats = results[name]
+        print(f"{name:<18} p50 {stats['p50']:.3f} ms  p99 {stats['p99']:.3f} ms  mean {stats['mean']:.3f} ms")
+    print(f"recall {results['recall']:.1%} (mean Jaccard {results['near_duplicate_jaccard']}), "
+          f"false positives {results['false_positive_rate']:.2%}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark against the local fake DeepSeek server
+For each account count (default 1, 5, 50 and 500) it measures
+  - generation:  posts/sec and per-account latency of generate_daily_posts
+                 on a worker pool (the batch_generation path)
+  - persistence: save_posts, create_pdf and save_as_text time per account
+  - web:         POST /generate and /generate/stream through the Flask test
+                 client (first --web-limit accounts; the stream also records
+                 time to first token)
+plus the process RSS high-water mark after each stage (and, with
+--trace-memory, the Python heap peak per stage; tracemalloc slows the run
+considerably, so timings from such runs are not comparable).
+
+The fake server runs in a child process so it does not compete for the GIL.
+The generator reaches it through DEEPSEEK_BASE_URL, the client rate limit is
+lifted (--rps) so the fake's latency is what is measured, and every account
+count runs in a fresh temporary directory.
+
+Results are saved as JSON (default benchmarks/results/e2e_<timestamp>.json);
+--compare OLD.json prints the change of the headline metrics.
+
+Usage: python benchmarks/bench_end_to_end.py [--accounts 1,5,50,500] [--latency 0.05] [--error-rate 0]
+       [--stream-delay 0] [--workers 8] [--web-limit 50] [--trace-memory] [-o FILE] [--compare OLD.json]
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_deepseek import FakeDeepSeek
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+API_KEY = "bench-key"
+RESULTS_DIR = Path(__file__).parent / "results"
+PERSONA_IDS = ["forex_gold_trader", "ea_tech_expert", "astock_analyst", "ea_philosophy_teacher",
+               "portfolio_diary_keeper"]
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def latency_summary(seconds):
+    """count / mean / p50 / p95 / p99 / max in milliseconds"""
+    if not seconds:
+        return {"count": 0}
+    ms = [s * 1000 for s in seconds]
+    return {"count": len(ms), "mean_ms": round(sum(ms) / len(ms), 2),
+            **{f"p{p}_ms": round(percentile(ms, p), 2) for p in (50, 95, 99)},
+            "max_ms": round(max(ms), 2)}
+
+
+def rss_high_water_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextlib.contextmanager
+def stage(result):
+    """Time a stage and record its memory high-water marks into `result`"""
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    yield
+    result["wall_seconds"] = round(time.perf_counter() - started, 3)
+    result["rss_high_water_mb"] = rss_high_water_mb()
+    if tracemalloc.is_tracing():
+        result["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+
+
+def _serve(conn, settings):
+    server = FakeDeepSeek(**settings).start()
+    conn.send(server.base_url)
+    conn.recv()  # block until the parent is done
+    server.stop()
+
+
+def start_fake_server(**settings):
+    """Run FakeDeepSeek in a child process; returns (base_url, stop)"""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, settings), daemon=True)
+    process.start()
+    base_url = parent.recv()
+
+    def stop():
+        parent.send(None)
+        process.join(timeout=10)
+
+    return base_url, stop
+
+
+def bench_generation(generator_cls, accounts, workers):
+    def one(item):
+        account_id, config = item
+        started = time.perf_counter()
+        generator = generator_cls(API_KEY, persona_id=config["persona"], account_id=account_id)
+        posts = generator.generate_daily_posts()
+        return generator, posts, time.perf_counter() - started
+
+    result = {}
+    with stage(result):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(accounts)))) as pool:
+            outcomes = list(pool.map(one, accounts.items()))
+
+    posts = sum(len(p) for _, p, _ in outcomes)
+    result.update({
+        "posts": posts,
+        "backup_posts": sum(1 for _, p, _ in outcomes for post in p if post.get("backup")),
+        "posts_per_sec": round(posts / result["wall_seconds"], 2) if result["wall_seconds"] else None,
+        "latency": latency_summary([elapsed for _, _, elapsed in outcomes]),
+    })
+    return result, [(generator, posts) for generator, posts, _ in outcomes]
+
+
+def bench_persistence(generated):
+    timings = {"store": [], "pdf": [], "txt": []}
+    result = {}
+    with stage(result):
+        for generator, posts in generated:
+            generated_at = datetime.now()
+            for name, step in (("store", generator.save_posts), ("pdf", generator.create_pdf),
+                               ("txt", generator.save_as_text)):
+                started = time.perf_counter()
+                step(posts, generated_at)
+                timings[name].append(time.perf_counter() - started)
+    result.update({name: latency_summary(values) for name, values in timings.items()})
+    return result
+
+
+def bench_web(app, account_ids):
+    client = app.test_client()
+    generate, stream, first_token, failures = [], [], [], 0
+    result = {}
+    with stage(result):
+        for account_id in account_ids:
+            started = time.perf_counter()
+            response = client.post("/generate", json={"account_id": account_id})
+            generate.append(time.perf_counter() - started)
+            failures += not response.get_json().get("success")
+
+            started = time.perf_counter()
+            response = client.post("/generate/stream", json={"account_id": account_id}, buffered=False)
+            for i, chunk in enumerate(response.response):
+                if i == 0:
+                    first_token.append(time.perf_counter() - started)
+            response.close()
+            stream.append(time.perf_counter() - started)
+    result.update({"requests": len(account_ids), "failed_generate": failures,
+                   "generate": latency_summary(generate), "stream": latency_summary(stream),
+                   "stream_first_event": latency_summary(first_token)})
+    return result
+
+
+def run_once(count, args, modules):
+    generator_module, web_module = modules
+    accounts = {f"{i:03d}": {"persona": PERSONA_IDS[i % len(PERSONA_IDS)]} for i in range(count)}
+    home = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="rednote-bench-", ignore_cleanup_errors=True) as workdir:
+        os.chdir(workdir)
+        try:
+            generator_module.save_accounts(accounts)
+            quiet = open(os.devnull, "w", encoding="utf-8") if not args.verbose else None
+            with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+                generation, generated = bench_generation(generator_module.RedNoteContentGenerator,
+                                                         accounts, args.workers)
+                persistence = bench_persistence(generated)
+                web = bench_web(web_module.app, list(accounts)[:args.web_limit])
+            if quiet:
+                quiet.close()
+        finally:
+            os.chdir(home)
+    return {"accounts": count, "generation": generation, "persistence": persistence, "web": web,
+            "rss_high_water_mb": rss_high_water_mb()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+HEADLINES = [
+    ("posts/sec", ("generation", "posts_per_sec")),
+    ("generation p95 ms", ("generation", "latency", "p95_ms")),
+    ("pdf p95 ms", ("persistence", "pdf", "p95_ms")),
+    ("txt p95 ms", ("persistence", "txt", "p95_ms")),
+    ("web /generate p95 ms", ("web", "generate", "p95_ms")),
+    ("rss high-water MB", ("rss_high_water_mb",)),
+]
+
+
+def _lookup(run, path):
+    for key in path:
+        run = run.get(key) if isinstance(run, dict) else None
+    return run
+
+
+def print_run(run):
+    g, p, w = run["generation"], run["persistence"], run["web"]
+    print(f"{run['accounts']:>4} accounts | {g['posts_per_sec']:>7} posts/s  "
+          f"gen p50/p95/p99 {g['latency']['p50_ms']}/{g['latency']['p95_ms']}/{g['latency']['p99_ms']} ms | "
+          f"pdf p95 {p['pdf']['p95_ms']} ms  txt p95 {p['txt']['p95_ms']} ms | "
+          f"web p95 {w['generate'].get('p95_ms')} ms | rss {run['rss_high_water_mb']} MB")
+
+
+def compare(old_path, runs):
+    old = {run["accounts"]: run for run in json.loads(Path(old_path).read_text(encoding="utf-8"))["runs"]}
+    print(f"\nvs {old_path}")
+    for run in runs:
+        before = old.get(run["accounts"])
+        if before is None:
+            continue
+        for label, path in HEADLINES:
+            a, b = _lookup(before, path), _lookup(run, path)
+            if a and b is not None:
+                print(f"  {run['accounts']:>4} accounts  {label:<22} {a:>10} -> {b:<10} ({(b - a) / a:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against a fake DeepSeek server")
+    parser.add_argument("--accounts", default="1,5,50,500", help="comma-separated account counts")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-delay", type=float, default=0.0, help="delay between streamed deltas")
+    parser.add_argument("--workers", type=int, default=8, help="generation worker threads")
+    parser.add_argument("--web-limit", type=int, default=50, help="max accounts driven through the web routes")
+    parser.add_argument("--rps", default="100000", help="client rate limit (REDNOTE_RATE_LIMIT_RPS)")
+    parser.add_argument("-o", "--output", help="results file (default benchmarks/results/e2e_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    parser.add_argument("--trace-memory", action="store_true", help="record per-stage heap peaks (slow)")
+    parser.add_argument("--verbose", action="store_true", help="keep generator output")
+    args = parser.parse_args()
+
+    base_url, stop_server = start_fake_server(latency=args.latency, error_rate=args.error_rate,
+                                              stream_delay=args.stream_delay)
+    # Read at import time by the generator, rate limiter and web modules
+    os.environ["DEEPSEEK_BASE_URL"] = base_url
+    os.environ["DEEPSEEK_API_KEY"] = API_KEY
+    os.environ["REDNOTE_RATE_LIMIT_RPS"] = args.rps
+    os.environ.pop("REDNOTE_CACHE_DIR", None)
+    # The fake server answers every prompt with the same text; dedup would reject all but the first post
+    os.environ["REDNOTE_DEDUP"] = "0"
+    import rednote_content_generator
+    import web_interface
+
+    if args.trace_memory:
+        tracemalloc.start()
+    runs = []
+    for count in (int(c) for c in args.accounts.split(",") if c.strip()):
+        run = run_once(count, args, (rednote_content_generator, web_interface))
+        print_run(run)
+        runs.append(run)
+    tracemalloc.stop()
+    stop_server()
+
+    results = {
+        "benchmark": "end_to_end",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"latency": args.latency, "error_rate": args.error_rate, "stream_delay": args.stream_delay,
+                     "workers": args.workers, "web_limit": args.web_limit, "rps": args.rps,
+                     "trace_memory": args.trace_memory,
+                     "posts_per_run": rednote_content_generator.POSTS_PER_RUN},
+        "runs": runs,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"e2e_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResults saved: {output}")
+
+    if args.compare:
+        compare(args.compare, runs)
+
+
+if __name__ == "__main__":
+    main()
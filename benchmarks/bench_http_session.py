@@ -0,0 +1,73 @@
+"""
+Benchmark: pooled keep-alive Session vs. bare requests.post
+Runs a local stub of the DeepSeek chat completions endpoint and counts how
+many TCP connections the server accepts for N sequential calls.
+
+Usage: python benchmarks/bench_http_session.py [calls]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from http_client import build_session, default_timeout
+
+RESPONSE = json.dumps({"choices": [{"message": {"content": "stub"}}]}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, post, url, calls):
+    StubHandler.connections = 0
+    payload = {"model": "deepseek-chat", "messages": [{"role": "user", "content": "hi"}]}
+    started = time.perf_counter()
+    for _ in range(calls):
+        post(url, json=payload, timeout=default_timeout()).json()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {calls} calls  {elapsed * 1000 / calls:7.2f} ms/call  "
+          f"{StubHandler.connections} connections")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    run("requests.post", requests.post, url, calls)
+    session = build_session()
+    run("pooled Session", session.post, url, calls)
+    session.close()
+    server.shutdown()
+    print("(TLS handshakes to api.deepseek.com scale with the connection count above)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: render 1,000 Chinese posts to PDF
+Lays the posts out as documents of 10 posts each (the daily shape) and compares
+  - naive: parse the CJK TTF again for every document (what registering
+    the font inside create_pdf would do)
+  - cached: pdf_renderer.render_pdf with the per-process font registration,
+    on-disk parsed face and subset caches
+With no CJK TTF available (REDNOTE_CJK_FONT unset and none installed), only the
+cached path runs, using ReportLab's built-in STSong-Light CID font.
+
+Usage: python benchmarks/bench_pdf_cjk.py [posts] [posts_per_document]
+"""
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+import pdf_fonts
+from pdf_renderer import escape_markup, render_pdf
+
+SAMPLE = ("黄金今天又突破新高，美元指数回落，市场风险偏好明显下降。散户追高要小心，"
+          "机构仓位已经开始调整。记住：纪律比预测更重要 🚀 止损是交易者最好的朋友 ✨")
+
+
+def make_posts(count):
+    rng = random.Random(13)
+    posts = []
+    for i in range(count):
+        cut = rng.randint(40, len(SAMPLE))
+        posts.append({'number': i % 10 + 1, 'content': f"{SAMPLE[:cut]} #{i}"})
+    return posts
+
+
+def naive_render(path, font_path, posts, n):
+    """Register the TTF from scratch for this document"""
+    font_name = f"NaiveCJK{n}"
+    pdfmetrics.registerFont(TTFont(font_name, font_path))
+    style = ParagraphStyle(name='Content', fontName=font_name, fontSize=12, spaceAfter=15)
+    story = []
+    for i, post in enumerate(posts):
+        story.append(Paragraph(escape_markup(post['content']), style))
+        if i < len(posts) - 1:
+            story.append(PageBreak())
+    SimpleDocTemplate(str(path), pagesize=letter).build(story)
+
+
+def measure(label, render, documents, out_dir):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first = None
+    for n, posts in enumerate(documents):
+        render(out_dir / f"{label}_{n}.pdf", posts, n)
+        if first is None:
+            first = time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = sum(p.stat().st_size for p in out_dir.glob(f"{label}_*.pdf"))
+    print(f"{label:<8} {elapsed:7.2f}s total  {elapsed * 1000 / len(documents):7.1f} ms/doc  "
+          f"first doc {first * 1000:7.1f} ms  peak {peak / 1e6:6.1f} MB  output {size / 1e6:6.2f} MB")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    per_doc = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    posts = make_posts(total)
+    documents = [posts[i:i + per_doc] for i in range(0, total, per_doc)]
+
+    fontset = pdf_fonts.register_fonts()
+    font_paths = pdf_fonts._find_cjk_font()
+    print(f"{total} posts in {len(documents)} documents | body font: {fontset.body}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        if font_paths:
+            font_path = font_paths[0][0]
+            measure("naive", lambda path, p, n: naive_render(path, font_path, p, n), documents, out_dir)
+        generated_at = datetime.now()
+        measure("cached", lambda path, p, n: render_pdf(path, "B", "基准", p, generated_at), documents, out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: per-call allocation of the DeepSeek request payload
+Compares rebuilding the system prompt by concatenation on every call (the
+previous behaviour) with the memoized per-persona payload template.
+
+Usage: python benchmarks/bench_prompt_build.py [calls]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rednote_content_generator import RedNoteContentGenerator, SYSTEM_PROMPT, USER_PROMPT_SUFFIX
+
+
+def legacy_build(generator, prompt):
+    """Previous hot path: headers, system prompt and payload rebuilt every call"""
+    headers = {
+        "Authorization": f"Bearer {generator.api_key}",
+        "Content-Type": "application/json"
+    }
+    system_prompt = "".join([SYSTEM_PROMPT])  # force a fresh copy like the old literal + concat
+    system_prompt += f"\n\n{generator.persona['voice']}\n\n只输出帖子内容本身，不要有其他说明。"
+    data = {
+        "model": "deepseek-chat",
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"{prompt}{USER_PROMPT_SUFFIX}"}
+        ],
+        "temperature": 1.0,
+        "max_tokens": 2000,
+        "stream": False
+    }
+    return headers, data
+
+
+def measure(label, build, generator, calls):
+    prompt = generator.prompts[0]
+    build(generator, prompt)  # warm caches
+
+    tracemalloc.start()
+    keep = []
+    for _ in range(calls):
+        keep.append(build(generator, prompt))
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    keep.clear()
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        build(generator, prompt)
+    elapsed = time.perf_counter() - started
+
+    print(f"{label:<18} {allocated / calls:9.0f} B/call  {elapsed * 1e6 / calls:7.2f} us/call")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    generator = RedNoteContentGenerator("sk-bench", persona_id="astock_analyst")
+    measure("rebuild per call", legacy_build, generator, calls)
+    measure("cached template", RedNoteContentGenerator.build_api_request, generator, calls)
+
+
+if __name__ == "__main__":
+    main()
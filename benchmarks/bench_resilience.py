@@ -0,0 +1,68 @@
+"""
+Resilience scenarios against the local fake DeepSeek server
+  1. transient 503s are retried until success
+  2. 429 with Retry-After is honoured
+  3. sustained failures open the circuit breaker and later calls fail fast
+  4. a slow server is cut off by the total generation deadline
+
+Usage: python benchmarks/bench_resilience.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_deepseek import FakeDeepSeek
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, resilient_post_json
+
+PAYLOAD = {"model": "deepseek-chat", "messages": [{"role": "user", "content": "hi"}]}
+FAST = RetryPolicy(max_attempts=4, base_delay=0.05, max_delay=0.2)
+
+
+def scenario(label, fn):
+    started = time.perf_counter()
+    try:
+        outcome = fn()
+    except Exception as e:
+        outcome = f"{type(e).__name__}: {e}"
+    print(f"{label:<34} {time.perf_counter() - started:6.2f}s  {outcome}")
+
+
+def main():
+    server = FakeDeepSeek(fail_first=2).start()
+    scenario("transient 503 x2 then success",
+             lambda: f"status={resilient_post_json(server.url, PAYLOAD, policy=FAST, breaker=CircuitBreaker()).status_code} "
+                     f"requests={server.requests}")
+    server.stop()
+
+    server = FakeDeepSeek(fail_first=1, error_status=429, retry_after=1).start()
+    scenario("429 with Retry-After: 1",
+             lambda: resilient_post_json(server.url, PAYLOAD, policy=FAST, breaker=CircuitBreaker()).status_code)
+    server.stop()
+
+    server = FakeDeepSeek(error_rate=1.0).start()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    scenario("sustained 503 (opens breaker)",
+             lambda: resilient_post_json(server.url, PAYLOAD, policy=FAST, breaker=breaker).status_code)
+    fast_fails = 0
+    started = time.perf_counter()
+    for _ in range(100):
+        try:
+            resilient_post_json(server.url, PAYLOAD, policy=FAST, breaker=breaker)
+        except CircuitOpenError:
+            fast_fails += 1
+    print(f"{'100 calls while breaker open':<34} {time.perf_counter() - started:6.2f}s  "
+          f"fast-failed={fast_fails} server requests={server.requests}")
+    server.stop()
+
+    server = FakeDeepSeek(latency=2.0).start()
+    scenario("2s latency, 0.5s deadline",
+             lambda: resilient_post_json(server.url, PAYLOAD, deadline=0.5, policy=FAST,
+                                         breaker=CircuitBreaker()).status_code)
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cold-start budget check
+Starts each entry point in a fresh interpreter under `python -X importtime`
+and reports the median import time, the slowest modules and (for the
+serverless app) the first GET /health. Exits 1 when an entry point goes over
+its budget or loads a module that should stay deferred until first use
+(ReportLab, requests/urllib3, httpx, asyncio, sqlite3).
+
+  serverless  api/index.py -> web_interface_vercel (Vercel cold start)
+  generator   rednote_content_generator
+  web         web_interface
+
+Budgets are milliseconds of cumulative import time for the entry module and
+depend on the machine; override them per entry point with --budget.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--budget serverless=250] [--json FILE]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+DEFERRED = ("reportlab", "requests", "urllib3", "httpx", "asyncio", "sqlite3")
+
+# name -> (module whose cumulative import time is measured, budget ms, modules that must not be loaded)
+ENTRY_POINTS = {
+    "serverless": ("index", 250, DEFERRED),
+    "generator": ("rednote_content_generator", 100, DEFERRED[:5]),
+    "web": ("web_interface", 300, DEFERRED[:5]),
+}
+
+PROBE = """
+import json, sys, time
+sys.path[:0] = [{root!r}, {api!r}]
+import {module}
+loaded = sorted(name for name in {deferred!r} if name in sys.modules)
+health_ms = None
+if {health!r}:
+    client = {module}.app.test_client()
+    started = time.perf_counter()
+    client.get('/health')
+    health_ms = (time.perf_counter() - started) * 1000
+    loaded = sorted(set(loaded) | {{name for name in {deferred!r} if name in sys.modules}})
+print(json.dumps({{"loaded": loaded, "health_ms": health_ms}}))
+"""
+
+
+def parse_importtime(stderr):
+    """[(self_us, cumulative_us, depth, module)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def probe(name):
+    module, _, deferred = ENTRY_POINTS[name]
+    code = PROBE.format(root=str(ROOT), api=str(ROOT / "api"), module=module, deferred=deferred,
+                        health=name == "serverless")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            cwd=ROOT, timeout=120)
+    process_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{name}: probe failed\n{result.stderr[-2000:]}")
+
+    rows = parse_importtime(result.stderr)
+    entry = [cumulative for _, cumulative, _, mod in rows if mod == module]
+    info = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"import_ms": entry[-1] / 1000 if entry else None, "process_ms": process_ms,
+            "rows": rows, **info}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import budget check")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", action="append", default=[], help="name=ms, e.g. serverless=250")
+    parser.add_argument("--only", help="comma-separated entry points (default: all)")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules to list")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    budgets = {name: budget for name, (_, budget, _) in ENTRY_POINTS.items()}
+    for item in args.budget:
+        name, _, ms = item.partition("=")
+        budgets[name] = float(ms)
+    names = args.only.split(",") if args.only else list(ENTRY_POINTS)
+
+    failed, results = False, {}
+    for name in names:
+        runs = [probe(name) for _ in range(args.runs)]
+        import_ms = statistics.median(r["import_ms"] for r in runs)
+        process_ms = statistics.median(r["process_ms"] for r in runs)
+        health = [r["health_ms"] for r in runs if r["health_ms"] is not None]
+        loaded = sorted({mod for r in runs for mod in r["loaded"]})
+        over = import_ms > budgets[name]
+        failed |= over or bool(loaded)
+
+        status = "OVER BUDGET" if over else "ok"
+        print(f"{name:<11} import {import_ms:7.1f} ms (budget {budgets[name]:.0f}, {status})  "
+              f"process {process_ms:7.1f} ms" + (f"  first /health {statistics.median(health):5.1f} ms" if health else ""))
+        if loaded:
+            print(f"            [FAIL] loaded at startup, should be deferred: {', '.join(loaded)}")
+        slowest = sorted(runs[-1]["rows"], key=lambda row: row[0], reverse=True)[:args.top]
+        print("            slowest (self): " + ", ".join(f"{mod} {us / 1000:.1f}ms" for us, _, _, mod in slowest))
+
+        results[name] = {"import_ms": round(import_ms, 1), "process_ms": round(process_ms, 1),
+                         "first_health_ms": round(statistics.median(health), 1) if health else None,
+                         "budget_ms": budgets[name], "over_budget": over, "deferred_violations": loaded}
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"python": sys.version.split()[0], "runs": args.runs,
+                                               "entry_points": results}, indent=2), encoding="utf-8")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
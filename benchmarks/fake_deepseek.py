@@ -0,0 +1,205 @@
+"""
+Local fake of the DeepSeek chat completions endpoint
+Injects latency and failures so retries, circuit breaking and throughput can
+be exercised without touching api.deepseek.com.
+
+Run standalone:  python benchmarks/fake_deepseek.py --port 8900 --latency 0.2 --error-rate 0.1
+                 DEEPSEEK_BASE_URL=http://127.0.0.1:8900/v1 python rednote_content_generator.py
+Or in-process:   server = FakeDeepSeek(latency=0.05).start(); server.url / server.base_url
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION_TEXT = "今日复盘｜缩量震荡，耐心等待信号\n\n纪律比判断重要，耐心比聪明重要。\n\n#交易 #复盘"
+
+
+def _common_prefix_len(a, b):
+    """Length of the shared prefix, by binary search over slice comparisons (C speed, unlike a per-char loop)"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class FakeDeepSeek:
+    """Threaded fake server; settings may be changed while it runs"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 error_status=503, retry_after=None, fail_first=0, content=COMPLETION_TEXT, batch_valid=True,
+                 stream_chunk=8, stream_delay=0.0):
+        self.latency = latency              # seconds before responding
+        self.error_rate = error_rate        # probability of an injected error
+        self.error_status = error_status    # status code used for injected errors
+        self.retry_after = retry_after      # Retry-After header value on errors
+        self.fail_first = fail_first        # deterministically fail the first N requests
+        self.content = content
+        self.batch_valid = batch_valid      # False: answer JSON-mode (batched) requests with broken JSON
+        self.stream_chunk = stream_chunk    # characters per streamed delta
+        self.stream_delay = stream_delay    # seconds between streamed deltas
+        self.requests = 0
+        self.connections = 0
+        self._prompts = []                  # recent prompts, for simulated prefix caching
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def url(self):
+        return f"{self.base_url}/chat/completions"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _should_fail(self):
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.fail_first:
+                return True
+        return random.random() < self.error_rate
+
+    def cache_hit_chars(self, prompt):
+        """Simulated context cache: longest prefix shared with a recent prompt, in 64-unit blocks"""
+        with self._lock:
+            best = max((_common_prefix_len(prompt, p) for p in self._prompts), default=0)
+            self._prompts = (self._prompts + [prompt])[-64:]
+        return best // 64 * 64
+
+    def content_for(self, body):
+        """Plain completion text, or a {"posts": [...]} object for JSON-mode batch requests"""
+        if (body.get("response_format") or {}).get("type") != "json_object":
+            return self.content
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        match = re.search(r"恰好包含 (\d+) 项", prompt)
+        count = int(match.group(1)) if match else 1
+        posts = [{"content": f"{self.content}\n\n（第{i}篇）"} for i in range(1, count + 1)]
+        text = json.dumps({"posts": posts}, ensure_ascii=False)
+        return text if self.batch_valid else text[:len(text) // 2]
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if fake._should_fail():
+                    payload = json.dumps({"error": {"message": "injected failure"}}).encode("utf-8")
+                    self.send_response(fake.error_status)
+                    if fake.retry_after is not None:
+                        self.send_header("Retry-After", str(fake.retry_after))
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                if body.get("stream"):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+
+            def _usage(self, body, content=None):
+                prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+                prompt_tokens = len(prompt)
+                hit = fake.cache_hit_chars(prompt)
+                completion_tokens = len(content if content is not None else fake.content)
+                return {
+                    "prompt_tokens": prompt_tokens,
+                    "prompt_cache_hit_tokens": hit,
+                    "prompt_cache_miss_tokens": prompt_tokens - hit,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+
+            def _complete(self, body):
+                content = fake.content_for(body)
+                payload = json.dumps({
+                    "id": "fake-completion",
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": self._usage(body, content)
+                }, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                step = max(1, fake.stream_chunk)
+                for i in range(0, len(fake.content), step):
+                    if i and fake.stream_delay:
+                        time.sleep(fake.stream_delay)
+                    chunk = {"choices": [{"index": 0, "delta": {"content": fake.content[i:i + step]}}]}
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                final = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": self._usage(body)}
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake DeepSeek chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", default=None)
+    parser.add_argument("--stream-chunk", type=int, default=8)
+    parser.add_argument("--stream-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeDeepSeek(args.host, args.port, args.latency, args.error_rate, args.error_status, args.retry_after,
+                          stream_chunk=args.stream_chunk, stream_delay=args.stream_delay)
+    print(f"Fake DeepSeek listening on {server.url} (Ctrl+C to stop)")
+    print(f"Point the generator at it with DEEPSEEK_BASE_URL={server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
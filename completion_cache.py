@@ -0,0 +1,130 @@
+# completion_cache.py
+"""
+Content-addressed cache for DeepSeek completions
+Keys are a SHA-256 of (model, system prompt, user prompt, temperature,
+max_tokens, cache-bust seed). Two tiers:
+  - memory: LRU with TTL, bounded entry count
+  - disk:   one JSON file per key under Growth/.cache/completions, with TTL
+Callers opt in per call (use_cache=True); nothing is cached by default. With
+use_cache the generator asks with the prompt the account drew last time
+(rotation history), so a regenerate or retry maps to the same key.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_DISK_DIR = Path("Growth") / ".cache" / "completions"
+DEFAULT_MEMORY_TTL = float(os.getenv("REDNOTE_CACHE_MEMORY_TTL", str(6 * 3600)))
+DEFAULT_DISK_TTL = float(os.getenv("REDNOTE_CACHE_DISK_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("REDNOTE_CACHE_MAX_ENTRIES", "512"))
+
+
+def completion_key(payload, seed=None):
+    """Hash the parts of a chat-completions payload that determine the output"""
+    messages = payload["messages"]
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    material = json.dumps(
+        [payload["model"], system, user, payload.get("temperature"), payload.get("max_tokens"), seed],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier (memory LRU + disk) completion cache with per-tier TTL"""
+
+    def __init__(self, disk_dir=DEFAULT_DISK_DIR, memory_ttl=DEFAULT_MEMORY_TTL,
+                 disk_ttl=DEFAULT_DISK_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.memory_ttl = memory_ttl
+        self.disk_ttl = disk_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (stored_at, content)
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return cached content for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.memory_ttl:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - record.get("stored_at", 0) > self.disk_ttl:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        self._remember(key, record["content"], record["stored_at"])
+        return record["content"]
+
+    def put(self, key, content):
+        """Store content in both tiers"""
+        stored_at = time.time()
+        self._remember(key, content, stored_at)
+
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "content": content}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] 缓存写入失败 / cache write failed: {e}")
+
+    def _remember(self, key, content, stored_at):
+        with self._lock:
+            self._memory[key] = (stored_at, content)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every memory entry and delete the disk tier files"""
+        with self._lock:
+            self._memory.clear()
+        if self.disk_dir is not None and self.disk_dir.exists():
+            for path in self.disk_dir.glob("*/*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_completion_cache():
+    """Process-wide cache; disk tier under REDNOTE_CACHE_DIR or Growth/.cache/completions"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = CompletionCache(os.getenv("REDNOTE_CACHE_DIR") or DEFAULT_DISK_DIR)
+    return _default_cache
@@ -0,0 +1,297 @@
+# dedup.py
+"""
+Near-duplicate detection for generated posts
+Every accepted post is fingerprinted with a MinHash signature over character
+n-gram shingles (Chinese has no word boundaries, so shingles are characters),
+and the signature is split into LSH bands stored in SQLite next to the posts
+(Growth/.dedup.sqlite for the filesystem backend). A candidate whose estimated
+Jaccard similarity to any post from the last REDNOTE_DEDUP_DAYS days reaches
+REDNOTE_DEDUP_THRESHOLD is rejected; generate_daily_posts then regenerates it.
+
+Signatures use one-permutation hashing: each shingle is hashed once and kept
+as the minimum of one of NUM_PERM bins, empty bins are filled from their
+right-hand neighbour (rotation densification). That is O(shingles) instead of
+O(shingles * NUM_PERM) and needs no numpy. A lookup reads BANDS primary-key
+rows plus the signatures of the few candidates, so it stays well under a
+millisecond at 100k stored posts (benchmarks/bench_dedup.py).
+
+    REDNOTE_DEDUP            0 disables the check (default on)
+    REDNOTE_DEDUP_THRESHOLD  similarity at which a post is a duplicate (default 0.7)
+    REDNOTE_DEDUP_DAYS       how far back to compare (default 90, 0 = forever)
+    REDNOTE_DEDUP_RETRIES    regenerations per rejected post (default 2)
+
+Usage: python dedup.py rebuild [folder]   # re-fingerprint the post stores in Growth/
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from pathlib import Path
+
+DEDUP_ENABLED = os.getenv("REDNOTE_DEDUP", "1") != "0"
+DEDUP_THRESHOLD = float(os.getenv("REDNOTE_DEDUP_THRESHOLD", "0.7"))
+DEDUP_DAYS = float(os.getenv("REDNOTE_DEDUP_DAYS", "90"))
+DEDUP_RETRIES = int(os.getenv("REDNOTE_DEDUP_RETRIES", "2"))
+
+INDEX_FILENAME = ".dedup.sqlite"
+SHINGLE_SIZE = 3
+NUM_PERM = 120
+BANDS, ROWS = 20, 6  # candidate probability 1 - (1 - s^6)^20: 0.92 at s=0.7, 0.998 at s=0.8
+PREVIEW_CHARS = 80
+
+_MASK64 = (1 << 64) - 1
+_MASK32 = 0xFFFFFFFF
+_MIX = 0x9E3779B97F4A7C15  # odd 64-bit multiplier (golden ratio)
+_EMPTY = _MASK32 + 1
+_IGNORED = re.compile(r"#\S+|\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id INTEGER PRIMARY KEY,
+    account_id TEXT,
+    persona_id TEXT,
+    created_at REAL NOT NULL,
+    preview TEXT,
+    digest BLOB NOT NULL,            -- hash of the normalized text
+    signature BLOB NOT NULL,         -- NUM_PERM uint32 minima
+    UNIQUE (account_id, digest)
+);
+CREATE TABLE IF NOT EXISTS lsh_bands (
+    key INTEGER NOT NULL,            -- band index << 56 | 56-bit hash of the band's rows
+    fingerprint_id INTEGER NOT NULL,
+    PRIMARY KEY (key, fingerprint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dedup_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def normalize(text):
+    """Drop hashtags and whitespace and lowercase, so layout and tags don't hide a repeat"""
+    return _IGNORED.sub("", text or "").lower()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Character n-grams of the normalized text (the whole text when it is shorter than n)"""
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(text):
+    """MinHash signature (array of NUM_PERM uint32), or None for empty text"""
+    grams = shingles(text)
+    if not grams:
+        return None
+    bins = [_EMPTY] * NUM_PERM
+    for gram in grams:
+        h = (zlib.crc32(gram.encode("utf-8")) * _MIX) & _MASK64
+        i = (h * NUM_PERM) >> 64
+        value = h & _MASK32
+        if value < bins[i]:
+            bins[i] = value
+
+    filled = [i for i, value in enumerate(bins) if value != _EMPTY]
+    if len(filled) < NUM_PERM:
+        # Rotation densification: an empty bin borrows the next filled bin to its right
+        nearest = filled[0] + NUM_PERM
+        for i in range(NUM_PERM - 1, -1, -1):
+            if bins[i] != _EMPTY:
+                nearest = i
+                continue
+            distance = nearest - i
+            bins[i] = (bins[nearest % NUM_PERM] + distance * (_MIX >> 32)) & _MASK32
+    return array("I", bins)
+
+
+def digest(text):
+    """Exact-match key of the normalized text"""
+    return hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=16).digest()
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_keys(sig):
+    """One integer key per LSH band"""
+    raw = sig.tobytes()
+    width = ROWS * sig.itemsize
+    return [
+        (band << 56) | int.from_bytes(hashlib.blake2b(raw[band * width:(band + 1) * width], digest_size=7).digest(),
+                                      "little")
+        for band in range(BANDS)
+    ]
+
+
+class DedupIndex:
+    """MinHash LSH index of accepted posts in a SQLite file (":memory:" for a process-local index)"""
+
+    def __init__(self, path, threshold=None, days=None, backfill_from=None):
+        """backfill_from: folder whose post stores are fingerprinted on first open"""
+        self.path = str(path)
+        self.threshold = DEDUP_THRESHOLD if threshold is None else threshold
+        self.days = DEDUP_DAYS if days is None else days
+        self._local = threading.local()
+        if self.path == ":memory:":
+            # Shared-cache memory database so every thread's connection sees the same index
+            self._uri = f"file:rednote_dedup_{id(self)}?mode=memory&cache=shared"
+        else:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._uri = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._anchor = self._connect()  # keeps a shared-cache memory database alive
+        if backfill_from is not None:
+            self.backfill(backfill_from)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._uri:
+                conn = sqlite3.connect(self._uri, uri=True, timeout=30)
+            else:
+                conn = sqlite3.connect(self.path, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def find(self, text, sig=None, account_id=None):
+        """
+        Most similar earlier post at or above the threshold: {'id', 'similarity', 'account_id', ...} or None
+        The exact same post already accepted for account_id (a completion cache replay) is not a duplicate.
+        """
+        sig = sig if sig is not None else signature(text)
+        if sig is None:
+            return None
+        keys = band_keys(sig)
+        params = [*keys]
+        where = ""
+        if self.days:
+            where = "AND f.created_at >= ?"
+            params.append(time.time() - self.days * 86400)
+        rows = self._connect().execute(
+            "SELECT f.id, f.account_id, f.persona_id, f.created_at, f.preview, f.digest, f.signature "
+            "FROM fingerprints f WHERE f.id IN "
+            f"(SELECT fingerprint_id FROM lsh_bands WHERE key IN ({', '.join('?' * len(keys))})) {where}",
+            params
+        ).fetchall()
+
+        best, own = None, digest(text)
+        for fingerprint_id, match_account, persona_id, created_at, preview, match_digest, blob in rows:
+            if match_digest == own and match_account == account_id:
+                continue
+            other = array("I")
+            other.frombytes(blob)
+            score = similarity(sig, other)
+            if score >= self.threshold and (best is None or score > best["similarity"]):
+                best = {"id": fingerprint_id, "similarity": score, "account_id": match_account,
+                        "persona_id": persona_id, "created_at": created_at, "preview": preview}
+        return best
+
+    def add(self, text, account_id=None, persona_id=None, sig=None, created_at=None):
+        """Fingerprint an accepted post (once per account and text); returns its id, None for empty text"""
+        sig = sig if sig is not None else signature(text)
+        if sig is None:
+            return None
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO fingerprints (account_id, persona_id, created_at, preview, digest, signature) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (account_id, persona_id, created_at or time.time(), text[:PREVIEW_CHARS], digest(text), sig.tobytes())
+            )
+            if not cursor.rowcount:
+                return None
+            fingerprint_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO lsh_bands (key, fingerprint_id) VALUES (?, ?)",
+                [(key, fingerprint_id) for key in band_keys(sig)]
+            )
+        return fingerprint_id
+
+    def prune(self, days=None):
+        """Forget fingerprints older than the comparison window; returns how many were removed"""
+        days = self.days if days is None else days
+        if not days:
+            return 0
+        cutoff = time.time() - days * 86400
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM lsh_bands WHERE fingerprint_id IN (SELECT id FROM fingerprints WHERE created_at < ?)",
+                (cutoff,)
+            )
+            return conn.execute("DELETE FROM fingerprints WHERE created_at < ?", (cutoff,)).rowcount
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM lsh_bands")
+            conn.execute("DELETE FROM fingerprints")
+            conn.execute("DELETE FROM dedup_meta")
+
+    def backfill(self, folder):
+        """Fingerprint the non-backup posts of every post store in folder (once per index unless cleared)"""
+        from post_store import STORE_SUFFIX, read_posts
+        conn = self._connect()
+        if conn.execute("SELECT value FROM dedup_meta WHERE key = 'backfilled'").fetchone():
+            return 0
+        count = 0
+        for path in sorted(Path(folder).glob(f"*{STORE_SUFFIX}")):
+            if path.name.startswith("."):  # .usage.jsonl and other logs
+                continue
+            try:
+                meta, posts = read_posts(path)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] 跳过 / skipping {path.name}: {e}")
+                continue
+            created_at = path.stat().st_mtime
+            for post in posts:
+                if not post.get("backup") and self.add(post["content"], meta.get("account_id"),
+                                                       meta.get("persona_id"), created_at=created_at):
+                    count += 1
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO dedup_meta (key, value) VALUES ('backfilled', ?)",
+                         (str(time.time()),))
+        return count
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dedup_index(path, backfill_from=None):
+    """Process-wide DedupIndex per file, or None when REDNOTE_DEDUP=0"""
+    if not DEDUP_ENABLED:
+        return None
+    key = path if path == ":memory:" else str(Path(path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = DedupIndex(path, backfill_from=backfill_from)
+        return index
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "rebuild":
+        print(__doc__.strip().splitlines()[-1])
+        return 2
+    folder = Path(argv[2] if len(argv) > 2 else "Growth")
+    index = DedupIndex(folder / INDEX_FILENAME)
+    index.clear()
+    started = time.perf_counter()
+    count = index.backfill(folder)
+    print(f"[OK] 已索引 {count} 条帖子 / indexed {count} posts from {folder} "
+          f"in {time.perf_counter() - started:.1f}s -> {index.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
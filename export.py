@@ -0,0 +1,271 @@
+# export.py
+"""
+Consolidated export of generated content
+Bundles every document for a set of accounts and a date range into either
+  - one combined PDF: a table of contents page (clickable, plus PDF
+    bookmarks) followed by each account/day rendered with the same story as
+    create_pdf, or
+  - a ZIP of the per-account PDF/TXT/JSONL files with a CONTENTS.txt listing.
+
+Documents are pulled from the output index one at a time. The ZIP is
+streamed to the client as it is written, so its memory stays flat whatever
+the range: use --format zip (format=zip) for large exports.
+
+The combined PDF does not stay flat. ReportLab can only emit a PDF once the
+whole file (cross-reference table included) is finished, and it keeps every
+finished page object until then, and the table of contents holds one entry
+per document. Memory therefore grows with the number of documents (about
+2 MB per 100 documents), so a PDF export is capped at
+REDNOTE_EXPORT_PDF_MAX_DOCUMENTS documents (default 200). A larger range is
+refused with a ValueError that points to the ZIP format. The finished PDF is
+written to a temporary file and then streamed in chunks.
+
+Usage: python export.py --accounts A,B --start 2025-01-01 --end 2025-01-07 [--format pdf|zip] [-o FILE]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate
+
+from output_index import format_date, get_output_index
+from pdf_renderer import build_story, escape_markup, get_styles
+from post_store import read_posts
+
+OUTPUT_FOLDER = "Growth"
+CHUNK_SIZE = 64 * 1024
+TOC_BATCH = 50
+PDF_MAX_DOCUMENTS = int(os.getenv("REDNOTE_EXPORT_PDF_MAX_DOCUMENTS", "200"))
+
+
+def parse_day(value):
+    """'2025-01-07' or '20250107' -> '20250107'"""
+    if not value:
+        return None
+    day = value.replace("-", "")
+    datetime.strptime(day, "%Y%m%d")  # raises ValueError on bad input
+    return day
+
+
+def export_filename(start, end, fmt):
+    return f"RedNote_Export_{start or 'all'}_{end or 'all'}.{fmt}"
+
+
+def _anchor_key(row):
+    return f"doc-{row['account_id']}-{row['date']}"
+
+
+def _document_title(row):
+    persona = f" ({row['persona_name']})" if row.get('persona_name') else ""
+    return f"Account {row['account_id']}{persona} - {format_date(row['date'])}"
+
+
+def load_document(folder, row):
+    """(persona_name, posts, generated_at) for one indexed document"""
+    folder = Path(folder)
+    if row.get('data_name') and (folder / row['data_name']).exists():
+        meta, posts = read_posts(folder / row['data_name'])
+        generated_at = meta.get("generated_at")
+        generated_at = datetime.fromisoformat(generated_at) if generated_at else None
+        persona_name = meta.get("persona_name") or row.get('persona_name')
+    else:
+        posts = get_output_index(folder).get_posts(row.get('pdf_name') or row.get('txt_name')) or []
+        generated_at, persona_name = None, row.get('persona_name')
+    return persona_name or "", posts, generated_at or datetime.strptime(row['date'][:8], "%Y%m%d")
+
+
+class _Anchor(Flowable):
+    """Zero-size flowable marking a document start: named destination + outline entry"""
+
+    def __init__(self, key, title):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.width = self.height = 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+
+
+class _StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate fed from an iterator of flowable chunks instead of one full story list"""
+
+    def __init__(self, filename, chunks, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._chunks = chunks
+        self._story = None
+
+    def build(self, flowables, **kwargs):
+        self._story = flowables
+        super().build(flowables, **kwargs)
+
+    def filterFlowables(self, flowables):
+        # Also called for ReportLab's internal 'hanging' list; only the story is refilled.
+        # build() stops when the story is empty, so keep one flowable queued behind the current one
+        while flowables is self._story and len(flowables) < 2:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            flowables.extend(chunk)
+
+
+def _pdf_chunks(folder, account_ids, start, end):
+    styles = get_styles()
+    index = get_output_index(folder)
+
+    heading = f"RedNote Export - {format_date(start) if start else '...'} to {format_date(end) if end else '...'}"
+    yield [Paragraph(escape_markup(heading), styles['Header'])]
+
+    # 目录 / table of contents: one clickable line per document
+    batch, count = [], 0
+    for row in index.iter_documents(account_ids, start, end):
+        count += 1
+        batch.append(Paragraph(
+            f'<a href="#{_anchor_key(row)}" color="blue">{escape_markup(_document_title(row))}</a>',
+            styles['Normal']
+        ))
+        if len(batch) >= TOC_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+    if count == 0:
+        yield [Paragraph("No documents in this range.", styles['Normal'])]
+        return
+
+    for row in index.iter_documents(account_ids, start, end):
+        persona_name, posts, generated_at = load_document(folder, row)
+        yield [PageBreak(), _Anchor(_anchor_key(row), _document_title(row))] + \
+            build_story(row['account_id'], persona_name, posts, generated_at, styles)
+
+
+def check_pdf_range(folder=OUTPUT_FOLDER, account_ids=None, start=None, end=None):
+    """Raise ValueError when the range has more documents than a combined PDF may hold"""
+    count = get_output_index(folder).count_documents(account_ids, start, end)
+    if count > PDF_MAX_DOCUMENTS:
+        raise ValueError(f"{count} documents in range; a combined PDF holds at most {PDF_MAX_DOCUMENTS} "
+                         f"(REDNOTE_EXPORT_PDF_MAX_DOCUMENTS) because its memory grows with the range. "
+                         f"Narrow the range or use the zip format, which is streamed")
+    return count
+
+
+def write_pdf(out, folder=OUTPUT_FOLDER, account_ids=None, start=None, end=None):
+    """Write the combined PDF to a path or binary file object (at most PDF_MAX_DOCUMENTS documents)"""
+    check_pdf_range(folder, account_ids, start, end)
+    chunks = _pdf_chunks(folder, account_ids, start, end)
+    doc = _StreamingDocTemplate(out, chunks, pagesize=letter, title="RedNote Export")
+    doc.build(list(next(chunks)))
+    return out
+
+
+def stream_pdf(folder=OUTPUT_FOLDER, account_ids=None, start=None, end=None):
+    """Yield the combined PDF in CHUNK_SIZE pieces"""
+    with tempfile.TemporaryFile() as tmp:
+        write_pdf(tmp, folder, account_ids, start, end)
+        tmp.seek(0)
+        for block in iter(lambda: tmp.read(CHUNK_SIZE), b""):
+            yield block
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that zipfile writes into and the generator drains"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _document_files(folder, row):
+    for column in ('pdf_name', 'txt_name', 'data_name'):
+        name = row.get(column)
+        if name and (Path(folder) / name).exists():
+            yield name
+
+
+def stream_zip(folder=OUTPUT_FOLDER, account_ids=None, start=None, end=None):
+    """Yield a ZIP of the per-document files as it is written"""
+    folder = Path(folder)
+    index = get_output_index(folder)
+    sink = _StreamBuffer()
+
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("CONTENTS.txt", "w") as entry:
+            for row in index.iter_documents(account_ids, start, end):
+                files = ", ".join(f"{row['date']}/{name}" for name in _document_files(folder, row))
+                entry.write(f"{_document_title(row)}: {files}\n".encode("utf-8"))
+        yield sink.drain()
+
+        for row in index.iter_documents(account_ids, start, end):
+            for name in _document_files(folder, row):
+                with open(folder / name, "rb") as src, zf.open(f"{row['date']}/{name}", "w") as entry:
+                    for block in iter(lambda: src.read(CHUNK_SIZE), b""):
+                        entry.write(block)
+                        yield sink.drain()
+    yield sink.drain()
+
+
+def stream_export(fmt="pdf", folder=OUTPUT_FOLDER, account_ids=None, start=None, end=None):
+    """
+    Byte-chunk generator for the requested export format ('pdf' or 'zip')
+    Raises ValueError up front (before any bytes) for an unknown format or a PDF range over the cap.
+    """
+    if fmt == "zip":
+        return stream_zip(folder, account_ids, start, end)
+    if fmt == "pdf":
+        check_pdf_range(folder, account_ids, start, end)
+        return stream_pdf(folder, account_ids, start, end)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="导出合并文件 / Export a consolidated PDF or ZIP")
+    parser.add_argument("--accounts", default="", help="comma-separated account ids (default: all)")
+    parser.add_argument("--start", help="first day, YYYY-MM-DD or YYYYMMDD")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD or YYYYMMDD")
+    parser.add_argument("--format", choices=("pdf", "zip"), default="pdf",
+                        help=f"pdf: one combined file, memory grows with the range (at most {PDF_MAX_DOCUMENTS} "
+                             f"documents); zip: streamed, flat memory, for large ranges")
+    parser.add_argument("--folder", default=OUTPUT_FOLDER)
+    parser.add_argument("-o", "--output", help="output file (default: RedNote_Export_<start>_<end>.<format>)")
+    args = parser.parse_args(argv)
+
+    try:
+        start, end = parse_day(args.start), parse_day(args.end)
+    except ValueError as e:
+        print(f"[ERROR] Invalid date: {e}")
+        return 1
+    account_ids = [a.strip() for a in args.accounts.split(",") if a.strip()] or None
+    output = Path(args.output or export_filename(start, end, args.format))
+
+    try:
+        blocks = stream_export(args.format, args.folder, account_ids, start, end)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    with open(output, "wb") as f:
+        for block in blocks:
+            f.write(block)
+    print(f"[OK] Export saved: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1010 @@
+# generator_core.py
+"""
+Shared core of both generator variants
+Personas, prompts, the system prompt, payload templates, the DeepSeek call path
+(routing/failover, completion cache, batching, streaming, telemetry, usage) and
+post assembly live here once. Where posts go is left to a storage backend
+(storage.py): RedNoteContentGenerator writes PDF/TXT to Growth/, the
+serverless variant keeps them in memory, and either can use SQLite.
+"""
+import contextlib
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from http_client import iter_sse_json
+from resilience import GENERATION_DEADLINE, DeadlineExceeded, resilient_post_json
+from completion_cache import completion_key
+from providers import resolve_route
+from storage import get_storage
+from usage_report import UsageReport
+import telemetry
+
+# ─── Persona definitions for multi-account system ───────────────────────────
+PERSONAS = {
+    "forex_gold_trader": {
+        "name": "江鸽点金",
+        "description": "外汇黄金日内交易者，强调纪律自律，每日稳定50刀目标",
+        "voice": "当前角色身份：你是一位外汇黄金（XAU/USD）日内交易者。强调纪律>技术，稳定>暴富。语气真诚坦率，善于剖析交易心理（贪欲、妄念、偏执三道情绪）。用词接地气但有深度。emoji使用克制。核心理念：把自己活成一个执行规则的系统，耐心比聪明重要。"
+    },
+    "ea_tech_expert": {
+        "name": "欧亚星球量化",
+        "description": "EA技术专家，辩证EA与量化关系，反对包装割韭菜",
+        "voice": "当前角色身份：你是EA与量化技术的深度研究者。语气理性严谨，逻辑严密，善于辩证分析。强烈反感把EA包装成量化割韭菜。核心观点：EA只是执行工具，量化需要明确方法论、完整检验、清楚盈亏逻辑。用词专业但不炫技，教育意味强。emoji极少使用。"
+    },
+    "astock_analyst": {
+        "name": "凡大叔盘观",
+        "description": "A股板块分析师，盘面观察，资金流向，缩量/风格切换专家",
+        "voice": "当前角色身份：你是A股盘面观察分析师。语气专业冷静，数据驱动。核心关注：缩量/放量、板块轮动、资金流向、风格切换、支撑阻力位。结构清晰（核心观察、板块分析、下周展望、我的应对）。用📉📈🔥等emoji标记涨跌和热点。风险提示明确，强调耐心观望。"
+    },
+    "ea_philosophy_teacher": {
+        "name": "自研自用避坑",
+        "description": "EA哲学导师，教育为什么不用别人EA，强调独立思考",
+        "voice": "当前角色身份：你是EA交易哲学教育者。语气诚恳理性，洞察人性。核心观点：不要硬用别人EA，所有愿意卖给你的EA都不可能包赚，确定性是最贵的，工具EA重在参数而非工具本身。善用反问和比喻，引导独立思考。emoji很少，文字说服力强。"
+    },
+    "portfolio_diary_keeper": {
+        "name": "阿乐晒单日记",
+        "description": "基金实盘晒单者，每日持仓记录，情绪真实，接地气吐槽",
+        "voice": "当前角色身份：你是基金/ETF实盘记录者。语气真实接地气，情绪化但自省。每日晒持仓截图配文字复盘，坦诚记录赚钱喜悦和亏损懊恼。用词口语化（'我的天啦''该不是糕了吧''人太好了'）。emoji适中（😂💰📈📉🚗）。强调这是个人记录不构成投资建议。"
+    }
+}
+
+DEFAULT_ACCOUNTS = {
+    "A": {"persona": "forex_gold_trader"},
+    "B": {"persona": "ea_tech_expert"},
+    "C": {"persona": "astock_analyst"},
+    "D": {"persona": "ea_philosophy_teacher"},
+    "E": {"persona": "portfolio_diary_keeper"}
+}
+
+# System prompt based on 5 real mature RedNote trading accounts
+# Covering: Forex/Gold, EA Tech, A-shares, EA Philosophy, Portfolio Diary
+SYSTEM_PROMPT = """你是一位小红书交易内容创作者。你的风格根据人设而变化，但始终基于真实成熟账号的爆款内容。
+
+你的PROVEN VIRAL EXAMPLES（真实爆款案例，来自5个成熟账号）:
+
+1. 交易纪律心法 - 江鸽点金风格 (382赞, 276收藏):
+\"\"\"
+XAU USD每天收获50刀到底难不难？
+
+每天稳定落袋50刀？难点真不在技术。
+
+真正的对手不是市场，是你心里住着的"三道情绪"：
+
+➤ 赢了20想50，收获50想100 —— 贪欲
+➤ 亏了不敢停，总幻想能回来 —— 妄念
+➤ 错过就猛追，为了"完成任务"而做单 —— 偏执
+
+答案你或许听过，但做到的人极少：
+把自己活成一个执行规则的系统。
+
+这需要的不是技术，是心性。
+是一种接近修行的自律。
+
+稳定比激进重要，纪律比判断重要，耐心比聪明重要。
+
+宠辱不惊，方能稳定止赢。
+\"\"\"
+为什么爆了：直击交易者痛点，剖析心理，金句有力
+
+2. A股盘面复盘 - 凡大叔风格 (512赞, 89收藏):
+\"\"\"
+📉 本周A股复盘｜缩量震荡，板块分化加剧
+
+核心观察：
+• 上证指数周跌1.2%，成交额连续3日萎缩至7800亿
+• 主力资金流入：新能源车🔥、半导体📈
+• 主力资金流出：地产、金融、白酒
+
+板块轮动分析：
+周一到周三，资金集中攻击科技板块（AI算力、半导体设备），周四周五风格切换至消费（新能源车、锂电池）。缩量下的结构性机会，不是全面牛市。
+
+关键位置：
+上证3100点支撑有效，3180点压力未破。量能是关键，放量突破才能看3200。
+
+下周展望：
+继续观察量能变化。如果持续缩量，维持震荡格局；若某日放量突破3180，可能开启短期上攻。
+
+我的应对：
+持仓70%，30%现金观望。重点关注半导体设备龙头和新能源车产业链机会。不追高，耐心等支撑位买入信号。
+
+⚠️ 风险提示：个人观察记录，不构成投资建议
+\"\"\"
+为什么爆了：数据详实+结构清晰+emoji标记+风险提示+专业冷静
+
+3. EA技术辩证 - 欧亚星球风格 (328赞, 156收藏):
+\"\"\"
+EA就是量化交易？别让包装割了韭菜
+
+市面上很多人把EA包装成"量化交易系统"来卖高价，这是典型的概念混淆。
+
+EA是什么？
+EA（Expert Advisor）本质是MT4/MT5上的自动执行工具。它只是把你的交易指令自动化执行，没有策略本身。
+
+量化交易是什么？
+量化需要：
+✓ 明确的交易方法论（如统计套利、均值回归）
+✓ 历史数据回测验证
+✓ 清楚的盈亏逻辑和风险模型
+✓ 持续优化和监控机制
+
+核心区别：
+EA只是工具，量化是完整的交易体系。把EA叫量化，就像把菜刀叫做"烹饪系统"一样荒谬。
+
+警惕包装：
+很多人卖EA时故意用"量化""AI""算法"等高大上词汇，目的只有一个——让你觉得值钱，然后高价买单。
+
+真正的量化从业者不会轻易出售自己的盈利系统。如果真那么赚钱，为什么要卖给你？
+
+交易的本质是概率游戏，工具再好，没有正确的方法论和风控，都是空谈。
+\"\"\"
+为什么爆了：揭穿骗局+逻辑严密+教育意义强+引发讨论
+
+4. EA哲学 - 自研自用风格 (421赞, 267收藏):
+\"\"\"
+为什么我不用别人的EA？
+
+经常有人问我推荐EA，我的答案永远是：不推荐。
+
+不是因为我小气，而是因为我明白一个道理——
+
+交易中唯一确定的，就是"确定性"是最贵的。
+
+如果某个EA真的能稳定盈利，创造者为什么要卖给你？
+如果它真的包赚不赔，为什么不自己拿去融资放大？
+愿意卖给你的EA，背后只有两种可能：
+1. 它不赚钱，所以卖EA比用EA赚钱
+2. 它曾经赚钱，但市场环境变了
+
+我见过太多人花几千几万买EA，结果：
+参数不适合自己的资金量
+逻辑不匹配当前市场环境
+出现回撤时不知道该不该停
+最后亏损离场，还怪EA不行
+
+真相是：
+工具EA的核心从来不在工具本身，而在"参数"。
+同一个EA，参数调整后表现可能完全相反。
+如果你不懂它的底层逻辑，你根本不知道该怎么调整。
+
+所以我选择自研自用：
+✓ 我清楚每一行代码的逻辑
+✓ 我知道什么市场环境该开、该关
+✓ 我能根据回撤情况调整参数
+✓ 出问题时我知道问题在哪
+
+交易是自己的事，别人的系统永远是别人的。
+
+可交流，但不合作。因为每个人的风险承受能力、资金量、交易理念都不同。
+\"\"\"
+为什么爆了：洞察人性+反问有力+逻辑清晰+引发独立思考
+
+5. 基金晒单日记 - 阿乐风格 (687赞, 412收藏):
+\"\"\"
+今日持仓｜又是被打脸的一天😂
+
+[附持仓截图]
+
+今日收益：-2.3% 💔
+本周累计：+0.8%
+持仓品种：
+• 科技ETF 40% 📉-3.1%
+• 消费ETF 30% 📈+1.2%
+• 医药基金 20% 📉-1.8%
+• 现金 10%
+
+心路历程：
+早上看科技涨得好，觉得自己是天才
+下午科技跳水，觉得自己是憨憨
+收盘一看，还好消费撑住了一点
+
+今天的教训：
+不要盯盘！真的不要盯盘！
+越看越想操作，越操作越亏钱
+昨天刚说要佛系持有，今天又忍不住调仓
+人啊，就是记性不好😅
+
+明天计划：
+不看盘了（估计又是骗自己）
+科技如果再跌3%，考虑补一点
+医药这个月一直阴跌，该不是糕了吧……
+
+💰 账户总资产：12.7w
+🚗 距离买车目标还差：7.3w
+
+老规矩：
+这是我的个人记录和吐槽，不构成任何投资建议
+大家理性投资，盈亏自负
+
+#基金 #ETF #实盘记录
+\"\"\"
+为什么爆了：真实情绪+坦诚亏损+接地气吐槽+有目标感+每日更新粘性高
+
+小红书交易内容风格指南（5账号通用）：
+
+核心原则（适用所有账号）：
+
+1. 真实可信：
+- 具体数字：点位(3100点)、百分比(-2.3%)、金额(50刀)、时间(本周、今日)
+- 真实情绪：亏损坦诚、盈利克制、纠结真实
+- 风险提示：个人记录/不构成投资建议
+
+2. Emoji使用（因账号而异）：
+- 江鸽点金：极少使用，偶尔用➤强调要点
+- 欧亚星球：几乎不用，专业理性为主
+- 凡大叔：适度使用📉📈🔥标记涨跌和热点
+- 自研自用：极少，用✓✗标记对错
+- 阿乐：较多使用😂💰📈📉🚗表达情绪
+
+3. 结构清晰：
+- 短内容(100-200字)：单一观点+金句
+- 中等(300-500字)：观点+分析+结论
+- 长内容(600-800字)：分类讨论+结构化呈现（高收藏率）
+
+4. 语气风格（因人设而异）：
+- 江鸽：真诚坦率，禅意金句，强调纪律
+- 欧亚：理性严谨，逻辑辩证，教育为主
+- 凡大叔：专业冷静，数据驱动，耐心观望
+- 自研：诚恳洞察，反问引导，独立思考
+- 阿乐：接地气，情绪化，自嘲幽默
+
+5. 话题标签（分领域）：
+- 外汇/黄金：#外汇 #黄金 #XAU #交易纪律
+- EA/量化：#EA #量化交易 #外汇EA #交易系统
+- A股：#A股 #股市 #投资 #盘面分析
+- 基金：#基金 #ETF #实盘记录 #理财
+- 通用：#投资 #交易 #财富
+
+请模仿这些爆款案例的风格创作新内容。"""
+
+USER_PROMPT_SUFFIX = "\n\n只输出帖子内容，包括标题、正文和话题标签。不要有其他解释。"
+
+# 批量模式: 一次请求生成K条帖子 (JSON输出), 共享同一个system prompt
+POSTS_PER_RUN = int(os.getenv("REDNOTE_POSTS_PER_RUN", "1"))
+MAX_BATCH_TOKENS = 8192  # DeepSeek chat output limit
+MIN_POST_CHARS = 50
+
+BATCH_PROMPT = """请一次性创作 {count} 篇互不相同的小红书帖子，每篇对应下面的一个主题：
+
+{topics}
+
+输出格式：只输出一个JSON对象，不要有其他文字：
+{{"posts": [{{"content": "第1篇完整帖子（标题、正文和话题标签）"}}, {{"content": "第2篇..."}}]}}
+posts 数组必须恰好包含 {count} 项，顺序与主题一致，每篇内容不能重复。"""
+
+
+# 所有人设、所有账户共享且逐字节相同的前缀, 放在请求最前面以命中DeepSeek上下文缓存
+# (the provider caches identical prompt prefixes; only the persona voice after it varies)
+SHARED_SYSTEM_PREFIX = SYSTEM_PROMPT + "\n\n只输出帖子内容本身，不要有其他说明。\n\n"
+
+
+@lru_cache(maxsize=None)
+def get_system_prompt(persona_id):
+    """每个人设的完整system prompt，只构建一次: 共享前缀 + 人设语气"""
+    persona = PERSONAS.get(persona_id, PERSONAS["forex_gold_trader"])
+    # Inject persona-specific voice for this account
+    return SHARED_SYSTEM_PREFIX + persona['voice']
+
+
+@lru_cache(maxsize=None)
+def get_payload_template(persona_id):
+    """每个人设的只读请求体模板 (model, temperature, system message)"""
+    return MappingProxyType({
+        "model": "deepseek-chat",
+        "messages": (
+            MappingProxyType({"role": "system", "content": get_system_prompt(persona_id)}),
+        ),
+        "temperature": 1.0,
+        "max_tokens": 2000,  # Increased for higher quality single post
+        "stream": False
+    })
+
+
+# 提示词 - 基于5个真实账号的爆款内容, 涵盖: 外汇黄金/EA技术/A股分析/EA哲学/基金晒单
+# 前10条来自原桌面版, 之后是原serverless版的按人设提示词 (序号即遥测中的 prompt 标签, 只在末尾追加)
+PROMPTS = (
+    # 提示1: 交易纪律与心态 (江鸽点金风格)
+    "创建一篇关于交易纪律的内容。主题可以是：每天稳定盈利X元到底难不难？重点：难的不是技术，而是心态和纪律。剖析交易者的三道情绪陷阱（贪欲、妄念、偏执）。核心观点：把自己活成一个执行规则的系统。语气真诚接地气，有深度。300-500字。",
+
+    # 提示2: 盘面复盘分析 (凡大叔风格)
+    "创建今日/本周盘面复盘内容。标题格式：'X.X复盘：[核心观察点]'。内容结构：📊核心观察（缩量/放量、涨跌情况），板块分析（化工、油气、消费等3-5个板块），下周/明日展望，我的应对策略。用📈📉等emoji标记。保持专业冷静，数据说话。400-600字。话题标签: #A股 #复盘 #投资",
+
+    # 提示3: EA技术辩证 (欧亚星球风格)
+    "写一篇EA与量化关系的深度辨析。核心论点：EA≠量化，EA只是执行工具，量化需要明确方法论和检验逻辑。可以用比喻（如婚礼请柬vs婚姻本身）。批判市场上把EA包装成量化割韭菜的现象。语气理性严谨，逻辑严密。500-800字。话题标签: #EA #量化 #交易系统",
+
+    # 提示4: EA哲学教育 (自研自用风格)
+    "写一篇EA使用哲学内容。主题：为什么不要硬用别人的EA？核心观点：所有愿意卖给你的EA都不可能包赚无风险，确定性是最贵的东西，参数比工具本身更重要。善用反问引导思考。语气诚恳理性，洞察人性。300-500字。话题标签: #EA #交易 #避坑",
+
+    # 提示5: 持仓晒单日记 (阿乐风格)
+    "创建一篇持仓晒单内容。描述：今日持仓情况，上午赚了X万下午又回吐了，情绪从兴奋到懊恼。用截图配合文字（描述截图内容：几只基金/ETF的涨跌情况）。语气真实接地气，口语化（'我的天啦''该不是糕了吧'）。结尾免责声明。200-400字。话题标签: #基金 #实盘 #理财",
+
+    # 提示6: 时间与节奏观察 (XAU/8年实战风格)
+    "写一篇交易时间节奏的经验总结。标题：'做交易X年，总结出的10条经验'。内容：关于时间节奏的规律（周一周五容易走惯性、亚盘等9点后、美盘后半夜最容易假飘等），关于信号判断（关注缺口回补、重点K线等），关于操作纪律（盈亏比、止损等）。编号列表呈现。400-600字。",
+
+    # 提示7: 板块轮动分析 (市场观察风格)
+    "写一篇板块轮动分析。观察：当前市场风格切换的信号，哪些板块在接力，哪些板块在回调。分析背后逻辑（政策、资金、情绪）。给出观察要点和应对建议。用专业术语但简洁解释。emoji适度标记重点。400-600字。话题标签: #板块轮动 #A股 #投资策略",
+
+    # 提示8: 交易心法短文 (哲理感悟风格)
+    "写一篇交易心法短文。主题：稳定盈利的'难'，难在哪里？不是某一天能赚多少，而是每一天都能稳定执行。分析心理障碍（在波动面前保持平静、在诱惑面前记得初心、在错过时不追悔）。金句结尾。300-400字。",
+
+    # 提示9: 技术指标实战 (实战经验风格)
+    "写一篇技术指标实战经验。选择2-3个常用指标（如均线、MACD、成交量），分享在实盘中如何结合使用，什么情况下有效，什么情况下会失效。避免纸上谈兵，强调实战经验和局限性。400-600字。话题标签: #技术分析 #实战经验",
+
+    # 提示10: 仓位管理智慧 (风控管理风格)
+    "写一篇仓位管理内容。主题：永远为'不确定'留足空间。用严格的仓位管理和止损来应对判断失误。强调：市场没有100%确定的规律，保险>聪明。可以分享具体仓位比例和止损原则。语气成熟稳健。300-500字。话题标签: #仓位管理 #风控 #交易系统",
+
+    # 江鸽点金风格 (Forex/Gold)
+    "创建关于XAU/USD黄金交易的内容。讨论：为什么止损比盈利更重要？主题：止损是交易者的生命线。剖析新手常犯的错误（扛单、加仓摊平、情绪化做单）。强调：纪律和规则高于一切技巧。语气坦率，有经验感。400-600字。",
+
+    # 欧亚星球风格 (EA技术)
+    "创建关于EA与量化交易的辨析内容。核心观点：市面上很多人把EA包装成'量化交易系统'割韭菜。EA是什么？量化需要什么？两者的本质区别。警惕包装话术。语气理性严谨，逻辑清晰，有教育意义。400-600字。",
+
+    "创建关于EA交易系统的技术深度内容。讨论：为什么同一个EA在不同人手里结果完全不同？核心：参数调优、市场环境适配、风控设置的重要性。强调方法论而非工具崇拜。语气专业，技术派。500-700字。",
+
+    # 凡大叔风格 (A股盘面)
+    "创建A股盘面复盘内容。结构：核心观察（指数表现、成交量）→ 板块轮动分析（资金流入/流出板块）→ 关键位置（支撑/压力位）→ 下周展望 → 我的应对（持仓比例、关注方向）。数据详实，风险提示，语气专业冷静。300-500字。",
+
+    "创建关于A股缩量震荡行情的分析。主题：缩量环境下如何操作？分析板块分化、结构性机会、量能变化的重要性。强调耐心观望，不追高。语气专业，数据驱动，有📉📈emoji标记。300-500字。",
+
+    # 自研自用风格 (EA哲学)
+    "创建关于为什么不用别人EA的哲学内容。核心观点：交易中唯一确定的，就是'确定性'是最贵的。为什么愿意卖给你的EA都不可能包赚？工具的核心在参数而非工具本身。引导独立思考，反问有力。400-600字。",
+
+    "创建关于EA自研自用的教育内容。讨论：买EA的人最后为什么都亏了？原因剖析（参数不适配、不懂逻辑、出问题不会调）。自研自用的优势。可交流但不合作的原因。语气诚恳，洞察人性。400-600字。",
+
+    # 阿乐风格 (基金晒单)
+    "创建基金/ETF持仓日记内容。格式：今日收益 → 持仓品种表现 → 心路历程（早上的想法vs收盘的现实）→ 今天的教训 → 明天计划 → 距离目标还差多少。语气真实接地气，有😂💰等emoji，坦诚亏损，自嘲幽默。300-500字。",
+
+    "创建关于盯盘心态的吐槽内容。主题：今天又没忍住盯盘/调仓了。讨论：为什么越看越想操作，越操作越亏？记录真实的纠结和懊恼。自我反省但不失幽默。强调这是个人记录不构成投资建议。语气口语化，有😅📉等emoji。300-500字。"
+)
+
+# 每条提示词适合的人设 (与 PROMPTS 一一对应; None = 通用), 供提示词轮换加权 (prompt_rotation.py)
+PROMPT_PERSONAS = (
+    ("forex_gold_trader",),                              # 提示1: 交易纪律与心态
+    ("astock_analyst",),                                 # 提示2: 盘面复盘分析
+    ("ea_tech_expert",),                                 # 提示3: EA技术辩证
+    ("ea_philosophy_teacher",),                          # 提示4: EA哲学教育
+    ("portfolio_diary_keeper",),                         # 提示5: 持仓晒单日记
+    ("forex_gold_trader",),                              # 提示6: 时间与节奏观察
+    ("astock_analyst", "portfolio_diary_keeper"),        # 提示7: 板块轮动分析
+    None,                                                # 提示8: 交易心法短文
+    None,                                                # 提示9: 技术指标实战
+    None,                                                # 提示10: 仓位管理智慧
+    ("forex_gold_trader",),
+    ("ea_tech_expert",),
+    ("ea_tech_expert", "ea_philosophy_teacher"),
+    ("astock_analyst",),
+    ("astock_analyst",),
+    ("ea_philosophy_teacher",),
+    ("ea_philosophy_teacher", "ea_tech_expert"),
+    ("portfolio_diary_keeper",),
+    ("portfolio_diary_keeper",),
+)
+
+# 轮换牌组中的张数: 人设专属提示词 > 通用提示词 > 其他人设的提示词 (默认不抽)
+PERSONA_PROMPT_WEIGHT = int(os.getenv("REDNOTE_PROMPT_PERSONA_WEIGHT", "3"))
+GENERAL_PROMPT_WEIGHT = int(os.getenv("REDNOTE_PROMPT_GENERAL_WEIGHT", "1"))
+OTHER_PROMPT_WEIGHT = int(os.getenv("REDNOTE_PROMPT_OTHER_WEIGHT", "0"))
+
+
+@lru_cache(maxsize=None)
+def prompt_weights(persona_id, prompt_count=len(PROMPTS)):
+    """
+    每条提示词在该人设轮换牌组中的权重; 提示词超出 PROMPT_PERSONAS 时视为通用
+    A persona no prompt is tagged for (custom personas) draws from all prompts evenly.
+    """
+    tags = [PROMPT_PERSONAS[i] if i < len(PROMPT_PERSONAS) else None for i in range(prompt_count)]
+    if not any(persona_id in t for t in tags if t):
+        return (1,) * prompt_count
+    return tuple(GENERAL_PROMPT_WEIGHT if t is None else PERSONA_PROMPT_WEIGHT if persona_id in t
+                 else OTHER_PROMPT_WEIGHT for t in tags)
+
+# 备用内容 (API失败时使用) - 真实爆款帖子, based on actual viral posts with 29-3750 likes
+BACKUP_CONTENTS = (
+    # 爆款 #1 - 3750赞，1847收藏
+    """十八岁，美股的第一个百万
+
+不急着庆祝，先复盘，再继续。
+市场不会奖励惰怠，只奖励耐心与执行。""",
+
+    # 爆款 #2 - 2522赞，2730收藏
+    """上星期在Reddit 看到了一个叫 memestockhunter 的美股炒家，好像挺准。
+
+之后订阅了他的Buy Me a Coffee，昨天买了TNMG，升了一倍。""",
+
+    # 爆款 #3 - 852赞，645收藏
+    """记录美股人生第一次300%
+把掌声献给rocketlab🚀🍺
+
+从24年11月到今天，21块到96块
+23年底开始买美股
+到现在第一次体验300%浮盈
+
+我跟你说，挣多挣少不说
+家庭地位反正能提升😂
+
+在这期间经历过2次回撤、大跌
+包括跌回成本价以下
+咱也一直拿住了
+作为普通玩家来个小复盘
+
+1️⃣坚定信念
+很重要，要知道为什么买这家公司的股票，才能不被噪音影响太大。""",
+
+    # 爆款 #4 - 713赞，495收藏
+    """实盘美股 2w本金翻十倍 week28 大获全胜的一周
+
+整体进度：23.9%
+本周表现：+5363（+12.6%）
+
+📊总结：这周大盘一直横着，但是我的账户表现非常好，主要原因是小盘股和消费股这周表现很好，前两周精准抄底coreweace和圈圈，雅诗兰黛也大📈，还有就是做对了几个财报，本周收益远远战胜大盘！
+
+❤️上周复盘：
+🎯卖力克已经阳跌了一年了，这次财报非常好，财报做了个蝴蝶和calendar都翻了四五倍，+1050
+🎯本周圈圈继续反弹，+620
+🎯coreweave本周终于轮到它反弹了，大涨20%，+980
+🎯雅诗兰黛：说过雅诗兰黛好多次了，这周不负所望+830
+
+#美股 #投资 #实盘""",
+
+    # 爆款 #5 - 640赞，421收藏
+    """今年的美股，会不断玩"狠来了"直到明年才会真正结构上的开始出现问题。""",
+
+    # 爆款 #6 - 415赞，196收藏
+    """21岁美股基金经理的一天
+
+7:30AM
+打开 TradingView 浏览自建的新闻流：宏观数据更新、美联储官员讲话、主要科技公司动态、AI CapEx 调整、供应链周报、芯片现货价格
+
+8:30AM
+到学校第一件事是做数据维护：更新 NAV、看仓位暴露、校准组合的 beta。用factset和bloomberg看纳指期货、费半指数与美债收益率曲线。
+
+9:30AM
+切回学生模式,每天上 4-6 小时课。
+
+12:00PM
+午饭后复盘上午行情，先看 Sector Heatmap 与 ETF Flows，判断市场资金流向和风险偏好。
+
+#基金 #金融 #股票""",
+
+    # 爆款 #7 - 1396赞，684收藏
+    """【记录】2026.01.21 美东时间 14:20
+用$5,000一年时间翻到了$60,000
+
+去年，从投行出来之后，终于可以不再被"框架"束缚，开始trade自己真正喜欢、也真正理解的标的。
+
+一开始其实挺激进的。
+在有 fundamental 判断 的前提下，开始尝试期权，甚至还玩过一次未日期权。
+
+当时心里想得很简单：
+就拿 $5,000 试水，输了就当交学费。
+GENIUS Act那一波，重仓了 Coinbase。
+之后调仓，AI infra的逻辑，storage + 内存，重仓了MU、SNDK，以及一些LITE。
+
+再后来，川普一系列"骚操作"叠加市场momentum，
+
+#美股 #投资""",
+
+    # 爆款 #8 - 28赞，10收藏
+    """躺平之路
+
+总结一下 24 25年的投资收益
+
+24年大丰收 收益达到60% 主要是靠重仓特斯拉活的了超额收益
+
+净值：$1,088,305
+当日收益：+$8,117 (0.75%)
+年初至今：+$31,869.89 (199.93%)
+
+主要持仓：TSLL, SGOV, NVDA, METU, TSLA
+
+#美股 #投资总结""",
+
+    # 爆款 #9 - 29赞，17收藏
+    """自从开始炒美股，我的人生就像按开一层迷雾
+
+自从开始炒美股，我的人生就像按开一层迷雾。没有什么比这种自由市场中的即时金钱反馈更能测试出自己的决策逻辑：我对风险的偏好是什么？我信赖什么样的价值？我对未来的发展是悲观还是乐观？
+
+和朋友交流选股策略更是一件妙事。对比身边的朋友，我发现我在做决策的时候惊人的理性。比如我会：
+
+1. 把自己的资产配置比例想得非常清楚，专款专用，再上头也不从现金储备里借调。
+2. 花费大量时间调研做出决策，决策后短时间内全面放手，不关注波动。
+3. 非常听劝。以开放的心态了解身边各种投资人和科技从业者的决策逻辑，然后做出自己的判断。
+4. 不贪婪。收益达到预期就立刻出掉，不追求绝对市值。
+5. 不羡慕投机暴富的人，不为自己没赶上风口而遗憾。
+6. 认命。做错了决策就认命，然后从里面长教训，不内耗。
+
+#美股 #投资心得""",
+
+    # 爆款 #10 - 49赞，61收藏
+    """靠美股期权赚钱的思考
+
+美股期权交易是一个很好的每月赚取现金流的方式：
+
+👉 卖出 Cash-Secured Put：你用现金作为担保，收取期权费（premium）。如果股价不跌破行权价，你赚到premium；如果跌破了，你就以行权价买入股票（相当于打折买入）。
+
+优点：
+• 每周或每月稳定收入
+• 强制自己在好价位买入
+• 风险可控
+
+缺点：
+• 需要足够本金
+• 限制了上涨收益
+
+适合：想要稳定现金流，又愿意长期持有优质股票的投资者。
+
+#美股 #期权 #投资策略"""
+)
+
+
+def sse_event(event, payload):
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+class ContentGenerator:
+    """
+    生成器核心: 提示词选择、API调用 (路由/故障转移/缓存/批量/流式) 和帖子组装
+    Subclasses choose the default storage backend; persist() hands posts to it.
+    """
+
+    def __init__(self, api_key=None, persona_id="forex_gold_trader", account_id="A", account_config=None,
+                 storage=None):
+        """初始化内容生成器 (account_config: 该账户的配置, 用于模型路由; storage: 存储后端, 默认见 default_storage)"""
+        # 设置DeepSeek API密钥
+        self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
+        if not self.api_key:
+            raise ValueError("请设置DEEPSEEK_API_KEY环境变量或传入api_key参数")
+
+        # 设置账户和人设
+        self.account_id = account_id
+        # 定时任务的时间段 (datetime), 存储时作为文档键的一部分; 手动生成为 None
+        self.slot = None
+        self.persona_id = persona_id
+        self.persona = PERSONAS.get(persona_id, PERSONAS["forex_gold_trader"])
+
+        # 模型路由: 主模型 + 故障转移目标 (providers.py)
+        self.route = resolve_route(persona_id, account_config, self.api_key)
+        self.headers = self.route[0].headers
+
+        # 每次生成的token用量 (含上下文缓存命中/未命中)
+        self.usage = UsageReport()
+        self.last_usage = None
+
+        # 当前生成的截止时间 (time.monotonic), 所有请求共享 REDNOTE_GENERATION_DEADLINE; 见 generation_deadline()
+        self.expires = None
+
+        # 存储后端, 以及它提供的完成结果缓存 (按调用选择是否使用)
+        self.storage = storage or self.default_storage()
+        self.completion_cache = self.storage.completion_cache
+
+        self.prompts = PROMPTS
+
+    def default_storage(self):
+        """未指定 storage 时使用的后端 (REDNOTE_STORAGE, 默认文件系统)"""
+        return get_storage()
+
+    def build_api_request(self, prompt):
+        """构建DeepSeek API请求 (headers, payload)，只填充用户提示词"""
+        template = get_payload_template(self.persona_id)
+        data = dict(template, model=self.route[0].model)
+        data["messages"] = [
+            dict(template["messages"][0]),
+            {
+                "role": "user",
+                "content": f"{prompt}{USER_PROMPT_SUFFIX}"
+            }
+        ]
+        return self.headers, data
+
+    def build_batch_request(self, prompts):
+        """构建批量请求: 一个completion中生成 len(prompts) 条帖子, 要求JSON输出"""
+        template = get_payload_template(self.persona_id)
+        data = dict(template, model=self.route[0].model)
+        topics = "\n\n".join(f"{i}. {prompt}" for i, prompt in enumerate(prompts, 1))
+        data["messages"] = [
+            dict(template["messages"][0]),
+            {
+                "role": "user",
+                "content": BATCH_PROMPT.format(count=len(prompts), topics=topics)
+            }
+        ]
+        data["response_format"] = {"type": "json_object"}
+        data["max_tokens"] = min(MAX_BATCH_TOKENS, template["max_tokens"] * len(prompts))
+        return self.headers, data
+
+    @staticmethod
+    def parse_api_response(result):
+        """从API响应JSON中提取帖子内容"""
+        return result['choices'][0]['message']['content'].strip()
+
+    @staticmethod
+    def parse_batch_response(content, count):
+        """
+        将批量JSON输出拆分为 count 条帖子内容; 结构不符合约定时抛出 ValueError
+        Accepts {"posts": [...]} or a bare list; items may be strings or {"content": ...}
+        """
+        text = content.strip()
+        if text.startswith("```"):
+            text = text.strip("`").split("\n", 1)[-1]
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            start, end = text.find("{"), text.rfind("}")
+            if start < 0 or end <= start:
+                raise ValueError("no JSON object in batch output")
+            try:
+                parsed = json.loads(text[start:end + 1])
+            except json.JSONDecodeError as e:
+                raise ValueError(f"invalid JSON in batch output: {e}")
+
+        items = parsed.get("posts") if isinstance(parsed, dict) else parsed
+        if not isinstance(items, list):
+            raise ValueError("batch output has no 'posts' list")
+
+        contents, seen = [], set()
+        for item in items:
+            if isinstance(item, dict):
+                item = item.get("content") or "\n\n".join(
+                    str(item[k]) for k in ("title", "body", "tags") if item.get(k)
+                )
+            if not isinstance(item, str) or len(item.strip()) < MIN_POST_CHARS:
+                continue
+            fingerprint = "".join(item.split())
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            contents.append(item.strip())
+
+        if len(contents) < count:
+            raise ValueError(f"expected {count} distinct posts, got {len(contents)}")
+        return contents[:count]
+
+    def call_deepseek_api(self, prompt, use_cache=False, cache_seed=None):
+        """调用DeepSeek API生成内容 (use_cache=True 时先查询完成结果缓存)"""
+        prompt_index = self.prompt_index(prompt)
+        try:
+            headers, data = self.build_api_request(prompt)
+            cache_key, cached = self.cached_completion(data, use_cache, cache_seed, prompt_index)
+            if cached is not None:
+                return cached
+            return self.completion_content(self.post_completion(data), prompt_index, cache_key)
+        except Exception as e:
+            return self.call_failed(prompt_index, e)
+
+    def call_deepseek_batch(self, prompts, use_cache=False, cache_seed=None):
+        """一次API调用生成多条内容; 返回内容列表, 调用失败或输出未通过校验时返回 None"""
+        try:
+            headers, data = self.build_batch_request(prompts)
+            cache_key, cached = self.cached_completion(data, use_cache, cache_seed, "batch", len(prompts))
+            if cached is not None:
+                return cached
+            return self.completion_content(self.post_completion(data), "batch", cache_key, len(prompts))
+        except Exception as e:
+            return self.call_failed("batch", e, len(prompts))
+
+    # 同步与异步调用共用的请求/响应处理 (async_generator.py 在线程中执行它们, 因为缓存和遥测会读写磁盘)
+    # Request/response handling shared by the sync and async calls; batch calls pass count
+
+    def cached_completion(self, data, use_cache, cache_seed, prompt_index, count=None):
+        """(cache_key, 缓存的内容或 None); 批量请求的缓存内容解析为列表"""
+        cache_key = completion_key(data, cache_seed) if use_cache else None
+        if cache_key:
+            cached = self.completion_cache.get(cache_key)
+            if cached is not None:
+                print("  [CACHE] 命中缓存 / Completion cache hit")
+                self.usage.record_cache_hit()
+                self.record_call(prompt_index, status="cache", kind="single" if count is None else "batch")
+                return cache_key, cached if count is None else self.parse_batch_response(cached, count)
+        return cache_key, None
+
+    def completion_content(self, response, prompt_index, cache_key=None, count=None):
+        """记录用量和遥测, 返回响应中的内容 (批量: 校验后的列表) 并写入缓存; 非200返回 None"""
+        kind = "single" if count is None else "batch"
+        if response.status_code != 200:
+            print(f"API错误: {response.status_code}")
+            self.record_call(prompt_index, response, kind=kind)
+            return None
+        result = response.json()
+        self.usage.record(result.get('usage'))
+        self.record_call(prompt_index, response, result.get('usage'), kind=kind)
+        content = self.parse_api_response(result)
+        parsed = content if count is None else self.parse_batch_response(content, count)
+        if cache_key:
+            self.completion_cache.put(cache_key, content)
+        return parsed
+
+    def call_failed(self, prompt_index, error, count=None):
+        """调用异常: 打印并记录, 返回 None (批量输出未通过校验不算调用失败)"""
+        if count is not None and isinstance(error, ValueError):
+            print(f"批量输出校验失败 / Batch output rejected: {error}")
+            return None
+        print(f"API调用异常: {error}")
+        self.record_call(prompt_index, error=error, kind="single" if count is None else "batch")
+        return None
+
+    def post_completion(self, data, stream=False):
+        """
+        按路由顺序发送请求, 出错时故障转移到下一个目标 / POST along the route with failover
+        Returns the first 200 response (tagged with .route), else the last target's response;
+        raises the last exception if the final target could not be reached at all.
+        Every target gets only what is left of the generation deadline (DeadlineExceeded once it is gone).
+        """
+        expires = self.expires or time.monotonic() + GENERATION_DEADLINE
+        for i, target in enumerate(self.route):
+            last = i == len(self.route) - 1
+            remaining = self.time_left(expires, target)
+            try:
+                response = resilient_post_json(target.url, dict(data, model=target.model),
+                                               headers=target.headers, deadline=remaining, stream=stream)
+            except Exception as e:
+                if last:
+                    raise
+                print(f"  [FAILOVER] {target.name}: {e} -> {self.route[i + 1].name}")
+                continue
+            response.route = target.name
+            if response.status_code == 200 or last:
+                return response
+            print(f"  [FAILOVER] {target.name}: HTTP {response.status_code} -> {self.route[i + 1].name}")
+            response.close()
+
+    @staticmethod
+    def time_left(expires, target):
+        """剩余的截止时间 (秒), 用完时抛出 DeadlineExceeded"""
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"generation deadline exceeded before trying {target.name}")
+        return remaining
+
+    @contextlib.contextmanager
+    def generation_deadline(self):
+        """
+        一次生成共用一个截止时间 / One REDNOTE_GENERATION_DEADLINE per generation
+        Failover targets, the batch fallback and dedup regenerations all draw on the same budget;
+        calls made outside a generation get a deadline each. Nested use keeps the outer deadline.
+        """
+        if self.expires is not None:
+            yield
+            return
+        self.expires = time.monotonic() + GENERATION_DEADLINE
+        try:
+            yield
+        finally:
+            self.expires = None
+
+    def prompt_index(self, prompt):
+        """提示词在 self.prompts 中的序号 (用于遥测), 自定义提示词返回 None"""
+        try:
+            return self.prompts.index(prompt)
+        except ValueError:
+            return None
+
+    def record_call(self, prompt_index, response=None, usage=None, status=None, error=None, kind="single"):
+        """记录一次API调用的遥测数据 (状态码、重试次数、延迟、token、成本)"""
+        telemetry.record_call(
+            self.account_id, self.persona_id, prompt_index,
+            status=status or (response.status_code if response is not None else None),
+            attempts=getattr(response, 'attempts', 1 if response is not None else 0),
+            timings=getattr(response, 'timings', None),
+            usage=usage, error=error, kind=kind, model=getattr(response, 'route', None)
+        )
+
+    def stream_deepseek_api(self, prompt):
+        """流式调用DeepSeek API，逐个产出内容片段 (token)"""
+        headers, data = self.build_api_request(prompt)
+        data["stream"] = True
+        data["stream_options"] = {"include_usage": True}
+        prompt_index = self.prompt_index(prompt)
+        started = time.monotonic()
+
+        response = None
+        try:
+            with self.post_completion(data, stream=True) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"API错误: {response.status_code}")
+
+                usage = None
+                for event in iter_sse_json(response):
+                    # The final chunk carries the usage block
+                    if event.get('usage'):
+                        usage = event['usage']
+                        self.usage.record(usage)
+                    if not event.get('choices'):
+                        continue
+                    delta = event['choices'][0].get('delta', {}).get('content')
+                    if delta:
+                        yield delta
+                # total covers the whole stream, not just the response headers
+                response.timings["total"] = time.monotonic() - started
+                self.record_call(prompt_index, response, usage, kind="stream")
+        except Exception as e:
+            # Non-200 keeps its status code; failures mid-stream or before a response count as errors
+            failed_status = response is not None and response.status_code != 200
+            self.record_call(prompt_index, response, status=None if failed_status else "error", error=e,
+                             kind="stream")
+            raise
+        self.report_usage()
+
+    def stream_generation(self):
+        """
+        流式生成1条内容并保存 / Stream one post, then dedupe and persist it like generate_daily_posts
+        Yields (event, data): ('token', {'delta': ...}) per DeepSeek token, then exactly one
+        ('done', {'success': True, 'posts': [...]}) or ('done', {'success': False, 'error': ...}).
+        A failed stream falls back to backup content; the stream and any dedup regeneration share one deadline.
+        """
+        with self.generation_deadline():
+            chunks = []
+            try:
+                self.log_generation_start()
+                for token in self.stream_deepseek_api(self.select_prompt()):
+                    chunks.append(token)
+                    yield 'token', {'delta': token}
+            except Exception as e:
+                print(f"API调用异常: {e}")
+                chunks = []
+
+            try:
+                posts = self.build_posts(self.dedupe(''.join(chunks).strip() or None))
+                self.report_usage()
+                self.persist(posts)
+            except Exception as e:
+                yield 'done', {'success': False, 'error': str(e)}
+                return
+        yield 'done', {'success': True, 'posts': [{'number': p['number'], 'content': p['content']} for p in posts]}
+
+    def generate_daily_posts(self, use_cache=False, cache_seed=None, count=None):
+        """
+        生成小红书内容: 默认1条高质量内容 (REDNOTE_POSTS_PER_RUN)
+        count > 1 时在一次completion中批量生成; 批量输出无效则改为并行单条调用
+        """
+        count = count or POSTS_PER_RUN
+        self.log_generation_start()
+        with self.generation_deadline():
+            if count <= 1:
+                content = self.call_deepseek_api(self.select_prompt(reuse=use_cache), use_cache=use_cache,
+                                                 cache_seed=cache_seed)
+                content = self.dedupe(content)
+                self.report_usage()
+                return self.build_posts(content)
+
+            prompts = self.select_prompts(count, reuse=use_cache)
+            contents = self.call_deepseek_batch(prompts, use_cache=use_cache, cache_seed=cache_seed)
+            if contents is None:
+                print(f"  [FALLBACK] 改为并行单条调用 / Falling back to {count} parallel single calls")
+                with ThreadPoolExecutor(max_workers=count) as pool:
+                    contents = list(pool.map(
+                        lambda prompt: self.call_deepseek_api(prompt, use_cache=use_cache, cache_seed=cache_seed),
+                        prompts
+                    ))
+            contents = self.dedupe(contents)
+            self.report_usage()
+            return self.build_posts(contents)
+
+    def dedupe(self, content):
+        """
+        拒绝与近期帖子 (所有账户) 高度相似的内容并重新生成, 最多 REDNOTE_DEDUP_RETRIES 次 (dedup.py)
+        Takes what build_posts takes; accepted posts are added to the storage backend's index,
+        posts still duplicated after the retries become None (backup content).
+        """
+        index = self.storage.dedup_index
+        if index is None:
+            return content
+        from dedup import DEDUP_RETRIES, signature
+
+        items = content if isinstance(content, list) else [content]
+        accepted = []
+        for item in items:
+            for attempt in range(DEDUP_RETRIES + 1):
+                if not item:
+                    break
+                sig = signature(item)
+                match = index.find(item, sig=sig, account_id=self.account_id)
+                if match is None:
+                    index.add(item, self.account_id, self.persona_id, sig=sig)
+                    break
+                telemetry.record_dedup(self.account_id, self.persona_id, match['similarity'], match['account_id'])
+                print(f"  [DEDUP] 与账户 {match['account_id']} 的帖子相似度 {match['similarity']:.0%} "
+                      f"/ near-duplicate of an earlier post")
+                if attempt == DEDUP_RETRIES:
+                    print("  [DEDUP] 重试后仍然重复, 使用备用内容 / still a duplicate, using backup content")
+                    item = None
+                else:
+                    print(f"  [DEDUP] 重新生成 / regenerating ({attempt + 1}/{DEDUP_RETRIES})")
+                    item = self.call_deepseek_api(self.select_prompt())
+            accepted.append(item)
+        return accepted if isinstance(content, list) else accepted[0]
+
+    def report_usage(self):
+        """打印本次运行的token用量并交给存储后端记录 (文件系统: Growth/.usage.jsonl), 然后开始新的统计"""
+        report, self.usage = self.usage, UsageReport()
+        self.last_usage = report
+        if report.calls or report.cached_calls:
+            print(f"  [USAGE] {report.format()}")
+            self.storage.record_usage(self, report)
+        return report
+
+    def log_generation_start(self):
+        """打印生成任务头信息"""
+        print(f"\n{'='*60}")
+        print(f"开始生成小红书内容 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Account: {self.account_id} | Persona: {self.persona['name']}")
+        print(f"{'='*60}")
+
+    def select_prompt(self, reuse=False):
+        """
+        从该账户的提示词轮换牌组抽取一个提示词: 偏向人设相关, 避开最近用过的 (prompt_rotation.py)
+        reuse=True (use_cache): 复用该账户上次抽到的提示词, 重新生成时才能命中完成结果缓存
+        """
+        index = self.pick_prompt_indexes(1, reuse)[0]
+
+        print(f"生成高质量内容 (1条, 提示词 #{index + 1})...")
+        return self.prompts[index]
+
+    def select_prompts(self, count, reuse=False):
+        """为批量模式抽取 count 个提示词, 同一批次内尽量不重复 (提示词不够时才会重复); reuse 同 select_prompt"""
+        indexes = self.pick_prompt_indexes(count, reuse)
+
+        print(f"批量生成内容 ({count}条, 单次请求)...")
+        return [self.prompts[i] for i in indexes]
+
+    def pick_prompt_indexes(self, count, reuse=False):
+        """
+        count 个提示词序号; reuse=True 时取轮换历史中最近的 count 个 (仍适用于当前人设时), 否则从牌组抽取
+        The cache key includes the prompt, so a cached regenerate must ask with the prompt the last run drew.
+        """
+        weights = prompt_weights(self.persona_id, len(self.prompts))
+        rotation = self.storage.prompt_rotation
+        if reuse:
+            last = rotation.history(self.account_id)[-count:]
+            if len(last) == count and all(i < len(weights) and weights[i] for i in last):
+                return last
+        return rotation.pick(self.account_id, weights, count=count)
+
+    def build_posts(self, content):
+        """将API返回内容 (单条字符串或批量列表) 组装为posts列表，失败的条目使用备用内容"""
+        contents = content if isinstance(content, list) else [content]
+        posts = []
+
+        for number, item in enumerate(contents, 1):
+            if item:
+                # 不限制字符长度，让内容完整输出
+                post_item = {
+                    'number': number,
+                    'content': item,
+                    'timestamp': datetime.now().strftime("%H:%M")
+                }
+                posts.append(post_item)
+                # Safe print with encoding handling
+                try:
+                    print(f"  [OK] {item[:100]}...")
+                except UnicodeEncodeError:
+                    print(f"  [OK] Content generated successfully")
+            else:
+                # 如果API失败，使用备用内容
+                backup_content = self.get_backup_content(number)
+                post_item = {
+                    'number': number,
+                    'content': backup_content,
+                    'timestamp': datetime.now().strftime("%H:%M"),
+                    'backup': True
+                }
+                posts.append(post_item)
+                telemetry.record_backup(self.account_id, self.persona_id)
+                # Safe print with encoding handling
+                try:
+                    print(f"  [BACKUP] 使用备用内容: {backup_content[:100]}...")
+                except UnicodeEncodeError:
+                    print(f"  [BACKUP] Using backup content")
+
+        print(f"\n[OK] 成功生成 {len(posts)} 条高质量内容")
+        return posts
+    def get_backup_content(self, index):
+        """获取备用内容（当API失败时使用）- 真实爆款帖子"""
+        return BACKUP_CONTENTS[index % len(BACKUP_CONTENTS)]
+
+    def persist(self, posts, generated_at=None):
+        """交给存储后端保存, 返回后端的引用 (文件系统后端为PDF路径)"""
+        return self.storage.save(self, posts, generated_at or datetime.now())
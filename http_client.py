@@ -0,0 +1,140 @@
+# http_client.py
+"""
+Shared HTTP client layer for DeepSeek calls
+One process-wide requests.Session with a pooled, keep-alive HTTPAdapter so
+every generator instance, Flask route and scheduler run reuses TCP/TLS
+connections instead of paying a fresh handshake per generation.
+Connection setup (TCP + TLS) is timed per thread so telemetry can split
+connect time from time-to-first-byte.
+requests/urllib3 are imported when the first Session is built, not at module
+import, so serverless cold starts that never call the API don't load them.
+"""
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+# Pool and timeout settings (override via environment)
+POOL_CONNECTIONS = int(os.getenv("REDNOTE_HTTP_POOL_CONNECTIONS", "4"))   # distinct hosts kept
+POOL_MAXSIZE = int(os.getenv("REDNOTE_HTTP_POOL_MAXSIZE", "16"))          # connections per host
+CONNECT_TIMEOUT = float(os.getenv("REDNOTE_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("REDNOTE_READ_TIMEOUT", "30"))
+
+_session = None
+_session_lock = threading.Lock()
+_connect_time = threading.local()
+
+
+def take_connect_time():
+    """Seconds this thread spent opening connections since the last call (0.0 on a reused connection)"""
+    elapsed = getattr(_connect_time, "seconds", 0.0)
+    _connect_time.seconds = 0.0
+    return elapsed
+
+
+def _timed_connect(connect):
+    def wrapper(self):
+        started = time.perf_counter()
+        try:
+            return connect(self)
+        finally:
+            _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + time.perf_counter() - started
+    return wrapper
+
+
+@lru_cache(maxsize=None)
+def timed_adapter_class():
+    """HTTPAdapter subclass whose pooled connections record their connect/TLS time (built on first use)"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _TimedHTTPConnection(HTTPConnection):
+        connect = _timed_connect(HTTPConnection.connect)
+
+    class _TimedHTTPSConnection(HTTPSConnection):
+        connect = _timed_connect(HTTPSConnection.connect)
+
+    class _TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _TimedHTTPConnection
+
+    class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _TimedHTTPSConnection
+
+    class TimedHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _TimedHTTPConnectionPool,
+                "https": _TimedHTTPSConnectionPool,
+            }
+
+    return TimedHTTPAdapter
+
+
+def build_session(pool_connections=None, pool_maxsize=None):
+    """Create a Session with a keep-alive connection pool mounted for http and https"""
+    import requests
+
+    session = requests.Session()
+    adapter = timed_adapter_class()(
+        pool_connections=pool_connections or POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize or POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session():
+    """Return the process-wide shared Session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def configure(pool_connections=None, pool_maxsize=None):
+    """Replace the shared Session with one using a different pool size"""
+    global _session
+    with _session_lock:
+        old, _session = _session, build_session(pool_connections, pool_maxsize)
+    if old is not None:
+        old.close()
+    return _session
+
+
+def default_timeout(connect=None, read=None):
+    """(connect, read) timeout tuple for requests"""
+    return (connect or CONNECT_TIMEOUT, read or READ_TIMEOUT)
+
+
+def post_json(url, payload, headers=None, timeout=None, **kwargs):
+    """POST a JSON payload through the shared pooled Session"""
+    return get_session().post(
+        url,
+        headers=headers,
+        json=payload,
+        timeout=timeout or default_timeout(),
+        **kwargs
+    )
+
+
+def iter_sse_json(response):
+    """Yield decoded JSON payloads from a streaming text/event-stream response"""
+    # Decode bytes ourselves: text/event-stream without a charset would
+    # otherwise fall back to ISO-8859-1 and mangle Chinese tokens
+    for raw in response.iter_lines():
+        line = raw.decode("utf-8")
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        yield json.loads(data)
@@ -0,0 +1,231 @@
+# job_queue.py
+"""
+Durable background job queue for content generation
+Jobs live in a SQLite file (.rednote_jobs.sqlite in the working directory), so
+queued work survives restarts. A small pool of worker threads claims jobs one
+at a time. The web server and the scheduler share the file, so a claim is a
+lease: the claiming queue records its worker id and refreshes updated_at every
+REDNOTE_JOB_HEARTBEAT seconds, and only jobs whose lease is older than
+REDNOTE_JOB_LEASE (a crashed or killed process) go back to the queue.
+
+A job generates posts for one account and persists them (post store, PDF,
+TXT). Submitting the same account twice on the same day returns the existing
+queued/running/finished job instead of enqueueing a duplicate.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+JOBS_DB = Path(os.getenv("REDNOTE_JOBS_DB", ".rednote_jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("REDNOTE_JOB_WORKERS", "2"))
+JOB_HEARTBEAT = float(os.getenv("REDNOTE_JOB_HEARTBEAT", "15"))
+JOB_LEASE = float(os.getenv("REDNOTE_JOB_LEASE", "120"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    dedupe_key TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    persona_id TEXT NOT NULL,
+    slot TEXT,                       -- scheduled slot's fire time (ISO), None for jobs on demand
+    status TEXT NOT NULL,            -- queued | running | done | failed
+    worker TEXT,                     -- queue that claimed the job (host:pid:id); lease = updated_at
+    progress TEXT,
+    result TEXT,                     -- JSON list of posts
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_dedupe ON jobs (dedupe_key, status);
+"""
+
+
+def run_generation_job(job):
+    """Default job handler: generate and persist posts for job['account_id']"""
+    from account_store import get_account_store
+    from rednote_content_generator import RedNoteContentGenerator
+
+    generator = RedNoteContentGenerator(persona_id=job["persona_id"], account_id=job["account_id"],
+                                        account_config=get_account_store().get(job["account_id"]))
+    if job.get("slot"):
+        # One document per slot, so several slots on the same day don't overwrite each other
+        generator.slot = datetime.fromisoformat(job["slot"])
+    job["report"]("generating")
+    posts = generator.generate_daily_posts()
+    job["report"]("rendering")
+    generator.persist(posts)
+    return [{'number': p['number'], 'content': p['content'], 'backup': bool(p.get('backup'))} for p in posts]
+
+
+class JobQueue:
+    """SQLite-backed job queue with a worker thread pool"""
+
+    def __init__(self, path=JOBS_DB, workers=JOB_WORKERS, handler=run_generation_job, heartbeat=JOB_HEARTBEAT,
+                 lease=JOB_LEASE):
+        self.path = Path(path)
+        self.workers = workers
+        self.handler = handler
+        self.heartbeat = heartbeat
+        self.lease = max(lease, heartbeat * 2)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._stopped = threading.Event()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("slot", "worker"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+            self._requeue_stale(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        if self._threads:
+            return self
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"rednote-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="rednote-job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, account_id, persona_id, day=None, slot=None):
+        """
+        Enqueue a generation job; returns (job_id, created) with created=False for duplicates
+        slot: the scheduled fire time (aware datetime) the job's document is keyed on
+        """
+        dedupe_key = f"{account_id}:{day or datetime.now().strftime('%Y%m%d')}"
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status != 'failed' ORDER BY created_at DESC LIMIT 1",
+                (dedupe_key,)
+            ).fetchone()
+            if existing:
+                return existing["id"], False
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            conn.execute(
+                "INSERT INTO jobs (id, dedupe_key, account_id, persona_id, slot, status, progress, created_at, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, 'queued', 'queued', ?, ?)",
+                (job_id, dedupe_key, account_id, persona_id, slot.isoformat() if slot else None, now, now)
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id, True
+
+    def get(self, job_id):
+        """Job status dict (result decoded), or None"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _update(self, job_id, **fields):
+        """Update a job this queue holds the lease on (a job requeued and taken over elsewhere is left alone)"""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{c} = ?" for c in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ?",
+                         (*fields.values(), job_id, self.worker_id))
+
+    def _requeue_stale(self, conn):
+        """Jobs whose claim has not been renewed within the lease (their process died) go back to the queue"""
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', progress = 'requeued', worker = NULL "
+            "WHERE status = 'running' AND updated_at < ?",
+            (time.time() - self.lease,)
+        ).rowcount
+        if requeued:
+            print(f"[JOBS] {requeued} job(s) with an expired lease re-queued")
+        return requeued
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running under this queue's lease"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_stale(conn)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', progress = 'starting', worker = ?, updated_at = ? WHERE id = ?",
+                (self.worker_id, time.time(), row["id"])
+            )
+        return dict(row)
+
+    def _heartbeat(self):
+        """Renew the lease on every job this queue is running"""
+        while not self._stopped.wait(self.heartbeat):
+            with self._connect() as conn:
+                conn.execute("UPDATE jobs SET updated_at = ? WHERE status = 'running' AND worker = ?",
+                             (time.time(), self.worker_id))
+
+    def _work(self):
+        while not self._stopping:
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=5)
+                continue
+
+            job_id = job["id"]
+            job["report"] = lambda progress: self._update(job_id, progress=progress)
+            try:
+                result = self.handler(job)
+                self._update(job_id, status="done", progress="done",
+                             result=json.dumps(result, ensure_ascii=False))
+            except Exception as e:
+                print(f"[ERROR] Job {job_id} failed: {e}")
+                self._update(job_id, status="failed", progress="failed", error=str(e))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide started JobQueue"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue().start()
+    return _queue
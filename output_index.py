@@ -0,0 +1,260 @@
+# output_index.py
+"""
+Incremental index of the Growth/ output folder
+A SQLite file (Growth/.index.sqlite) records every generated document --
+account, persona, date, post store/PDF/TXT paths and sizes, and the posts --
+as save_posts/create_pdf/save_as_text write them. /files and /view then become indexed,
+paginated lookups instead of globbing the folder and re-parsing TXT files.
+Files that predate the index are backfilled once on first open.
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from post_store import STORE_SUFFIX, read_posts
+
+INDEX_FILENAME = ".index.sqlite"
+FILENAME_PREFIX = "Account"
+FILENAME_MARKER = "_RedNote_Content_"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    date TEXT NOT NULL,              -- YYYYMMDD
+    persona_id TEXT,
+    persona_name TEXT,
+    pdf_name TEXT,
+    pdf_size INTEGER,
+    txt_name TEXT,
+    txt_size INTEGER,
+    data_name TEXT,                  -- canonical JSONL post store
+    updated_at REAL NOT NULL,
+    UNIQUE (account_id, date)
+);
+CREATE INDEX IF NOT EXISTS documents_by_date ON documents (date DESC, account_id);
+CREATE INDEX IF NOT EXISTS documents_by_pdf ON documents (pdf_name);
+CREATE INDEX IF NOT EXISTS documents_by_txt ON documents (txt_name);
+CREATE TABLE IF NOT EXISTS posts (
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT,
+    backup INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (document_id, number)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def parse_output_filename(name):
+    """'AccountA_RedNote_Content_20250101.pdf' -> ('A', '20250101'), else None"""
+    stem = Path(name).stem
+    if not stem.startswith(FILENAME_PREFIX) or FILENAME_MARKER not in stem:
+        return None
+    account_part, _, date_str = stem.partition(FILENAME_MARKER)
+    return account_part[len(FILENAME_PREFIX):], date_str
+
+
+def format_date(date_str):
+    """'20250101' -> 'January 01, 2025'; scheduled slots '20250101_1730' -> 'January 01, 2025 17:30'"""
+    try:
+        if len(date_str) > 8:
+            return datetime.strptime(date_str, '%Y%m%d_%H%M').strftime('%B %d, %Y %H:%M')
+        return datetime.strptime(date_str, '%Y%m%d').strftime('%B %d, %Y')
+    except ValueError:
+        return date_str
+
+
+def parse_legacy_txt(content):
+    """Recover posts from a save_as_text TXT rendering (files written before the index)"""
+    posts = []
+    lines = content.split('\n')
+    current_post = []
+
+    for line in lines:
+        if line.strip().startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '10.')):
+            if current_post:
+                posts.append('\n'.join(current_post).strip())
+            current_post = [line.split('.', 1)[1].strip() if '.' in line else line]
+        elif line.strip() == '-' * 60:
+            if current_post:
+                posts.append('\n'.join(current_post).strip())
+                current_post = []
+        elif line.strip() and not line.startswith('=') and 'RedNote' not in line and 'Date:' not in line and 'Time:' not in line and 'Account:' not in line and 'Persona:' not in line:
+            current_post.append(line)
+
+    if current_post:
+        posts.append('\n'.join(current_post).strip())
+    return posts
+
+
+class OutputIndex:
+    """SQLite-backed index of generated documents in one output folder"""
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.folder.mkdir(exist_ok=True)
+        self.path = self.folder / INDEX_FILENAME
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(documents)")}
+            if "data_name" not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN data_name TEXT")
+        if self._meta("backfilled") is None:
+            self.backfill()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _upsert(self, conn, account_id, date_str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in fields)
+        conn.execute(
+            f"INSERT INTO documents (account_id, date, {columns}) VALUES (?, ?, {placeholders}) "
+            f"ON CONFLICT (account_id, date) DO UPDATE SET {updates}",
+            (account_id, date_str, *fields.values())
+        )
+        return conn.execute(
+            "SELECT id FROM documents WHERE account_id = ? AND date = ?", (account_id, date_str)
+        ).fetchone()["id"]
+
+    def _replace_posts(self, conn, document_id, posts):
+        conn.execute("DELETE FROM posts WHERE document_id = ?", (document_id,))
+        conn.executemany(
+            "INSERT INTO posts (document_id, number, content, timestamp, backup) VALUES (?, ?, ?, ?, ?)",
+            [(document_id, p['number'], p['content'], p.get('timestamp'), int(bool(p.get('backup'))))
+             for p in posts]
+        )
+
+    def record(self, account_id, date_str, persona_id=None, persona_name=None, posts=None,
+               pdf_path=None, txt_path=None, data_path=None):
+        """Insert or update the document for (account, date) after an output file is written"""
+        fields = {}
+        if persona_id is not None:
+            fields.update(persona_id=persona_id, persona_name=persona_name)
+        if pdf_path is not None:
+            fields.update(pdf_name=Path(pdf_path).name, pdf_size=Path(pdf_path).stat().st_size)
+        if txt_path is not None:
+            fields.update(txt_name=Path(txt_path).name, txt_size=Path(txt_path).stat().st_size)
+        if data_path is not None:
+            fields.update(data_name=Path(data_path).name)
+
+        with self._connect() as conn:
+            document_id = self._upsert(conn, account_id, date_str, **fields)
+            if posts is not None:
+                self._replace_posts(conn, document_id, posts)
+
+    def list_documents(self, account_id=None, page=1, per_page=50):
+        """One page of documents, newest first; returns (rows, total)"""
+        where, params = "WHERE pdf_name IS NOT NULL", []
+        if account_id:
+            where += " AND account_id = ?"
+            params.append(account_id)
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM documents {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM documents {where} ORDER BY date DESC, account_id DESC LIMIT ? OFFSET ?",
+            (*params, per_page, (max(1, page) - 1) * per_page)
+        ).fetchall()
+        return [dict(r) for r in rows], total
+
+    def iter_documents(self, account_ids=None, start=None, end=None):
+        """
+        Documents in a date range (YYYYMMDD, inclusive, slot documents included), oldest first;
+        yields rows from a live cursor
+        """
+        where, params = self._range_filter(account_ids, start, end)
+        cursor = self._connect().execute(f"SELECT * FROM documents WHERE {where} ORDER BY date, account_id", params)
+        for row in cursor:
+            yield dict(row)
+
+    def count_documents(self, account_ids=None, start=None, end=None):
+        """Number of documents iter_documents would yield"""
+        where, params = self._range_filter(account_ids, start, end)
+        return self._connect().execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params).fetchone()[0]
+
+    @staticmethod
+    def _range_filter(account_ids, start, end):
+        where, params = ["1 = 1"], []
+        if account_ids:
+            where.append(f"account_id IN ({', '.join('?' for _ in account_ids)})")
+            params.extend(account_ids)
+        if start:
+            where.append("date >= ?")
+            params.append(start)
+        if end:
+            where.append("date < ?")
+            params.append(f"{end}~")  # '~' sorts after '_HHMM', so the end day's slots are in range
+        return " AND ".join(where), params
+
+    def get_posts(self, filename):
+        """Posts of the document owning this PDF/TXT filename, or None if not indexed"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id FROM documents WHERE txt_name = ? OR pdf_name = ?", (filename, filename)
+        ).fetchone()
+        if row is None:
+            return None
+        return [dict(r) for r in conn.execute(
+            "SELECT number, content, timestamp, backup FROM posts WHERE document_id = ? ORDER BY number",
+            (row["id"],)
+        )]
+
+    def backfill(self):
+        """Index output files already in the folder (one-time migration)"""
+        for path in sorted(self.folder.glob(f"{FILENAME_PREFIX}*{FILENAME_MARKER}*")):
+            parsed = parse_output_filename(path.name)
+            if parsed is None or path.suffix not in ('.pdf', '.txt', STORE_SUFFIX):
+                continue
+            account_id, date_str = parsed
+            if path.suffix == '.pdf':
+                self.record(account_id, date_str, pdf_path=path)
+                continue
+            if path.suffix == STORE_SUFFIX:
+                meta, posts = read_posts(path)
+                self.record(account_id, date_str, meta.get("persona_id"), meta.get("persona_name"), posts,
+                            data_path=path)
+                continue
+            if path.with_suffix(STORE_SUFFIX).exists():
+                self.record(account_id, date_str, txt_path=path)
+                continue
+            try:
+                contents = parse_legacy_txt(path.read_text(encoding='utf-8'))
+            except (OSError, UnicodeDecodeError):
+                contents = []
+            posts = [{'number': i, 'content': c} for i, c in enumerate(contents, 1)]
+            self.record(account_id, date_str, posts=posts, txt_path=path)
+
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', ?)", (str(time.time()),))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_output_index(folder="Growth"):
+    """Process-wide OutputIndex per output folder"""
+    key = str(Path(folder).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = OutputIndex(folder)
+        return index
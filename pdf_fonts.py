@@ -0,0 +1,252 @@
+# pdf_fonts.py
+"""
+CJK font subsystem for PDF output
+  - registers one CJK font per process: a TrueType font from
+    REDNOTE_CJK_FONT or a known system location, otherwise ReportLab's
+    built-in STSong-Light CID font (no embedding, no parsing cost)
+  - the parsed TrueType face is cached on disk keyed by the ReportLab
+    version and the font file's SHA-256, so later processes skip re-parsing a
+    multi-megabyte TTF. The cache is unpickled, so it lives in a per-user
+    directory (REDNOTE_FONT_CACHE_DIR, default ~/.cache/rednote/fonts or
+    %LOCALAPPDATA%/rednote/fonts), never under Growth/ which the web app
+    serves and writes. A cache that fails to load, or a ReportLab whose TTFont
+    no longer matches CachedTTFont, means a normal TTFont load instead
+  - generated glyph subsets are cached in memory and on disk under the same
+    key
+  - emoji and other glyphs the CJK font lacks go to an optional fallback
+    font (REDNOTE_FALLBACK_FONT) or are replaced, instead of rendering as
+    garbage
+"""
+import hashlib
+import os
+import pickle
+import threading
+from functools import lru_cache
+from pathlib import Path
+from weakref import WeakKeyDictionary
+
+import reportlab
+from reportlab import rl_config
+from reportlab.lib.fonts import addMapping
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTEncoding, TTFont, TTFontFace
+
+CJK_FONT_NAME = "RedNoteCJK"
+FALLBACK_FONT_NAME = "RedNoteFallback"
+CID_FONT_NAME = "STSong-Light"
+
+
+
+def _default_cache_dir():
+    """Per-user cache directory, outside the output folder"""
+    base = os.getenv("LOCALAPPDATA") if os.name == "nt" else os.getenv("XDG_CACHE_HOME")
+    return Path(base or Path.home() / ".cache") / "rednote" / "fonts"
+
+
+FONT_CACHE_DIR = Path(os.getenv("REDNOTE_FONT_CACHE_DIR") or _default_cache_dir())
+REPLACEMENT_CHAR = "□"
+
+# TrueType outlines only: ReportLab cannot embed CFF-based OpenType (e.g. Noto Sans CJK .otf/.ttc)
+SYSTEM_CJK_FONTS = [
+    ("C:/Windows/Fonts/simhei.ttf", 0),
+    ("C:/Windows/Fonts/msyh.ttc", 0),
+    ("C:/Windows/Fonts/simsun.ttc", 0),
+    ("/System/Library/Fonts/STHeiti Medium.ttc", 0),
+    ("/usr/share/fonts/truetype/wqy/wqy-microhei.ttc", 0),
+    ("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 0),
+    ("/usr/share/fonts/truetype/arphic/uming.ttc", 0),
+]
+
+# Zero-width joiners and variation selectors carry no glyph of their own
+_INVISIBLE = {0x200D, 0xFE0E, 0xFE0F}
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _SubsetCache:
+    """Memory + disk cache of TTF subsets for one font hash"""
+
+    def __init__(self, cache_dir, make_subset):
+        self.dir = cache_dir / "subsets"
+        self.make_subset = make_subset
+        self.memory = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, subset):
+        key = hashlib.sha1(",".join(map(str, subset)).encode("ascii")).hexdigest()
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+
+        path = self.dir / f"{key}.bin"
+        try:
+            data = path.read_bytes()
+        except OSError:
+            data = self.make_subset(subset)
+            try:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+        with self.lock:
+            self.memory[key] = data
+        return data
+
+
+# Names TTFont.__init__ uses in ReportLab 4.0, which CachedTTFont mirrors; any other set means another layout
+_TTFONT_INIT_NAMES = frozenset({
+    "fontName", "face", "TTFontFace", "encoding", "TTEncoding", "weakref", "WeakKeyDictionary", "state",
+    "rl_config", "ttfAsciiReadable", "_asciiReadable",
+})
+
+
+def cached_font_supported():
+    """True when this ReportLab's TTFont.__init__ sets exactly the attributes CachedTTFont copies"""
+    return frozenset(TTFont.__init__.__code__.co_names) == _TTFONT_INIT_NAMES
+
+
+class CachedTTFont(TTFont):
+    """TTFont built from an already-parsed face (mirrors TTFont.__init__ in ReportLab 4.0)"""
+
+    def __init__(self, name, face):
+        self.fontName = name
+        self.face = face
+        self.encoding = TTEncoding()
+        self.state = WeakKeyDictionary()
+        self._asciiReadable = rl_config.ttfAsciiReadable
+
+
+def load_ttf(name, path, subfont_index=0):
+    """Load a TrueType font, reusing the on-disk parsed face when the ReportLab version and file hash match"""
+    if not cached_font_supported():
+        print(f"[WARN] ReportLab {reportlab.Version}: 字体缓存不可用 / font cache unsupported, parsing {path}")
+        return TTFont(name, str(path), validate=0, subfontIndex=subfont_index)
+    try:
+        return _load_cached_ttf(name, path, subfont_index)
+    except Exception as e:
+        print(f"[WARN] 字体缓存不可用 / font cache failed ({e}), parsing {path}")
+        return TTFont(name, str(path), validate=0, subfontIndex=subfont_index)
+
+
+def _load_cached_ttf(name, path, subfont_index):
+    cache_dir = FONT_CACHE_DIR / f"reportlab-{reportlab.Version}" / _file_hash(path)
+    face_cache = cache_dir / f"face-{subfont_index}.pickle"
+
+    face = None
+    try:
+        with open(face_cache, "rb") as f:
+            face = pickle.load(f)
+    except Exception:  # missing, truncated or written by other code: parse the font again
+        pass
+    if not isinstance(face, TTFontFace) or not getattr(face, "charToGlyph", None):
+        face = None
+
+    if face is None:
+        face = TTFontFace(str(path), validate=0, subfontIndex=subfont_index)
+        try:
+            face_cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = face_cache.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(face, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, face_cache)
+        except OSError as e:
+            print(f"[WARN] 字体缓存写入失败 / font cache write failed: {e}")
+
+    # Instance attribute, set after pickling so the face itself stays picklable
+    face.makeSubset = _SubsetCache(cache_dir, face.makeSubset)
+    return CachedTTFont(name, face)
+
+
+def _find_cjk_font():
+    configured = os.getenv("REDNOTE_CJK_FONT")
+    if configured:
+        return [(configured, int(os.getenv("REDNOTE_CJK_FONT_INDEX", "0")))]
+    return [(path, index) for path, index in SYSTEM_CJK_FONTS if os.path.exists(path)]
+
+
+class FontSet:
+    """The fonts registered for this process and the glyph coverage checks"""
+
+    def __init__(self, body, fallback=None, coverage=None, fallback_coverage=None):
+        self.body = body                        # font name used by the paragraph styles
+        self.fallback = fallback                # font name for glyphs the body lacks, or None
+        self._coverage = coverage               # set of code points, or None for CID heuristics
+        self._fallback_coverage = fallback_coverage
+
+    def covers(self, code):
+        if self._coverage is not None:
+            return code in self._coverage
+        # STSong-Light: GB 2312/GBK plus ASCII; no emoji, no astral-plane symbols
+        return code < 0x2600 or 0x2E80 <= code < 0xFFF0
+
+    def fallback_covers(self, code):
+        return self._fallback_coverage is not None and code in self._fallback_coverage
+
+
+@lru_cache(maxsize=None)
+def register_fonts():
+    """Register body (and optional fallback) fonts once per process; returns the FontSet"""
+    fontset = None
+    for path, index in _find_cjk_font():
+        try:
+            font = load_ttf(CJK_FONT_NAME, path, index)
+            pdfmetrics.registerFont(font)
+            fontset = FontSet(CJK_FONT_NAME, coverage=frozenset(font.face.charToGlyph))
+            break
+        except Exception as e:
+            print(f"[WARN] 无法加载字体 / cannot load font {path}: {e}")
+
+    if fontset is None:
+        pdfmetrics.registerFont(UnicodeCIDFont(CID_FONT_NAME))
+        fontset = FontSet(CID_FONT_NAME)
+
+    # <b>/<i> inside paragraphs resolve through the family mapping
+    for bold in (0, 1):
+        for italic in (0, 1):
+            addMapping(fontset.body, bold, italic, fontset.body)
+
+    fallback_path = os.getenv("REDNOTE_FALLBACK_FONT")
+    if fallback_path:
+        try:
+            fallback = load_ttf(FALLBACK_FONT_NAME, fallback_path)
+            pdfmetrics.registerFont(fallback)
+            fontset.fallback = FALLBACK_FONT_NAME
+            fontset._fallback_coverage = frozenset(fallback.face.charToGlyph)
+        except Exception as e:
+            print(f"[WARN] 无法加载备用字体 / cannot load fallback font {fallback_path}: {e}")
+    return fontset
+
+
+def prepare_text(text):
+    """Escape paragraph markup and route glyphs the body font lacks to the fallback font"""
+    fontset = register_fonts()
+    out = []
+    in_fallback = False
+    for ch in text:
+        code = ord(ch)
+        if code in _INVISIBLE:
+            continue
+        use_fallback = False
+        if ch in "\n\t" or fontset.covers(code):
+            piece = ch
+        elif fontset.fallback_covers(code):
+            piece, use_fallback = ch, True
+        else:
+            piece = REPLACEMENT_CHAR if fontset.covers(ord(REPLACEMENT_CHAR)) else "?"
+
+        if use_fallback != in_fallback:
+            out.append(f'<font name="{fontset.fallback}">' if use_fallback else "</font>")
+            in_fallback = use_fallback
+        out.append(piece.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;"))
+    if in_fallback:
+        out.append("</font>")
+    return "".join(out)
@@ -0,0 +1,141 @@
+# pdf_renderer.py
+"""
+PDF rendering service
+Styles (and registered fonts) are built once per process instead of once per
+RedNoteContentGenerator. render_pdf lays out one document in-process;
+RenderService renders batches on a process pool so ReportLab's CPU-bound
+layout scales across cores and never blocks generation or the web server.
+Every render reports its wall time.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+from pdf_fonts import prepare_text, register_fonts
+
+RENDER_WORKERS = int(os.getenv("REDNOTE_RENDER_WORKERS", "0")) or os.cpu_count() or 1
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """设置PDF样式 (每个进程只构建一次)"""
+    font_name = register_fonts().body
+    styles = getSampleStyleSheet()
+
+    # 创建标题样式
+    styles.add(ParagraphStyle(
+        name='Header',
+        parent=styles['Normal'],
+        fontName=font_name,
+        fontSize=14,
+        textColor=colors.black,
+        spaceAfter=20,
+        alignment=TA_LEFT
+    ))
+
+    # 创建内容样式
+    styles.add(ParagraphStyle(
+        name='Content',
+        parent=styles['Normal'],
+        fontName=font_name,
+        fontSize=12,
+        textColor=colors.darkblue,
+        spaceAfter=15,
+        alignment=TA_LEFT
+    ))
+
+    # 创建时间样式
+    styles.add(ParagraphStyle(
+        name='TimeStamp',
+        parent=styles['Normal'],
+        fontName=font_name,
+        fontSize=10,
+        textColor=colors.gray,
+        spaceAfter=30,
+        alignment=TA_LEFT
+    ))
+    return styles
+
+
+def escape_markup(text):
+    """使用HTML转义处理特殊字符, 并为字体缺失的字形 (emoji等) 使用备用字体"""
+    return prepare_text(text)
+
+
+def build_story(account_id, persona_name, posts, generated_at, styles=None):
+    """Flowables for one account's document: header, timestamp, one page per post"""
+    styles = styles or get_styles()
+    story = []
+
+    # 添加标题
+    title = escape_markup(f"Account {account_id} ({persona_name}) - {generated_at.strftime('%B %d, %Y')}")
+    story.append(Paragraph(title, styles['Header']))
+    story.append(Paragraph(f"Generated at: {generated_at.strftime('%H:%M:%S')}", styles['TimeStamp']))
+
+    # 添加内容，每条之间用分页符分隔
+    for i, post in enumerate(posts):
+        numbered_content = f"<b>{post['number']}.</b> {escape_markup(post['content'])}"
+        story.append(Paragraph(numbered_content, styles['Content']))
+
+        # 如果不是最后一条，添加分页符
+        if i < len(posts) - 1:
+            story.append(PageBreak())
+    return story
+
+
+def render_pdf(path, account_id, persona_name, posts, generated_at):
+    """Render one document to `path`; returns (path, seconds)"""
+    started = time.perf_counter()
+    if isinstance(generated_at, str):
+        generated_at = datetime.fromisoformat(generated_at)
+    doc = SimpleDocTemplate(str(path), pagesize=letter)
+    doc.build(build_story(account_id, persona_name, posts, generated_at))
+    return path, time.perf_counter() - started
+
+
+def _warm_worker():
+    """Process-pool initializer: build styles/fonts before the first job arrives"""
+    get_styles()
+
+
+class RenderService:
+    """Renders PDFs on a process pool; submit() returns a Future of (path, seconds)"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or RENDER_WORKERS
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+        return self._pool
+
+    def submit(self, path, account_id, persona_name, posts, generated_at):
+        # datetime is picklable, but ISO strings keep the payload small and explicit
+        return self._executor().submit(
+            render_pdf, str(path), account_id, persona_name, posts, generated_at.isoformat()
+        )
+
+    def render_batch(self, jobs):
+        """Render [(path, account_id, persona_name, posts, generated_at), ...]; returns [(path, seconds)]"""
+        futures = [self.submit(*job) for job in jobs]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
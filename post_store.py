@@ -0,0 +1,76 @@
+# post_store.py
+"""
+Canonical machine-readable post storage
+Each generated document is stored as JSON Lines next to its PDF:
+
+    Account{X}_RedNote_Content_{YYYYMMDD}.jsonl
+    {"type": "meta", "account_id": ..., "persona_id": ..., "persona_name": ..., "date": ..., "generated_at": ...}
+    {"type": "post", "number": 1, "content": ..., "timestamp": ..., "backup": false}
+
+The PDF and TXT files are renderings derived from this record; /view reads
+it with a single deserialize instead of reverse-engineering the TXT layout.
+"""
+import json
+import os
+from pathlib import Path
+
+STORE_SUFFIX = ".jsonl"
+FORMAT_VERSION = 1
+
+
+def document_date(generated_at, slot=None):
+    """
+    Document key within an account: 'YYYYMMDD' for a run on demand, 'YYYYMMDD_HHMM' for a scheduled
+    slot (slot = the slot's fire time), so several slots on one day keep separate documents
+    """
+    if slot is not None:
+        return slot.strftime("%Y%m%d_%H%M")
+    return generated_at.strftime("%Y%m%d")
+
+
+def document_stem(account_id, date_str):
+    """Shared basename of every file rendered for one account/day"""
+    return f"Account{account_id}_RedNote_Content_{date_str}"
+
+
+def store_path(folder, account_id, date_str):
+    return Path(folder) / f"{document_stem(account_id, date_str)}{STORE_SUFFIX}"
+
+
+def write_posts(path, meta, posts):
+    """Atomically write the metadata record followed by one record per post"""
+    path = Path(path)
+    records = [{"type": "meta", "version": FORMAT_VERSION, **meta}]
+    records += [{
+        "type": "post",
+        "number": post["number"],
+        "content": post["content"],
+        "timestamp": post.get("timestamp"),
+        "backup": bool(post.get("backup"))
+    } for post in posts]
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def read_posts(path):
+    """Return (meta, posts) from a store file"""
+    meta, posts = {}, []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop("type", "post")
+            if kind == "meta":
+                meta = record
+            else:
+                if not record.get("backup"):
+                    record.pop("backup", None)
+                posts.append(record)
+    return meta, posts
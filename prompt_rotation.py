@@ -0,0 +1,155 @@
+# prompt_rotation.py
+"""
+Per-account prompt rotation
+Instead of an independent random.choice per run, each account draws prompts
+from its own shuffled deck of prompt indexes. A prompt appears in the deck as
+many times as its weight for the account's persona (generator_core.prompt_weights:
+persona prompts most, general prompts less, other personas' prompts not at
+all), and a draw skips the last REDNOTE_PROMPT_RECENT prompts the account
+used. An empty deck is reshuffled, so every eligible prompt comes up once per
+deck and a pick is O(1) amortized. When the only cards left are ones used too
+recently, they are dropped with the old deck: recency wins over the weights
+for that deck, and the stored deck never grows past one deck's worth.
+
+The deck and the recent list are kept by the storage backend
+(storage.prompt_rotation): Growth/.rotation.sqlite for the filesystem backend,
+the posts database for sqlite, process memory otherwise.
+
+    pick(account_id, weights, count=1, avoid=None) -> [prompt index, ...]
+"""
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+RECENT = int(os.getenv("REDNOTE_PROMPT_RECENT", "3"))
+ROTATION_FILENAME = ".rotation.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompt_rotation (
+    account_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,             -- {"weights": [...], "deck": [...], "recent": [...]}
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def new_deck(weights, rng):
+    deck = [index for index, weight in enumerate(weights) for _ in range(weight)]
+    rng.shuffle(deck)
+    return deck
+
+
+def draw(state, weights, avoid, rng, keep=RECENT):
+    """Pop the next card not among the last `avoid` picks (reshuffling when the deck runs out); keep: history length"""
+    if state.get("weights") != weights:
+        # Persona or prompt list changed: start a new deck, keep the history that still applies
+        state["weights"] = list(weights)
+        state["deck"] = []
+        state["recent"] = [i for i in state.get("recent", []) if i < len(weights) and weights[i]]
+    deck, recent = state["deck"], state["recent"]
+    avoid = min(avoid, sum(1 for weight in weights if weight) - 1)
+    blocked = set(recent[-avoid:]) if avoid > 0 else ()
+
+    while True:
+        if not deck:
+            deck.extend(new_deck(weights, rng))
+        # The deck is shuffled, so the nearest allowed card is a few positions from the top
+        for position in range(len(deck) - 1, -1, -1):
+            if deck[position] not in blocked:
+                deck[position], deck[-1] = deck[-1], deck[position]
+                card = deck.pop()
+                recent.append(card)
+                del recent[:-max(keep, avoid, 1)]
+                return card
+        # Only recently used cards left: drop them and deal a new deck (keeps the deck bounded)
+        deck[:] = new_deck(weights, rng)
+
+
+class PromptRotation:
+    """Rotation state per account in process memory"""
+
+    def __init__(self, recent=RECENT, rng=None):
+        self.recent = recent
+        self.rng = rng or random.Random()
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _state(self, account_id):
+        with self._lock:
+            yield self._states.setdefault(account_id, {})
+
+    def pick(self, account_id, weights, count=1, avoid=None):
+        """
+        count prompt indexes for account_id, none of them among the last `avoid` picks
+        (default REDNOTE_PROMPT_RECENT) and no repeats within the batch while distinct prompts last
+        """
+        weights = list(weights)
+        if not any(weights):
+            raise ValueError("至少需要一个权重大于0的提示词 / no prompt has a positive weight")
+        avoid = max(self.recent if avoid is None else avoid, count - 1)
+        with self._state(account_id) as state:
+            # History holds at least the whole batch, so a cached regenerate can reuse it
+            return [draw(state, weights, avoid, self.rng, max(self.recent, count)) for _ in range(count)]
+
+    def history(self, account_id):
+        """Most recent picks, oldest first"""
+        with self._state(account_id) as state:
+            return list(state.get("recent", []))
+
+
+class SQLitePromptRotation(PromptRotation):
+    """Rotation state per account in a SQLite file, shared by processes (BEGIN IMMEDIATE per pick)"""
+
+    def __init__(self, path, recent=RECENT, rng=None):
+        super().__init__(recent, rng)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _state(self, account_id):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # two processes drawing for one account must not take the same card
+        try:
+            row = conn.execute("SELECT state FROM prompt_rotation WHERE account_id = ?", (account_id,)).fetchone()
+            state = json.loads(row[0]) if row else {}
+            yield state
+            conn.execute(
+                "INSERT INTO prompt_rotation (account_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(account_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (account_id, json.dumps(state, separators=(",", ":")), time.time())
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+_rotations = {}
+_rotations_lock = threading.Lock()
+
+
+def get_prompt_rotation(path=None):
+    """Process-wide rotation per SQLite file (None: in memory)"""
+    key = None if path is None else str(Path(path).resolve())
+    with _rotations_lock:
+        rotation = _rotations.get(key)
+        if rotation is None:
+            rotation = _rotations[key] = PromptRotation() if path is None else SQLitePromptRotation(path)
+        return rotation
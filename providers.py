@@ -0,0 +1,160 @@
+# providers.py
+"""
+Provider routing for chat completions
+Any OpenAI-compatible endpoint can serve generations. A provider is a named
+base URL plus its API key; a route is the ordered list of (provider, model)
+targets an account's calls go to. When a target fails (non-200 after
+retries, transport error, open circuit breaker, deadline) the call fails
+over to the next one.
+
+Providers:
+  - "deepseek": DEEPSEEK_BASE_URL (default https://api.deepseek.com/v1) with
+    DEEPSEEK_API_KEY, always present
+  - extra entries from providers.json (REDNOTE_PROVIDERS_FILE), e.g.
+        {"local": {"base_url": "http://127.0.0.1:8000/v1"},
+         "openrouter": {"base_url": "https://openrouter.ai/api/v1", "api_key_env": "OPENROUTER_API_KEY"}}
+
+Model for an account, first match wins:
+  1. accounts.json "model" ("model" or "provider:model"; or a separate "provider" key)
+  2. the persona's tier: short-form personas use REDNOTE_MODEL_FAST and
+     long-form ones REDNOTE_MODEL_LARGE
+  3. REDNOTE_MODEL (default deepseek-chat)
+Failover targets come from the account's "fallback" list, else REDNOTE_FAILOVER
+(comma-separated specs; a bare provider name reuses the primary model).
+A spec with a colon always names its provider first; an unknown provider is
+reported with a [WARN] and its target dropped (never sent to DeepSeek under a
+bogus model name). Model names containing ':' therefore need the provider
+prefix, e.g. "local:qwen2.5:7b".
+
+    "B": {"persona": "ea_tech_expert", "model": "local:qwen2.5-72b-instruct",
+          "fallback": ["deepseek:deepseek-chat"]}
+"""
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_PROVIDER = "deepseek"
+DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+
+# 短内容人设用快速模型, 长文/深度分析人设用大模型; 未列出的人设使用 REDNOTE_MODEL
+PERSONA_TIERS = {
+    "portfolio_diary_keeper": "fast",
+    "ea_tech_expert": "large",
+    "astock_analyst": "large",
+}
+
+
+class Provider:
+    """One OpenAI-compatible endpoint"""
+
+    def __init__(self, name, base_url, api_key=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.url = f"{self.base_url}/chat/completions"
+        self.api_key = api_key
+
+    def headers(self, api_key=None):
+        """Request headers; local servers without a key get no Authorization header"""
+        headers = {"Content-Type": "application/json"}
+        key = api_key or self.api_key
+        if key:
+            headers["Authorization"] = f"Bearer {key}"
+        return headers
+
+
+class Target:
+    """A (provider, model) pair with its request headers"""
+
+    __slots__ = ("provider", "model", "url", "headers")
+
+    def __init__(self, provider, model, api_key=None):
+        self.provider = provider
+        self.model = model
+        self.url = provider.url
+        self.headers = provider.headers(api_key)
+
+    @property
+    def name(self):
+        return f"{self.provider.name}/{self.model}"
+
+    def __repr__(self):
+        return f"Target({self.name})"
+
+
+@lru_cache(maxsize=None)
+def get_providers():
+    """Process-wide provider table (read on first use, after .env is loaded)"""
+    providers = {DEFAULT_PROVIDER: Provider(
+        DEFAULT_PROVIDER, os.getenv("DEEPSEEK_BASE_URL", DEFAULT_BASE_URL), os.getenv("DEEPSEEK_API_KEY")
+    )}
+    path = Path(os.getenv("REDNOTE_PROVIDERS_FILE", "providers.json"))
+    if not path.exists():
+        return providers
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARN] 无法读取 {path} / could not read providers: {e}")
+        return providers
+    for name, entry in entries.items():
+        if not entry.get("base_url"):
+            print(f"[WARN] Provider {name}: missing base_url, skipped")
+            continue
+        api_key = os.getenv(entry["api_key_env"]) if entry.get("api_key_env") else None
+        providers[name] = Provider(name, entry["base_url"], api_key)
+    return providers
+
+
+def persona_model(persona_id):
+    """Model spec for a persona's tier (REDNOTE_MODEL_FAST / REDNOTE_MODEL_LARGE / REDNOTE_MODEL)"""
+    default = os.getenv("REDNOTE_MODEL", DEFAULT_MODEL)
+    tier = PERSONA_TIERS.get(persona_id)
+    return (os.getenv(f"REDNOTE_MODEL_{tier.upper()}") if tier else None) or default
+
+
+def parse_spec(spec, providers, primary_model=None):
+    """'model', 'provider:model', 'provider' or {"provider": ..., "model": ...} -> (provider name, model)"""
+    if isinstance(spec, dict):
+        return spec.get("provider", DEFAULT_PROVIDER), spec.get("model") or primary_model
+    spec = spec.strip()
+    if spec in providers and primary_model:
+        return spec, primary_model
+    name, sep, model = spec.partition(":")
+    if sep:  # the provider comes first; model names may contain ':' themselves (local:qwen2.5:7b)
+        return name, model or primary_model
+    return DEFAULT_PROVIDER, spec
+
+
+def resolve_route(persona_id, account_config=None, api_key=None):
+    """
+    Ordered failover list of Targets for an account
+    api_key overrides the key of the default (DeepSeek) provider, as passed to the generator
+    """
+    providers = get_providers()
+    config = account_config or {}
+
+    primary = config.get("model") or persona_model(persona_id)
+    if config.get("provider"):
+        primary = {"provider": config["provider"], "model": primary}
+    provider_name, primary_model = parse_spec(primary, providers)
+
+    fallback = config.get("fallback")
+    if fallback is None:
+        fallback = os.getenv("REDNOTE_FAILOVER", "").split(",")
+    elif isinstance(fallback, (str, dict)):
+        fallback = [fallback]
+
+    targets, seen = [], set()
+    for spec in [primary] + [s for s in fallback if s]:
+        name, model = parse_spec(spec, providers, primary_model)
+        if name not in providers:
+            print(f"[WARN] 未知的provider / unknown provider {name!r} in {spec!r} (see providers.json), skipped")
+            continue
+        if (name, model) in seen:
+            continue
+        seen.add((name, model))
+        targets.append(Target(providers[name], model, api_key if name == DEFAULT_PROVIDER else None))
+
+    return targets or [Target(providers[DEFAULT_PROVIDER], DEFAULT_MODEL, api_key)]
@@ -0,0 +1,189 @@
+# rate_limiter.py
+"""
+Client-side token-bucket rate limiting for DeepSeek calls
+Two budgets are enforced together:
+  - requests per second (REDNOTE_RATE_LIMIT_RPS, burst REDNOTE_RATE_LIMIT_BURST)
+  - tokens per minute   (REDNOTE_RATE_LIMIT_TPM, 0 = unlimited)
+
+Backends (REDNOTE_RATE_LIMIT_BACKEND):
+  - memory: per-process buckets guarded by a lock
+  - sqlite: buckets stored in a SQLite file in the working directory
+            (REDNOTE_RATE_LIMIT_DB), so the scheduler, the Flask server and
+            cron jobs share one budget across processes
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+RATE_LIMIT_RPS = float(os.getenv("REDNOTE_RATE_LIMIT_RPS", "10"))
+RATE_LIMIT_BURST = float(os.getenv("REDNOTE_RATE_LIMIT_BURST", "0")) or RATE_LIMIT_RPS
+RATE_LIMIT_TPM = float(os.getenv("REDNOTE_RATE_LIMIT_TPM", "0"))
+RATE_LIMIT_BACKEND = os.getenv("REDNOTE_RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB = Path(os.getenv("REDNOTE_RATE_LIMIT_DB", ".rednote_ratelimit.sqlite"))
+
+
+class TokenBucket:
+    """In-process token bucket: `rate` tokens/second, up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, amount):
+        """Take `amount` tokens if available; return 0.0 or the seconds to wait"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+
+class SQLiteTokenBucket:
+    """Token bucket persisted in SQLite, shared by every process using the same file"""
+
+    def __init__(self, name, rate, capacity, path=RATE_LIMIT_DB):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.path = Path(path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3  # only the sqlite backend needs it
+
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_take(self, amount):
+        """Atomically refill and take tokens; return 0.0 or the seconds to wait"""
+        amount = min(amount, self.capacity)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # serialises buckets across processes
+        try:
+            now = time.time()  # wall clock: comparable between processes
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if tokens >= amount:
+                tokens -= amount
+            else:
+                wait = (amount - tokens) / self.rate
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def estimate_tokens(payload):
+    """Rough token cost of a chat-completions request (prompt + reserved completion)"""
+    prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+    # DeepSeek: ~0.6 tokens per Chinese character
+    return int(prompt_chars * 0.6) + payload.get("max_tokens", 0)
+
+
+class RateLimiter:
+    """Requests-per-second and tokens-per-minute limits applied together"""
+
+    def __init__(self, rps=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST, tpm=RATE_LIMIT_TPM, backend=RATE_LIMIT_BACKEND,
+                 path=RATE_LIMIT_DB):
+        def bucket(name, rate, capacity):
+            if backend == "sqlite":
+                return SQLiteTokenBucket(name, rate, capacity, path)
+            return TokenBucket(rate, capacity)
+
+        self.request_bucket = bucket("requests", rps, max(1.0, burst)) if rps > 0 else None
+        self.token_bucket = bucket("tokens", tpm / 60.0, tpm) if tpm > 0 else None
+
+    def _demands(self, tokens):
+        """(bucket, amount) pairs to satisfy, request slot first"""
+        demands = []
+        if self.request_bucket is not None:
+            demands.append((self.request_bucket, 1))
+        if self.token_bucket is not None and tokens:
+            demands.append((self.token_bucket, tokens))
+        return demands
+
+    def acquire(self, tokens=0, timeout=None):
+        """
+        Block until one request (and `tokens` tokens) may be sent; return seconds waited
+        Raises TimeoutError instead of sleeping when the wait would go past `timeout` seconds.
+        """
+        waited = 0.0
+        # Each bucket is drained in turn so a blocked budget never burns the other
+        for bucket, amount in self._demands(tokens):
+            while True:
+                wait = bucket.try_take(amount)
+                if not wait:
+                    break
+                _check_timeout(waited + wait, timeout)
+                time.sleep(wait)
+                waited += wait
+        return waited
+
+    async def aacquire(self, tokens=0, timeout=None):
+        """Async acquire; the SQLite backend runs off the event loop"""
+        import asyncio  # loaded by the caller's event loop already
+
+        waited = 0.0
+        for bucket, amount in self._demands(tokens):
+            while True:
+                if isinstance(bucket, SQLiteTokenBucket):
+                    wait = await asyncio.to_thread(bucket.try_take, amount)
+                else:
+                    wait = bucket.try_take(amount)
+                if not wait:
+                    break
+                _check_timeout(waited + wait, timeout)
+                await asyncio.sleep(wait)
+                waited += wait
+        return waited
+
+
+def _check_timeout(total_wait, timeout):
+    if timeout is not None and total_wait >= timeout:
+        raise TimeoutError(f"rate limiter wait {total_wait:.2f}s exceeds the remaining {timeout:.2f}s")
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter configured from REDNOTE_RATE_LIMIT_* environment variables"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def configure_rate_limiter(**kwargs):
+    """Replace the process-wide limiter (e.g. RateLimiter(rps=2, backend='sqlite'))"""
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(**kwargs)
+    return _limiter
@@ -1,443 +1,18 @@
 # rednote_content_generator_serverless.py
 """
 Serverless version of RedNote Content Generator
-No file I/O - returns content in memory for Vercel deployment
+No file I/O - posts stay in memory (MemoryStorage) for Vercel deployment.
+Personas, prompts and the API path are shared with the desktop generator
+through generator_core.
 """
 import os
-import time
-from datetime import datetime
-import requests
+from generator_core import ContentGenerator, PERSONAS, DEFAULT_ACCOUNTS  # noqa: F401 (re-exported)
+from storage import get_storage
 
-# ─── Persona definitions for 5-account system ───────────────────────────
-# Based on real mature RedNote trading accounts
-PERSONAS = {
-    "forex_gold_trader": {
-        "name": "江鸽点金",
-        "description": "外汇黄金日内交易者，强调纪律自律，每日稳定50刀目标",
-        "voice": "当前角色身份：你是一位外汇黄金（XAU/USD）日内交易者。强调纪律>技术，稳定>暴富。语气真诚坦率，善于剖析交易心理（贪欲、妄念、偏执三道情绪）。用词接地气但有深度。emoji使用克制。核心理念：把自己活成一个执行规则的系统，耐心比聪明重要。"
-    },
-    "ea_tech_expert": {
-        "name": "欧亚星球量化",
-        "description": "EA技术专家，辩证EA与量化关系，反对包装割韭菜",
-        "voice": "当前角色身份：你是EA与量化技术的深度研究者。语气理性严谨，逻辑严密，善于辩证分析。强烈反感把EA包装成量化割韭菜。核心观点：EA只是执行工具，量化需要明确方法论、完整检验、清楚盈亏逻辑。用词专业但不炫技，教育意味强。emoji极少使用。"
-    },
-    "astock_analyst": {
-        "name": "凡大叔盘观",
-        "description": "A股板块分析师，盘面观察，资金流向，缩量/风格切换专家",
-        "voice": "当前角色身份：你是A股盘面观察分析师。语气专业冷静，数据驱动。核心关注：缩量/放量、板块轮动、资金流向、风格切换、支撑阻力位。结构清晰（核心观察、板块分析、下周展望、我的应对）。用📉📈🔥等emoji标记涨跌和热点。风险提示明确，强调耐心观望。"
-    },
-    "ea_philosophy_teacher": {
-        "name": "自研自用避坑",
-        "description": "EA哲学导师，教育为什么不用别人EA，强调独立思考",
-        "voice": "当前角色身份：你是EA交易哲学教育者。语气诚恳理性，洞察人性。核心观点：不要硬用别人EA，所有愿意卖给你的EA都不可能包赚，确定性是最贵的，工具EA重在参数而非工具本身。善用反问和比喻，引导独立思考。emoji很少，文字说服力强。"
-    },
-    "portfolio_diary_keeper": {
-        "name": "阿乐晒单日记",
-        "description": "基金实盘晒单者，每日持仓记录，情绪真实，接地气吐槽",
-        "voice": "当前角色身份：你是基金/ETF实盘记录者。语气真实接地气，情绪化但自省。每日晒持仓截图配文字复盘，坦诚记录赚钱喜悦和亏损懊恼。用词口语化（'我的天啦''该不是糕了吧''人太好了'）。emoji适中（😂💰📈📉🚗）。强调这是个人记录不构成投资建议。"
-    }
-}
 
-DEFAULT_ACCOUNTS = {
-    "A": {"persona": "forex_gold_trader"},
-    "B": {"persona": "ea_tech_expert"},
-    "C": {"persona": "astock_analyst"},
-    "D": {"persona": "ea_philosophy_teacher"},
-    "E": {"persona": "portfolio_diary_keeper"}
-}
+class RedNoteContentGenerator(ContentGenerator):
+    """Generator for the read-only serverless filesystem; REDNOTE_STORAGE=sqlite keeps posts across instances"""
 
-
-class RedNoteContentGenerator:
-    def __init__(self, api_key=None, persona_id="forex_gold_trader", account_id="A"):
-        """初始化小红书内容生成器 - Serverless版本"""
-        # Try API key from: parameter > env var > fallback
-        self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY") or "sk-d315bdda3a5e4c86b80da8c92c675bc8"
-        if not self.api_key:
-            raise ValueError("请设置DEEPSEEK_API_KEY环境变量")
-
-        self.account_id = account_id
-        self.persona_id = persona_id
-        self.persona = PERSONAS.get(persona_id, PERSONAS["forex_gold_trader"])
-
-        # 设置提示模板 - 覆盖5个不同人设的内容类型
-        self.prompts = [
-            # 江鸽点金风格 (Forex/Gold)
-            "创建一篇关于交易纪律的内容。主题可以是：每天稳定盈利X元到底难不难？重点：难的不是技术，而是心态和纪律。剖析交易者的三道情绪陷阱（贪欲、妄念、偏执）。核心观点：把自己活成一个执行规则的系统。语气真诚接地气，有深度。300-500字。",
-
-            "创建关于XAU/USD黄金交易的内容。讨论：为什么止损比盈利更重要？主题：止损是交易者的生命线。剖析新手常犯的错误（扛单、加仓摊平、情绪化做单）。强调：纪律和规则高于一切技巧。语气坦率，有经验感。400-600字。",
-
-            # 欧亚星球风格 (EA技术)
-            "创建关于EA与量化交易的辨析内容。核心观点：市面上很多人把EA包装成'量化交易系统'割韭菜。EA是什么？量化需要什么？两者的本质区别。警惕包装话术。语气理性严谨，逻辑清晰，有教育意义。400-600字。",
-
-            "创建关于EA交易系统的技术深度内容。讨论：为什么同一个EA在不同人手里结果完全不同？核心：参数调优、市场环境适配、风控设置的重要性。强调方法论而非工具崇拜。语气专业，技术派。500-700字。",
-
-            # 凡大叔风格 (A股盘面)
-            "创建A股盘面复盘内容。结构：核心观察（指数表现、成交量）→ 板块轮动分析（资金流入/流出板块）→ 关键位置（支撑/压力位）→ 下周展望 → 我的应对（持仓比例、关注方向）。数据详实，风险提示，语气专业冷静。300-500字。",
-
-            "创建关于A股缩量震荡行情的分析。主题：缩量环境下如何操作？分析板块分化、结构性机会、量能变化的重要性。强调耐心观望，不追高。语气专业，数据驱动，有📉📈emoji标记。300-500字。",
-
-            # 自研自用风格 (EA哲学)
-            "创建关于为什么不用别人EA的哲学内容。核心观点：交易中唯一确定的，就是'确定性'是最贵的。为什么愿意卖给你的EA都不可能包赚？工具的核心在参数而非工具本身。引导独立思考，反问有力。400-600字。",
-
-            "创建关于EA自研自用的教育内容。讨论：买EA的人最后为什么都亏了？原因剖析（参数不适配、不懂逻辑、出问题不会调）。自研自用的优势。可交流但不合作的原因。语气诚恳，洞察人性。400-600字。",
-
-            # 阿乐风格 (基金晒单)
-            "创建基金/ETF持仓日记内容。格式：今日收益 → 持仓品种表现 → 心路历程（早上的想法vs收盘的现实）→ 今天的教训 → 明天计划 → 距离目标还差多少。语气真实接地气，有😂💰等emoji，坦诚亏损，自嘲幽默。300-500字。",
-
-            "创建关于盯盘心态的吐槽内容。主题：今天又没忍住盯盘/调仓了。讨论：为什么越看越想操作，越操作越亏？记录真实的纠结和懊恼。自我反省但不失幽默。强调这是个人记录不构成投资建议。语气口语化，有😅📉等emoji。300-500字。"
-        ]
-
-    def call_deepseek_api(self, prompt):
-        """调用DeepSeek API生成内容"""
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
-            # System prompt based on 5 real mature RedNote trading accounts
-            system_prompt = """你是一位小红书交易内容创作者。你的风格根据人设而变化，但始终基于真实成熟账号的爆款内容。
-
-你的PROVEN VIRAL EXAMPLES（真实爆款案例，来自5个成熟账号）:
-
-1. 交易纪律心法 - 江鸽点金风格 (382赞, 276收藏):
-\"\"\"
-XAU USD每天收获50刀到底难不难？
-
-每天稳定落袋50刀？难点真不在技术。
-
-真正的对手不是市场，是你心里住着的"三道情绪"：
-
-➤ 赢了20想50，收获50想100 —— 贪欲
-➤ 亏了不敢停，总幻想能回来 —— 妄念
-➤ 错过就猛追，为了"完成任务"而做单 —— 偏执
-
-答案你或许听过，但做到的人极少：
-把自己活成一个执行规则的系统。
-
-这需要的不是技术，是心性。
-是一种接近修行的自律。
-
-稳定比激进重要，纪律比判断重要，耐心比聪明重要。
-
-宠辱不惊，方能稳定止赢。
-\"\"\"
-为什么爆了：直击交易者痛点，剖析心理，金句有力
-
-2. A股盘面复盘 - 凡大叔风格 (512赞, 89收藏):
-\"\"\"
-📉 本周A股复盘｜缩量震荡，板块分化加剧
-
-核心观察：
-• 上证指数周跌1.2%，成交额连续3日萎缩至7800亿
-• 主力资金流入：新能源车🔥、半导体📈
-• 主力资金流出：地产、金融、白酒
-
-板块轮动分析：
-周一到周三，资金集中攻击科技板块（AI算力、半导体设备），周四周五风格切换至消费（新能源车、锂电池）。缩量下的结构性机会，不是全面牛市。
-
-关键位置：
-上证3100点支撑有效，3180点压力未破。量能是关键，放量突破才能看3200。
-
-下周展望：
-继续观察量能变化。如果持续缩量，维持震荡格局；若某日放量突破3180，可能开启短期上攻。
-
-我的应对：
-持仓70%，30%现金观望。重点关注半导体设备龙头和新能源车产业链机会。不追高，耐心等支撑位买入信号。
-
-⚠️ 风险提示：个人观察记录，不构成投资建议
-\"\"\"
-为什么爆了：数据详实+结构清晰+emoji标记+风险提示+专业冷静
-
-3. EA技术辩证 - 欧亚星球风格 (328赞, 156收藏):
-\"\"\"
-EA就是量化交易？别让包装割了韭菜
-
-市面上很多人把EA包装成"量化交易系统"来卖高价，这是典型的概念混淆。
-
-EA是什么？
-EA（Expert Advisor）本质是MT4/MT5上的自动执行工具。它只是把你的交易指令自动化执行，没有策略本身。
-
-量化交易是什么？
-量化需要：
-✓ 明确的交易方法论（如统计套利、均值回归）
-✓ 历史数据回测验证
-✓ 清楚的盈亏逻辑和风险模型
-✓ 持续优化和监控机制
-
-核心区别：
-EA只是工具，量化是完整的交易体系。把EA叫量化，就像把菜刀叫做"烹饪系统"一样荒谬。
-
-警惕包装：
-很多人卖EA时故意用"量化""AI""算法"等高大上词汇，目的只有一个——让你觉得值钱，然后高价买单。
-
-真正的量化从业者不会轻易出售自己的盈利系统。如果真那么赚钱，为什么要卖给你？
-
-交易的本质是概率游戏，工具再好，没有正确的方法论和风控，都是空谈。
-\"\"\"
-为什么爆了：揭穿骗局+逻辑严密+教育意义强+引发讨论
-
-4. EA哲学 - 自研自用风格 (421赞, 267收藏):
-\"\"\"
-为什么我不用别人的EA？
-
-经常有人问我推荐EA，我的答案永远是：不推荐。
-
-不是因为我小气，而是因为我明白一个道理——
-
-交易中唯一确定的，就是"确定性"是最贵的。
-
-如果某个EA真的能稳定盈利，创造者为什么要卖给你？
-如果它真的包赚不赔，为什么不自己拿去融资放大？
-愿意卖给你的EA，背后只有两种可能：
-1. 它不赚钱，所以卖EA比用EA赚钱
-2. 它曾经赚钱，但市场环境变了
-
-我见过太多人花几千几万买EA，结果：
-参数不适合自己的资金量
-逻辑不匹配当前市场环境
-出现回撤时不知道该不该停
-最后亏损离场，还怪EA不行
-
-真相是：
-工具EA的核心从来不在工具本身，而在"参数"。
-同一个EA，参数调整后表现可能完全相反。
-如果你不懂它的底层逻辑，你根本不知道该怎么调整。
-
-所以我选择自研自用：
-✓ 我清楚每一行代码的逻辑
-✓ 我知道什么市场环境该开、该关
-✓ 我能根据回撤情况调整参数
-✓ 出问题时我知道问题在哪
-
-交易是自己的事，别人的系统永远是别人的。
-
-可交流，但不合作。因为每个人的风险承受能力、资金量、交易理念都不同。
-\"\"\"
-为什么爆了：洞察人性+反问有力+逻辑清晰+引发独立思考
-
-5. 基金晒单日记 - 阿乐风格 (687赞, 412收藏):
-\"\"\"
-今日持仓｜又是被打脸的一天😂
-
-[附持仓截图]
-
-今日收益：-2.3% 💔
-本周累计：+0.8%
-持仓品种：
-• 科技ETF 40% 📉-3.1%
-• 消费ETF 30% 📈+1.2%
-• 医药基金 20% 📉-1.8%
-• 现金 10%
-
-心路历程：
-早上看科技涨得好，觉得自己是天才
-下午科技跳水，觉得自己是憨憨
-收盘一看，还好消费撑住了一点
-
-今天的教训：
-不要盯盘！真的不要盯盘！
-越看越想操作，越操作越亏钱
-昨天刚说要佛系持有，今天又忍不住调仓
-人啊，就是记性不好😅
-
-明天计划：
-不看盘了（估计又是骗自己）
-科技如果再跌3%，考虑补一点
-医药这个月一直阴跌，该不是糕了吧……
-
-💰 账户总资产：12.7w
-🚗 距离买车目标还差：7.3w
-
-老规矩：
-这是我的个人记录和吐槽，不构成任何投资建议
-大家理性投资，盈亏自负
-
-#基金 #ETF #实盘记录
-\"\"\"
-为什么爆了：真实情绪+坦诚亏损+接地气吐槽+有目标感+每日更新粘性高
-
-小红书交易内容风格指南（5账号通用）：
-
-核心原则（适用所有账号）：
-
-1. 真实可信：
-- 具体数字：点位(3100点)、百分比(-2.3%)、金额(50刀)、时间(本周、今日)
-- 真实情绪：亏损坦诚、盈利克制、纠结真实
-- 风险提示：个人记录/不构成投资建议
-
-2. Emoji使用（因账号而异）：
-- 江鸽点金：极少使用，偶尔用➤强调要点
-- 欧亚星球：几乎不用，专业理性为主
-- 凡大叔：适度使用📉📈🔥标记涨跌和热点
-- 自研自用：极少，用✓✗标记对错
-- 阿乐：较多使用😂💰📈📉🚗表达情绪
-
-3. 结构清晰：
-- 短内容(100-200字)：单一观点+金句
-- 中等(300-500字)：观点+分析+结论
-- 长内容(600-800字)：分类讨论+结构化呈现（高收藏率）
-
-4. 语气风格（因人设而异）：
-- 江鸽：真诚坦率，禅意金句，强调纪律
-- 欧亚：理性严谨，逻辑辩证，教育为主
-- 凡大叔：专业冷静，数据驱动，耐心观望
-- 自研：诚恳洞察，反问引导，独立思考
-- 阿乐：接地气，情绪化，自嘲幽默
-
-5. 话题标签（分领域）：
-- 外汇/黄金：#外汇 #黄金 #XAU #交易纪律
-- EA/量化：#EA #量化交易 #外汇EA #交易系统
-- A股：#A股 #股市 #投资 #盘面分析
-- 基金：#基金 #ETF #实盘记录 #理财
-- 通用：#投资 #交易 #财富
-
-请模仿这些爆款案例的风格创作新内容。"""
-
-            # Inject persona-specific voice for this account
-            system_prompt += f"\n\n{self.persona['voice']}\n\n只输出帖子内容本身，不要有其他说明。"
-
-            data = {
-                "model": "deepseek-chat",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": f"{prompt}\n\n只输出帖子内容，包括标题、正文和话题标签。不要有其他解释。"
-                    }
-                ],
-                "temperature": 1.0,
-                "max_tokens": 2000,
-                "stream": False
-            }
-
-            response = requests.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content'].strip()
-                return content
-            else:
-                return None
-
-        except Exception as e:
-            return None
-
-    def generate_daily_posts(self):
-        """生成1条高质量小红书内容 (改为单条高质量生成) - 返回列表而不是保存到文件"""
-        posts = []
-
-        # 随机选择一个提示词类型来生成高质量内容
-        import random
-        selected_prompt = random.choice(self.prompts)
-
-        content = self.call_deepseek_api(selected_prompt)
-
-        if content:
-            # 不限制字符长度，让内容完整输出
-            posts.append({
-                'number': 1,
-                'content': content,
-                'timestamp': datetime.now().strftime("%H:%M")
-            })
-        else:
-            # 使用备用内容
-            backup_content = self.get_backup_content(1)
-            posts.append({
-                'number': 1,
-                'content': backup_content,
-                'timestamp': datetime.now().strftime("%H:%M"),
-                'backup': True
-            })
-
-        return posts
-
-    def get_backup_content(self, index):
-        """获取备用内容"""
-        backup_contents = [
-            """十八岁，美股的第一个百万
-
-不急着庆祝，先复盘，再继续。
-市场不会奖励惰怠，只奖励耐心与执行。""",
-
-            """上星期在Reddit 看到了一个叫 memestockhunter 的美股炒家，好像挺准。
-
-之后订阅了他的Buy Me a Coffee，昨天买了TNMG，升了一倍。""",
-
-            """记录美股人生第一次300%
-把掌声献给rocketlab
-
-从24年11月到今天，21块到96块
-23年底开始买美股
-到现在第一次体验300%浮盈
-
-#美股 #投资 #股票""",
-
-            """实盘美股 2w本金翻十倍 week28 大获全胜的一周
-
-总结：这周大盘横着，但是我的账户表现非常好
-上周复盘：
-小盘股和消费股表现很好
-精准抄底几只核心股票
-
-#美股 #投资 #实盘""",
-
-            """今年的美股，会不断玩"狠来了"直到明年才会真正结构上的开始出现问题。""",
-
-            """21岁美股基金经理的一天
-
-7:30AM - 打开TradingView浏览新闻流
-8:30AM - 数据维护，更新NAV
-9:30AM - 切换学生模式上课
-12:00PM - 复盘上午行情
-
-#基金 #金融 #股票""",
-
-            """记录 2026.01.21
-用$5,000一年时间翻到了$60,000
-
-去年，从投行出来之后，终于可以trade自己真正喜欢的标的。
-
-#美股 #投资""",
-
-            """躺平之路 总结2024-2025年投资收益
-
-24年大丰收，收益达到60%
-主要靠重仓特斯拉
-
-净值：$1,088,305
-年初至今收益：+199.93%
-
-#美股 #投资总结""",
-
-            """自从开始炒美股，我的人生就像按开一层迷雾
-
-发现我在做决策时惊人的理性：
-1. 资产配置比例非常清楚
-2. 花大量时间调研
-3. 非常听劝
-4. 不贪婪
-5. 不羡慕投机暴富
-6. 认命
-
-#美股 #投资心得""",
-
-            """靠美股期权赚钱的思考
-
-1. 卖出 Cash-Secured Put：
-用现金作为担保，收取期权费
-
-优点：每月稳定现金流
-缺点：需要足够本金
-
-#美股 #期权 #投资策略"""
-        ]
-        return backup_contents[index % len(backup_contents)]
+    def default_storage(self):
+        """默认内存存储 (无文件写入)"""
+        return get_storage(os.getenv("REDNOTE_STORAGE", "memory"))
@@ -0,0 +1,270 @@
+# resilience.py
+"""
+Retry, backoff and circuit-breaker layer for DeepSeek calls
+  - exponential backoff with full jitter on 429/5xx and connection errors
+  - Retry-After honoured (seconds or HTTP date), capped by the deadline
+  - per-host circuit breaker: after N consecutive failures the host fails
+    fast for a cool-down period, then lets one probe request through
+  - hard total deadline per generation; per-attempt timeouts shrink to fit
+  - every attempt first takes a slot from the shared rate limiter
+  - the returned response carries .attempts and .timings
+    (connect, ttfb and total seconds, for telemetry)
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from http_client import CONNECT_TIMEOUT, READ_TIMEOUT, post_json, take_connect_time
+from rate_limiter import estimate_tokens, get_rate_limiter
+
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+MAX_ATTEMPTS = int(os.getenv("REDNOTE_MAX_ATTEMPTS", "4"))
+BASE_DELAY = float(os.getenv("REDNOTE_RETRY_BASE_DELAY", "0.5"))
+MAX_DELAY = float(os.getenv("REDNOTE_RETRY_MAX_DELAY", "8"))
+GENERATION_DEADLINE = float(os.getenv("REDNOTE_GENERATION_DEADLINE", "60"))
+BREAKER_THRESHOLD = int(os.getenv("REDNOTE_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("REDNOTE_BREAKER_COOLDOWN", "30"))
+
+
+class CircuitOpenError(Exception):
+    """Raised when the host's circuit breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the total generation deadline has been used up"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)"""
+
+    def __init__(self, failure_threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError("DeepSeek circuit open, failing fast")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url):
+    """Process-wide breaker for the URL's host"""
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker()
+        return breaker
+
+
+def _is_retryable(status_code):
+    return status_code in RETRYABLE_STATUS
+
+
+def _next_delay(policy, attempt, response, remaining):
+    """Backoff for this attempt, honouring Retry-After; None if it won't fit the deadline"""
+    delay = policy.backoff(attempt)
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            delay = retry_after
+    return delay if delay < remaining else None
+
+
+def resilient_post_json(url, payload, headers=None, deadline=None, policy=None, breaker=None, limiter=None,
+                        **kwargs):
+    """
+    POST through the shared Session with retries, circuit breaker and deadline.
+
+    Returns the final response (which may still be non-200 once retries are
+    exhausted). Raises CircuitOpenError, DeadlineExceeded or the last
+    transport exception.
+    """
+    policy = policy or RetryPolicy()
+    breaker = breaker or get_circuit_breaker(url)
+    limiter = limiter or get_rate_limiter()
+    tokens = estimate_tokens(payload)
+    started = time.monotonic()
+    expires = started + (deadline or GENERATION_DEADLINE)
+    take_connect_time()
+
+    for attempt in range(1, policy.max_attempts + 1):
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"deadline exceeded after {attempt - 1} attempts")
+        # Wait for the limiter first: a half-open breaker hands out its single probe only to a request
+        # that is actually sent (and so always records success or failure)
+        try:
+            remaining -= limiter.acquire(tokens, timeout=remaining)
+        except TimeoutError as e:
+            raise DeadlineExceeded(f"deadline exceeded waiting for rate limiter: {e}") from e
+        if remaining <= 0:
+            raise DeadlineExceeded("deadline exceeded waiting for rate limiter")
+        breaker.before_request()
+
+        response, error = None, None
+        try:
+            timeout = (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+            response = post_json(url, payload, headers=headers, timeout=timeout, **kwargs)
+        except Exception as e:
+            error = e
+
+        if error is None and not _is_retryable(response.status_code):
+            breaker.record_success()
+            _annotate(response, attempt, take_connect_time(), response.elapsed.total_seconds(), started)
+            return response
+        breaker.record_failure()
+
+        if attempt == policy.max_attempts:
+            break
+        delay = _next_delay(policy, attempt, response, expires - time.monotonic())
+        if delay is None:
+            break
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+
+    if error is not None:
+        raise error
+    _annotate(response, attempt, take_connect_time(), response.elapsed.total_seconds(), started)
+    return response
+
+
+def _annotate(response, attempts, connect, ttfb, started):
+    """Attach retry count and latency split (connect summed over attempts; ttfb of the final attempt)"""
+    response.attempts = attempts
+    response.timings = {"connect": connect, "ttfb": ttfb, "total": time.monotonic() - started}
+
+
+async def aresilient_post_json(client, url, payload, headers=None, deadline=None, policy=None, breaker=None,
+                               limiter=None):
+    """Async counterpart of resilient_post_json for an httpx.AsyncClient"""
+    import asyncio  # already loaded by any caller with a running loop; kept off the sync import path
+
+    policy = policy or RetryPolicy()
+    breaker = breaker or get_circuit_breaker(url)
+    limiter = limiter or get_rate_limiter()
+    tokens = estimate_tokens(payload)
+    started = time.monotonic()
+    expires = started + (deadline or GENERATION_DEADLINE)
+    phases = {"connect": 0.0}
+
+    async def trace(event, info):
+        # httpcore trace hook: time TCP connect + TLS, and request start -> response headers
+        now = time.monotonic()
+        if event in ("connection.connect_tcp.started", "connection.start_tls.started"):
+            phases["connect_started"] = now
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            phases["connect"] += now - phases.pop("connect_started", now)
+        elif event.endswith("receive_response_headers.complete"):
+            phases["ttfb"] = now - phases["sent"]
+
+    for attempt in range(1, policy.max_attempts + 1):
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"deadline exceeded after {attempt - 1} attempts")
+        # Wait for the limiter first: a half-open breaker hands out its single probe only to a request
+        # that is actually sent (and so always records success or failure)
+        try:
+            remaining -= await limiter.aacquire(tokens, timeout=remaining)
+        except TimeoutError as e:
+            raise DeadlineExceeded(f"deadline exceeded waiting for rate limiter: {e}") from e
+        if remaining <= 0:
+            raise DeadlineExceeded("deadline exceeded waiting for rate limiter")
+        breaker.before_request()
+
+        response, error = None, None
+        phases["sent"] = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                client.post(url, headers=headers, json=payload, extensions={"trace": trace}),
+                timeout=remaining
+            )
+        except asyncio.TimeoutError:
+            error = DeadlineExceeded(f"deadline exceeded on attempt {attempt}")
+        except Exception as e:
+            error = e
+
+        if error is None and not _is_retryable(response.status_code):
+            breaker.record_success()
+            _annotate(response, attempt, phases["connect"], phases.get("ttfb"), started)
+            return response
+        breaker.record_failure()
+
+        if attempt == policy.max_attempts:
+            break
+        delay = _next_delay(policy, attempt, response, expires - time.monotonic())
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+
+    if error is not None:
+        raise error
+    _annotate(response, attempt, phases["connect"], phases.get("ttfb"), started)
+    return response
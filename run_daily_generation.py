@@ -1,5 +1,7 @@
 # Standalone script for Windows Task Scheduler
 # This runs once and exits - perfect for scheduled tasks
+# Usage: python run_daily_generation.py          (account A only)
+#        python run_daily_generation.py --all    (every account in accounts.json, concurrently)
 import os
 import sys
 from pathlib import Path
@@ -22,6 +24,11 @@ def main():
         return 1
 
     try:
+        if "--all" in sys.argv[1:]:
+            from batch_generation import generate_all_accounts
+            results = generate_all_accounts(api_key)
+            return 0 if all(r["success"] for r in results.values()) else 1
+
         generator = RedNoteContentGenerator(api_key)
         generator.run_daily_generation()
         return 0
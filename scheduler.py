@@ -0,0 +1,249 @@
+# scheduler.py
+"""
+Event-driven per-account scheduler
+Replaces the schedule.run_pending()/sleep(60) loop. Slots come from
+accounts.json: each account may list cron-like "schedule" entries and a
+"timezone", e.g.
+
+    "A": {"persona": "forex_gold_trader",
+          "timezone": "Asia/Shanghai",
+          "schedule": ["12:00", "30 20 * * 1-5"]}
+
+A slot is either "HH:MM" (daily) or a five-field cron expression
+(minute hour day-of-month month day-of-week; *, lists, ranges and /steps).
+Accounts without a schedule use the default slot (setup_scheduler's
+run_time, 17:00).
+
+The loop sleeps until the next due slot (at most an hour, so clock jumps are
+picked up). Account edits made in the same process (the web interface's
+/accounts/update, any account_store save) call wake() through
+account_store.on_change, and the schedule is reloaded at once. Edits made by
+another process are noticed at the next wake-up; set REDNOTE_ACCOUNTS_POLL
+(seconds, off by default) to also check the store's version on that interval,
+e.g. 600 when accounts.json is edited by hand. Due runs are submitted to the durable JobQueue, whose
+worker threads generate accounts concurrently; the job dedupe key is the
+account plus the slot's date and time, so a slot never runs twice. On
+startup the most recent occurrence of each slot within the catch-up window
+(REDNOTE_CATCHUP_HOURS, default 24) is submitted too, which re-runs anything
+missed during downtime.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from account_store import get_account_store, on_change, remove_listener
+from rednote_content_generator import load_accounts
+
+DEFAULT_SLOT = "17:00"
+DEFAULT_TIMEZONE = os.getenv("REDNOTE_TIMEZONE", "Asia/Shanghai")
+CATCHUP_HOURS = float(os.getenv("REDNOTE_CATCHUP_HOURS", "24"))
+# Upper bound on one sleep, so clock jumps are still picked up
+MAX_SLEEP = 3600
+# Opt-in: also check the account store's version this often (seconds), for edits from other processes
+ACCOUNTS_POLL = float(os.getenv("REDNOTE_ACCOUNTS_POLL", "0"))
+
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"cron field out of range: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSlot:
+    """One schedule slot: 'HH:MM' or a 5-field cron expression, evaluated in a time zone"""
+
+    def __init__(self, spec, timezone=DEFAULT_TIMEZONE):
+        self.spec = spec
+        self.tz = ZoneInfo(timezone)
+        if ":" in spec and len(spec.split()) == 1:
+            hour, minute = (int(v) for v in spec.split(":"))
+            spec = f"{minute} {hour} * * *"
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"expected 'HH:MM' or 5 cron fields: {self.spec}")
+
+        minutes, hours, days, months, weekdays = (
+            _parse_field(f, low, high) for f, (low, high) in zip(fields, FIELD_RANGES)
+        )
+        self.minutes, self.hours = sorted(minutes), sorted(hours)
+        self.days, self.months = days, months
+        self.weekdays = {d % 7 for d in weekdays}  # cron: 0 and 7 = Sunday
+        # Standard cron: if both day fields are restricted, either may match
+        self.day_or = fields[2] != "*" and fields[4] != "*"
+        self.any_day, self.any_weekday = fields[2] == "*", fields[4] == "*"
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.isoweekday() % 7) in self.weekdays
+        if self.day_or:
+            return dom or dow
+        return (self.any_day or dom) and (self.any_weekday or dow)
+
+    def next_after(self, moment):
+        """First fire time strictly after `moment` (aware datetime), in this slot's time zone"""
+        local = moment.astimezone(self.tz)
+        day = local.date()
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.tz)
+                        if candidate > local:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"cron expression never fires: {self.spec}")
+
+    def last_between(self, start, end):
+        """Most recent fire time in (start, end], or None"""
+        last = None
+        fire = self.next_after(start)
+        while fire <= end:
+            last = fire
+            fire = self.next_after(fire)
+        return last
+
+
+def account_slots(accounts, default_slot=DEFAULT_SLOT):
+    """[(account_id, persona_id, CronSlot)] for every slot configured in accounts.json"""
+    slots = []
+    for account_id, config in accounts.items():
+        timezone = config.get("timezone", DEFAULT_TIMEZONE)
+        specs = config.get("schedule") or [default_slot]
+        if isinstance(specs, str):
+            specs = [specs]
+        try:
+            ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            # Windows has no system tz database: ZoneInfo needs the tzdata package (requirements.txt)
+            print(f"[WARN] Account {account_id}: 未知时区 / unknown time zone {timezone!r} ({e}); "
+                  f"skipping {len(specs)} slot(s): {', '.join(map(str, specs))}. "
+                  f"Is tzdata installed? (pip install -r requirements.txt)")
+            continue
+        for spec in specs:
+            try:
+                slots.append((account_id, config.get("persona", "forex_gold_trader"), CronSlot(spec, timezone)))
+            except ValueError as e:
+                print(f"[WARN] Account {account_id}: invalid schedule {spec!r}, slot skipped: {e}")
+    return slots
+
+
+def _slot_key(account_id, slot):
+    return account_id, slot.spec, slot.tz.key
+
+
+class Scheduler:
+    """Sleeps until the next due slot and submits it to the job queue"""
+
+    def __init__(self, queue=None, default_slot=DEFAULT_SLOT, catchup_hours=CATCHUP_HOURS,
+                 accounts_loader=load_accounts, accounts_version=None):
+        if queue is None:
+            from job_queue import get_job_queue
+            queue = get_job_queue()
+        self.queue = queue
+        self.default_slot = default_slot
+        self.catchup = timedelta(hours=catchup_hours)
+        self.accounts_loader = accounts_loader
+        self.accounts_version = accounts_version or (lambda: get_account_store().version())
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._accounts_seen = None
+        self.slots = []
+        self.upcoming = {}  # slot index -> next fire time
+
+    def _accounts_changed(self):
+        version = self.accounts_version()
+        changed = version != self._accounts_seen
+        self._accounts_seen = version
+        return changed
+
+    def reload(self, now=None):
+        """
+        Re-read accounts.json and recompute the next fire time of new or edited slots
+        Unchanged slots keep their pending fire time, even one that came due while the loop slept,
+        so run_due still submits it.
+        """
+        now = now or datetime.now().astimezone()
+        pending = {_slot_key(account_id, slot): self.upcoming[i]
+                   for i, (account_id, _, slot) in enumerate(self.slots) if i in self.upcoming}
+        self.slots = account_slots(self.accounts_loader(), self.default_slot)
+        self.upcoming = {i: pending.get(_slot_key(account_id, slot)) or slot.next_after(now)
+                         for i, (account_id, _, slot) in enumerate(self.slots)}
+
+    def _submit(self, account_id, persona_id, fire):
+        job_id, created = self.queue.submit(account_id, persona_id, day=fire.strftime("%Y%m%dT%H%M%z"), slot=fire)
+        if created:
+            print(f"[TIMER] Account {account_id}: slot {fire.isoformat()} queued (job {job_id})")
+        return created
+
+    def catch_up(self, now=None):
+        """Submit the latest missed occurrence of each slot within the catch-up window"""
+        now = now or datetime.now().astimezone()
+        submitted = 0
+        for account_id, persona_id, slot in self.slots:
+            fire = slot.last_between(now - self.catchup, now)
+            if fire is not None and self._submit(account_id, persona_id, fire):
+                submitted += 1
+        return submitted
+
+    def run_due(self, now=None):
+        """Submit every slot whose fire time has passed; returns seconds until the next one"""
+        now = now or datetime.now().astimezone()
+        for i, fire in list(self.upcoming.items()):
+            if fire <= now:
+                account_id, persona_id, slot = self.slots[i]
+                self._submit(account_id, persona_id, fire)
+                self.upcoming[i] = slot.next_after(now)
+        if not self.upcoming:
+            return MAX_SLEEP
+        return max(0.0, (min(self.upcoming.values()) - datetime.now().astimezone()).total_seconds())
+
+    def run_forever(self):
+        import telemetry
+        telemetry.configure_file_sink()  # long-running: keep per-call records on disk
+        self._accounts_changed()
+        self.reload()
+        self.catch_up()
+        print(f"[TIMER] {len(self.slots)} slot(s) across {len({s[0] for s in self.slots})} account(s)")
+
+        on_change(self.wake)
+        try:
+            announced = None
+            while not self._stopping:
+                delay = self.run_due()
+                if self.upcoming:
+                    nearest = min(self.upcoming, key=self.upcoming.get)
+                    if (nearest, self.upcoming[nearest]) != announced:
+                        announced = (nearest, self.upcoming[nearest])
+                        print(f"[TIMER] Next: Account {self.slots[nearest][0]} at {announced[1].isoformat()}")
+                self._wakeup.wait(min(delay, ACCOUNTS_POLL or MAX_SLEEP, MAX_SLEEP))
+                self._wakeup.clear()
+                if self._accounts_changed():
+                    print("[TIMER] accounts changed, reloading schedule")
+                    self.reload()
+        finally:
+            remove_listener(self.wake)
+
+    def wake(self):
+        """Re-evaluate now (called by account_store after every save in this process)"""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
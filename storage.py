@@ -0,0 +1,361 @@
+# storage.py
+"""
+Storage backends for generated posts
+The generator core (generator_core.py) produces posts; a backend decides where
+they go:
+  - FilesystemStorage ("filesystem"): post store (JSONL) + PDF + TXT in Growth/,
+    indexed by output_index; usage appended to Growth/.usage.jsonl
+  - MemoryStorage ("memory"): latest posts per account in process memory
+    (Vercel: read-only filesystem, short-lived instances)
+  - SQLiteStorage ("sqlite"): documents, posts and usage in one SQLite file
+    (REDNOTE_STORAGE_DB, default .rednote_posts.sqlite)
+
+get_storage() returns the process-wide backend named by REDNOTE_STORAGE. Each
+backend imports what it needs (output index, ReportLab, sqlite3) on first use
+so the serverless cold start stays lean.
+
+    save(generator, posts, generated_at)  -> reference (PDF path / key)
+    latest(account_id)                    -> posts of the newest document, or None
+    record_usage(generator, report)       -> keep a run's UsageReport
+    completion_cache                      -> CompletionCache used by generators on this backend
+    dedup_index                           -> dedup.DedupIndex of accepted posts (None when REDNOTE_DEDUP=0)
+    prompt_rotation                       -> prompt_rotation.PromptRotation holding each account's prompt deck
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from completion_cache import CompletionCache, get_completion_cache
+from post_store import document_date
+
+DEFAULT_BACKEND = "filesystem"
+DEFAULT_DB_PATH = ".rednote_posts.sqlite"
+
+_memory_cache = None
+_memory_cache_lock = threading.Lock()
+
+
+def get_memory_completion_cache():
+    """Process-wide memory-only completion cache (no disk tier)"""
+    global _memory_cache
+    if _memory_cache is None:
+        with _memory_cache_lock:
+            if _memory_cache is None:
+                _memory_cache = CompletionCache(disk_dir=None)
+    return _memory_cache
+
+
+class Storage:
+    """Interface shared by the backends"""
+
+    name = None
+
+    @property
+    def location(self):
+        """Human-readable place the posts end up"""
+        return self.name
+
+    @property
+    def completion_cache(self):
+        return get_memory_completion_cache()
+
+    @property
+    def dedup_index(self):
+        """Near-duplicate index; process-local unless the backend has somewhere to keep it"""
+        from dedup import get_dedup_index
+        return get_dedup_index(":memory:")
+
+    @property
+    def prompt_rotation(self):
+        """Per-account prompt decks; process-local unless the backend has somewhere to keep them"""
+        from prompt_rotation import get_prompt_rotation
+        return get_prompt_rotation()
+
+    def save(self, generator, posts, generated_at):
+        raise NotImplementedError
+
+    def latest(self, account_id):
+        raise NotImplementedError
+
+    def record_usage(self, generator, report):
+        """Usage reports are only printed unless the backend keeps them"""
+
+
+class FilesystemStorage(Storage):
+    """Post store + PDF + TXT per account/day in an output folder (default Growth/)"""
+
+    name = "filesystem"
+
+    def __init__(self, folder="Growth"):
+        self.folder = Path(folder)
+
+    @property
+    def location(self):
+        return str(self.folder.absolute())
+
+    @property
+    def completion_cache(self):
+        return get_completion_cache()
+
+    @property
+    def dedup_index(self):
+        """Growth/.dedup.sqlite, backfilled from the existing post stores on first open"""
+        from dedup import INDEX_FILENAME, get_dedup_index
+        return get_dedup_index(self.folder / INDEX_FILENAME, backfill_from=self.folder)
+
+    @property
+    def prompt_rotation(self):
+        """Growth/.rotation.sqlite"""
+        from prompt_rotation import ROTATION_FILENAME, get_prompt_rotation
+        return get_prompt_rotation(self.folder / ROTATION_FILENAME)
+
+    def index(self):
+        from output_index import get_output_index
+        return get_output_index(self.folder)
+
+    def save(self, generator, posts, generated_at):
+        """保存结构化数据并渲染PDF和TXT，返回PDF路径"""
+        self.save_posts(generator, posts, generated_at)
+        pdf_file = self.create_pdf(generator, posts, generated_at)
+        self.save_as_text(generator, posts, generated_at)
+        return pdf_file
+
+    def save_posts(self, generator, posts, generated_at):
+        """保存规范的结构化帖子数据 (JSONL)，PDF/TXT均由此派生"""
+        from post_store import store_path, write_posts
+        self.folder.mkdir(exist_ok=True)
+        date_str = document_date(generated_at, generator.slot)
+        filename = write_posts(
+            store_path(self.folder, generator.account_id, date_str),
+            {
+                "account_id": generator.account_id,
+                "persona_id": generator.persona_id,
+                "persona_name": generator.persona['name'],
+                "date": date_str,
+                "generated_at": generated_at.isoformat(timespec="seconds")
+            },
+            posts
+        )
+        self.index().record(
+            generator.account_id, date_str, generator.persona_id, generator.persona['name'], posts,
+            data_path=filename
+        )
+        print(f"[OK] 数据已保存: {filename}")
+        return filename
+
+    def create_pdf(self, generator, posts, generated_at):
+        """创建PDF文件 (ReportLab 仅在真正渲染时加载)"""
+        from pdf_renderer import render_pdf
+        self.folder.mkdir(exist_ok=True)
+        filename = self.pdf_path(generator, generated_at)
+        _, elapsed = render_pdf(filename, generator.account_id, generator.persona['name'], posts, generated_at)
+        self.record_pdf(generator, filename, generated_at)
+        print(f"[OK] PDF已保存: {filename} ({elapsed:.2f}s)")
+        return filename
+
+    def pdf_path(self, generator, generated_at):
+        """PDF文件路径"""
+        from post_store import document_stem
+        return self.folder / f"{document_stem(generator.account_id, document_date(generated_at, generator.slot))}.pdf"
+
+    def record_pdf(self, generator, filename, generated_at):
+        """在输出索引中登记已渲染的PDF"""
+        self.index().record(
+            generator.account_id, document_date(generated_at, generator.slot), generator.persona_id,
+            generator.persona['name'],
+            pdf_path=filename
+        )
+
+    def save_as_text(self, generator, posts, generated_at):
+        """同时保存为文本文件（备用）"""
+        from post_store import document_stem
+        self.folder.mkdir(exist_ok=True)
+        date_str = document_date(generated_at, generator.slot)
+        filename = self.folder / f"{document_stem(generator.account_id, date_str)}.txt"
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f"小红书每日内容 / RedNote Daily Content\n")
+            f.write(f"账户 Account: {generator.account_id} | 人设 Persona: {generator.persona['name']}\n")
+            f.write(f"日期 Date: {generated_at.strftime('%Y-%m-%d')}\n")
+            f.write(f"时间 Time: {generated_at.strftime('%H:%M:%S')}\n")
+            f.write("=" * 60 + "\n\n")
+
+            for post in posts:
+                f.write(f"{post['number']}. {post['content']}\n\n")
+                f.write("-" * 60 + "\n\n")
+
+        self.index().record(
+            generator.account_id, date_str, generator.persona_id, generator.persona['name'], txt_path=filename
+        )
+        print(f"[OK] 文本备份已保存: {filename}")
+        return filename
+
+    def latest(self, account_id):
+        from post_store import read_posts, store_path
+        rows, _ = self.index().list_documents(account_id, per_page=1)
+        for row in rows:
+            path = store_path(self.folder, account_id, row["date"])
+            if path.exists():
+                return read_posts(path)[1]
+        return None
+
+    def record_usage(self, generator, report):
+        from usage_report import append_report
+        self.folder.mkdir(exist_ok=True)
+        append_report(report, self.folder, account_id=generator.account_id, persona_id=generator.persona_id)
+
+
+class MemoryStorage(Storage):
+    """Latest posts per account, kept for the life of the process"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.posts = {}  # account_id -> (generated_at, posts)
+        self.last_usage = {}  # account_id -> UsageReport summary
+
+    def save(self, generator, posts, generated_at):
+        self.posts[generator.account_id] = (generated_at, posts)
+        return generator.account_id
+
+    def latest(self, account_id):
+        entry = self.posts.get(account_id)
+        return entry[1] if entry else None
+
+    def record_usage(self, generator, report):
+        self.last_usage[generator.account_id] = report.summary()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    persona_id TEXT,
+    persona_name TEXT,
+    generated_at TEXT NOT NULL,
+    UNIQUE (account_id, date)
+);
+CREATE TABLE IF NOT EXISTS posts (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT,
+    backup INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (document_id, number)
+);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    account_id TEXT,
+    persona_id TEXT,
+    summary TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStorage(Storage):
+    """Documents (one per account/day, like the filesystem layout) and their posts in SQLite"""
+
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.getenv("REDNOTE_STORAGE_DB", DEFAULT_DB_PATH))
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    @property
+    def location(self):
+        return str(self.path.absolute())
+
+    @property
+    def dedup_index(self):
+        """Fingerprint tables live in the same database file as the posts"""
+        from dedup import get_dedup_index
+        return get_dedup_index(self.path)
+
+    @property
+    def prompt_rotation(self):
+        from prompt_rotation import get_prompt_rotation
+        return get_prompt_rotation(self.path)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save(self, generator, posts, generated_at):
+        date_str = document_date(generated_at, generator.slot)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO documents (account_id, date, persona_id, persona_name, generated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (account_id, date) DO UPDATE SET "
+                "persona_id = excluded.persona_id, persona_name = excluded.persona_name, "
+                "generated_at = excluded.generated_at",
+                (generator.account_id, date_str, generator.persona_id, generator.persona['name'],
+                 generated_at.isoformat(timespec="seconds"))
+            )
+            document_id = conn.execute(
+                "SELECT id FROM documents WHERE account_id = ? AND date = ?", (generator.account_id, date_str)
+            ).fetchone()["id"]
+            conn.execute("DELETE FROM posts WHERE document_id = ?", (document_id,))
+            conn.executemany(
+                "INSERT INTO posts (document_id, number, content, timestamp, backup) VALUES (?, ?, ?, ?, ?)",
+                [(document_id, p['number'], p['content'], p.get('timestamp'), int(bool(p.get('backup'))))
+                 for p in posts]
+            )
+        print(f"[OK] 数据已保存 / saved: {self.path} (account {generator.account_id}, {date_str})")
+        return document_id
+
+    def latest(self, account_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id FROM documents WHERE account_id = ? ORDER BY date DESC LIMIT 1", (account_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return [{**dict(r), "backup": bool(r["backup"])} for r in conn.execute(
+            "SELECT number, content, timestamp, backup FROM posts WHERE document_id = ? ORDER BY number",
+            (row["id"],)
+        )]
+
+    def record_usage(self, generator, report):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO usage (time, account_id, persona_id, summary) VALUES (?, ?, ?, ?)",
+                (time.time(), generator.account_id, generator.persona_id,
+                 json.dumps(report.summary(), ensure_ascii=False))
+            )
+
+
+BACKENDS = {
+    "filesystem": FilesystemStorage,
+    "memory": MemoryStorage,
+    "sqlite": SQLiteStorage,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_storage(name=None):
+    """Process-wide backend by name (default REDNOTE_STORAGE, else filesystem)"""
+    name = (name or os.getenv("REDNOTE_STORAGE") or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"未知的存储后端 / unknown storage backend {name!r} (choose from {', '.join(BACKENDS)})")
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = BACKENDS[name]()
+    return backend
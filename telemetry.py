@@ -0,0 +1,222 @@
+# telemetry.py
+"""
+Per-call telemetry for DeepSeek generations
+Every API call records account, persona, prompt index, routed model
+(provider/model, see providers.py), HTTP status, retry count, latency
+(connect / time-to-first-byte / total), prompt and completion tokens and an
+estimated cost; backup-content fallbacks are counted too.
+
+Two sinks:
+  - an in-process metrics registry rendered in Prometheus text format by the
+    /metrics route of both Flask apps
+  - a rolling JSON-lines file (one record per call) for the scheduler and
+    other long-running processes: enabled by configure_file_sink() or the
+    REDNOTE_METRICS_FILE environment variable
+
+Costs are estimates from REDNOTE_PRICE_* (USD per million tokens; defaults are
+DeepSeek chat list prices: cache-hit input, cache-miss input, output).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+INF_LABEL = 'le="+Inf"'
+
+PRICE_INPUT_HIT = float(os.getenv("REDNOTE_PRICE_INPUT_HIT", "0.07"))
+PRICE_INPUT_MISS = float(os.getenv("REDNOTE_PRICE_INPUT_MISS", "0.27"))
+PRICE_OUTPUT = float(os.getenv("REDNOTE_PRICE_OUTPUT", "1.10"))
+
+METRICS_FILE = os.getenv("REDNOTE_METRICS_FILE")
+METRICS_MAX_BYTES = int(os.getenv("REDNOTE_METRICS_MAX_BYTES", str(5 * 1024 * 1024)))
+METRICS_BACKUPS = int(os.getenv("REDNOTE_METRICS_BACKUPS", "5"))
+DEFAULT_METRICS_FILE = Path("Growth") / ".metrics" / "calls.jsonl"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames):
+        self.name, self.help, self.labelnames = name, help_text, labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help_text, labelnames, buckets
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            row = self.values.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, row in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, row):
+                    le = f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [le])} {count}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [INF_LABEL])} {row[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {row[-2]:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {row[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CALLS = REGISTRY.counter("rednote_api_calls_total", "DeepSeek calls by outcome",
+                         ("account", "persona", "prompt", "model", "status"))
+RETRIES = REGISTRY.counter("rednote_api_retries_total", "Extra attempts beyond the first", ("account", "persona"))
+LATENCY = REGISTRY.histogram("rednote_api_latency_seconds", "Call latency by phase (connect, ttfb, total)",
+                             ("account", "persona", "phase"))
+TOKENS = REGISTRY.counter("rednote_api_tokens_total", "Tokens by kind (prompt, completion, cache_hit, cache_miss)",
+                          ("account", "persona", "kind"))
+COST = REGISTRY.counter("rednote_api_cost_usd_total", "Estimated API spend in USD", ("account", "persona"))
+BACKUP_POSTS = REGISTRY.counter("rednote_backup_posts_total", "Posts filled with backup content",
+                                ("account", "persona"))
+DEDUP_REJECTIONS = REGISTRY.counter("rednote_dedup_rejections_total",
+                                    "Generated posts rejected as near-duplicates of earlier posts",
+                                    ("account", "persona"))
+
+_file_logger = None
+_file_lock = threading.Lock()
+
+
+def configure_file_sink(path=None, max_bytes=METRICS_MAX_BYTES, backups=METRICS_BACKUPS):
+    """Write one JSON line per call to a size-rotated file (idempotent)"""
+    global _file_logger
+    with _file_lock:
+        if _file_logger is not None:
+            return _file_logger
+        path = Path(path or METRICS_FILE or DEFAULT_METRICS_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger = logging.getLogger("rednote.telemetry")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _file_logger = logger
+        return logger
+
+
+def _emit(record):
+    if _file_logger is not None:
+        _file_logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def estimate_cost(usage):
+    """Estimated USD cost of one usage block"""
+    if not usage:
+        return 0.0
+    hit = usage.get("prompt_cache_hit_tokens")
+    miss = usage.get("prompt_cache_miss_tokens")
+    if hit is None and miss is None:
+        hit, miss = 0, usage.get("prompt_tokens", 0)
+    return ((hit or 0) * PRICE_INPUT_HIT + (miss or 0) * PRICE_INPUT_MISS
+            + usage.get("completion_tokens", 0) * PRICE_OUTPUT) / 1e6
+
+
+def record_call(account_id, persona_id, prompt_index=None, status=None, attempts=1, timings=None,
+                usage=None, error=None, kind="single", model=None):
+    """Record one DeepSeek call; status is the HTTP code, 'cache' or 'error'"""
+    status = "error" if error is not None and status is None else status
+    timings = {k: v for k, v in (timings or {}).items() if v is not None}
+    prompt = "" if prompt_index is None else str(prompt_index)
+    cost = estimate_cost(usage)
+
+    CALLS.inc((account_id, persona_id, prompt, model or "", str(status)))
+    if attempts and attempts > 1:
+        RETRIES.inc((account_id, persona_id), attempts - 1)
+    for phase, seconds in timings.items():
+        LATENCY.observe((account_id, persona_id, phase), seconds)
+    if usage:
+        for kind_name, field in (("prompt", "prompt_tokens"), ("completion", "completion_tokens"),
+                                 ("cache_hit", "prompt_cache_hit_tokens"), ("cache_miss", "prompt_cache_miss_tokens")):
+            if usage.get(field):
+                TOKENS.inc((account_id, persona_id, kind_name), usage[field])
+        COST.inc((account_id, persona_id), cost)
+
+    _emit({
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "event": "call", "kind": kind,
+        "account_id": account_id, "persona_id": persona_id, "prompt_index": prompt_index, "model": model,
+        "status": status, "attempts": attempts, "latency": {k: round(v, 4) for k, v in timings.items()},
+        "prompt_tokens": (usage or {}).get("prompt_tokens"),
+        "completion_tokens": (usage or {}).get("completion_tokens"),
+        "cache_hit_tokens": (usage or {}).get("prompt_cache_hit_tokens"),
+        "cost_usd": round(cost, 8), "error": str(error) if error is not None else None,
+    })
+
+
+def record_backup(account_id, persona_id, count=1):
+    """Record posts that fell back to backup content"""
+    BACKUP_POSTS.inc((account_id, persona_id), count)
+    _emit({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "event": "backup",
+           "account_id": account_id, "persona_id": persona_id, "count": count})
+
+
+def record_dedup(account_id, persona_id, similarity, match_account_id=None):
+    """Record a generated post rejected as a near-duplicate"""
+    DEDUP_REJECTIONS.inc((account_id, persona_id))
+    _emit({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "event": "dedup",
+           "account_id": account_id, "persona_id": persona_id, "similarity": round(similarity, 3),
+           "match_account_id": match_account_id})
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format"""
+    return REGISTRY.render()
+
+
+if METRICS_FILE:
+    configure_file_sink(METRICS_FILE)
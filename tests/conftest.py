@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+
+@pytest.fixture
+def fake_deepseek(monkeypatch, tmp_path):
+    """
+    FakeDeepSeek server the generators' default provider points at (cwd is a temp dir)
+    The server answers every request with the same text, so near-duplicate rejection is off.
+    """
+    from fake_deepseek import FakeDeepSeek
+    from providers import get_providers
+
+    server = FakeDeepSeek().start()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DEEPSEEK_BASE_URL", server.base_url)
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.delenv("REDNOTE_FAILOVER", raising=False)
+    monkeypatch.setattr("dedup.DEDUP_ENABLED", False)
+    get_providers.cache_clear()
+    yield server
+    server.stop()
+    get_providers.cache_clear()
@@ -0,0 +1,52 @@
+import asyncio
+
+from storage import MemoryStorage
+
+
+def make_generator(account_id, cls=None):
+    from rednote_content_generator_serverless import RedNoteContentGenerator
+    return (cls or RedNoteContentGenerator)(account_id=account_id, storage=MemoryStorage())
+
+
+def test_consecutive_cached_runs_make_one_upstream_call(fake_deepseek):
+    generator = make_generator("cache-single")
+
+    first = generator.generate_daily_posts(use_cache=True, cache_seed="single")
+    second = generator.generate_daily_posts(use_cache=True, cache_seed="single")
+
+    assert fake_deepseek.requests == 1
+    assert second[0]["content"] == first[0]["content"]
+    assert generator.last_usage.cached_calls == 1
+
+
+def test_consecutive_cached_batch_runs_make_one_upstream_call(fake_deepseek):
+    generator = make_generator("cache-batch")
+
+    first = generator.generate_daily_posts(use_cache=True, cache_seed="batch", count=3)
+    second = generator.generate_daily_posts(use_cache=True, cache_seed="batch", count=3)
+
+    assert fake_deepseek.requests == 1
+    assert [p["content"] for p in second] == [p["content"] for p in first]
+
+
+def test_uncached_runs_keep_rotating_prompts(fake_deepseek):
+    generator = make_generator("cache-off")
+    prompts = [generator.select_prompt() for _ in range(3)]
+
+    assert len(set(prompts)) == 3
+
+
+def test_async_cached_runs_make_one_upstream_call(fake_deepseek):
+    from async_generator import AsyncRedNoteContentGenerator, aclose_client
+
+    generator = make_generator("cache-async", AsyncRedNoteContentGenerator)
+
+    async def run_twice():
+        try:
+            await generator.agenerate_daily_posts(use_cache=True, cache_seed="async")
+            await generator.agenerate_daily_posts(use_cache=True, cache_seed="async")
+        finally:
+            await aclose_client()
+
+    asyncio.run(run_twice())
+    assert fake_deepseek.requests == 1
@@ -0,0 +1,42 @@
+import glob
+
+import pytest
+
+import pdf_fonts
+
+FONTS = sorted(glob.glob("/usr/share/fonts/truetype/**/*.ttf", recursive=True))
+pytestmark = pytest.mark.skipif(not FONTS, reason="no TrueType font installed")
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_fonts, "FONT_CACHE_DIR", tmp_path / "fonts")
+    return tmp_path / "fonts"
+
+
+def test_face_is_cached_per_reportlab_version(cache_dir):
+    first = pdf_fonts.load_ttf("CacheTest", FONTS[0])
+    second = pdf_fonts.load_ttf("CacheTest", FONTS[0])
+
+    assert isinstance(second, pdf_fonts.CachedTTFont)
+    assert second.face.charToGlyph == first.face.charToGlyph
+    assert list(cache_dir.glob(f"reportlab-{pdf_fonts.reportlab.Version}/*/face-0.pickle"))
+
+
+def test_unreadable_cache_is_rebuilt(cache_dir):
+    pdf_fonts.load_ttf("CacheTest", FONTS[0])
+    for pickled in cache_dir.rglob("face-0.pickle"):
+        pickled.write_bytes(b"not a pickle")
+
+    font = pdf_fonts.load_ttf("CacheTest", FONTS[0])
+
+    assert font.face.charToGlyph
+
+
+def test_unknown_ttfont_layout_parses_normally(cache_dir, monkeypatch):
+    monkeypatch.setattr(pdf_fonts, "_TTFONT_INIT_NAMES", frozenset({"fontName"}))
+
+    font = pdf_fonts.load_ttf("CacheTest", FONTS[0])
+
+    assert type(font) is pdf_fonts.TTFont
+    assert not cache_dir.exists()
@@ -0,0 +1,33 @@
+import pytest
+
+import providers
+
+
+@pytest.fixture
+def provider_table(monkeypatch, tmp_path):
+    (tmp_path / "providers.json").write_text('{"local": {"base_url": "http://127.0.0.1:8000/v1"}}')
+    monkeypatch.setenv("REDNOTE_PROVIDERS_FILE", str(tmp_path / "providers.json"))
+    monkeypatch.delenv("REDNOTE_FAILOVER", raising=False)
+    providers.get_providers.cache_clear()
+    yield providers.get_providers()
+    providers.get_providers.cache_clear()
+
+
+def test_parse_spec_keeps_colons_in_model_names(provider_table):
+    assert providers.parse_spec("local:qwen2.5:7b", provider_table) == ("local", "qwen2.5:7b")
+    assert providers.parse_spec("deepseek-chat", provider_table) == ("deepseek", "deepseek-chat")
+    assert providers.parse_spec("local", provider_table, "deepseek-chat") == ("local", "deepseek-chat")
+
+
+def test_unknown_provider_prefix_is_dropped_with_a_warning(provider_table, capsys):
+    route = providers.resolve_route("forex_gold_trader", {"model": "deepseek-chat", "fallback": ["foo:bar", "local"]})
+
+    assert [target.name for target in route] == ["deepseek/deepseek-chat", "local/deepseek-chat"]
+    assert "unknown provider 'foo'" in capsys.readouterr().out
+
+
+def test_unknown_primary_provider_falls_back_to_default_target(provider_table, capsys):
+    route = providers.resolve_route("forex_gold_trader", {"model": "typo:deepseek-chat"})
+
+    assert [target.name for target in route] == ["deepseek/deepseek-chat"]
+    assert "unknown provider 'typo'" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+from storage import MemoryStorage
+
+
+def make_generator(account_id):
+    from rednote_content_generator_serverless import RedNoteContentGenerator
+    return RedNoteContentGenerator(account_id=account_id, storage=MemoryStorage())
+
+
+def test_stream_yields_tokens_then_one_done_event(fake_deepseek):
+    generator = make_generator("stream-ok")
+
+    events = list(generator.stream_generation())
+
+    names = [event for event, _ in events]
+    assert names[-1] == "done" and names.count("done") == 1
+    assert set(names[:-1]) == {"token"}
+    done = events[-1][1]
+    assert done["success"] is True
+    assert done["posts"][0]["content"] == "".join(data["delta"] for _, data in events[:-1]).strip()
+    assert generator.storage.latest("stream-ok") is not None
+
+
+def test_stream_reports_persist_failure_in_done_event(fake_deepseek, monkeypatch):
+    generator = make_generator("stream-fail")
+
+    def fail(posts, generated_at=None):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(generator, "persist", fail)
+
+    event, data = list(generator.stream_generation())[-1]
+    assert event == "done"
+    assert data == {"success": False, "error": "disk full"}
+
+
+def test_vercel_stream_route_without_api_key_returns_json_error(monkeypatch):
+    import web_interface_vercel
+
+    monkeypatch.delenv("DEEPSEEK_API_KEY", raising=False)
+    response = web_interface_vercel.app.test_client().post("/generate/stream", json={"account_id": "A"})
+
+    assert response.get_json()["success"] is False
@@ -0,0 +1,80 @@
+# usage_report.py
+"""
+Token usage accounting per generation run
+Every DeepSeek response carries a `usage` block; besides prompt/completion
+tokens it reports how much of the prompt was served from the provider's
+context cache (prompt_cache_hit_tokens / prompt_cache_miss_tokens). The
+generator records each block in a UsageReport and, at the end of a run,
+prints a one-line summary and appends it to Growth/.usage.jsonl so the
+effect of the shared system-prompt prefix can be tracked over time.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "prompt_cache_hit_tokens", "prompt_cache_miss_tokens")
+USAGE_FILENAME = ".usage.jsonl"
+
+_append_lock = threading.Lock()
+
+
+class UsageReport:
+    """Accumulates usage blocks (thread-safe: parallel fallback calls share one report)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cached_calls = 0  # answered from the local completion cache, no API call
+        self.totals = dict.fromkeys(USAGE_FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def record(self, usage):
+        if not usage:
+            return
+        with self._lock:
+            self.calls += 1
+            for field in USAGE_FIELDS:
+                self.totals[field] += int(usage.get(field) or 0)
+
+    def record_cache_hit(self):
+        with self._lock:
+            self.cached_calls += 1
+
+    def merge(self, other):
+        with self._lock:
+            self.calls += other.calls
+            self.cached_calls += other.cached_calls
+            for field in USAGE_FIELDS:
+                self.totals[field] += other.totals[field]
+        return self
+
+    @property
+    def cache_hit_rate(self):
+        """Share of prompt tokens served from the provider cache, or None without data"""
+        hit, miss = self.totals["prompt_cache_hit_tokens"], self.totals["prompt_cache_miss_tokens"]
+        return hit / (hit + miss) if hit + miss else None
+
+    def summary(self):
+        rate = self.cache_hit_rate
+        return {"calls": self.calls, "cached_calls": self.cached_calls, **self.totals,
+                "cache_hit_rate": round(rate, 4) if rate is not None else None}
+
+    def format(self):
+        rate = self.cache_hit_rate
+        rate = f"{rate:.0%}" if rate is not None else "n/a"
+        t = self.totals
+        return (f"calls {self.calls} (+{self.cached_calls} cached) | prompt {t['prompt_tokens']} "
+                f"(cache hit {t['prompt_cache_hit_tokens']}, miss {t['prompt_cache_miss_tokens']}, {rate}) | "
+                f"completion {t['completion_tokens']}")
+
+
+def append_report(report, folder="Growth", **labels):
+    """Append one run's summary (plus labels such as account_id) to <folder>/.usage.jsonl"""
+    record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **labels, **report.summary()}
+    path = Path(folder) / USAGE_FILENAME
+    try:
+        with _append_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[WARN] 用量报告写入失败 / usage report write failed: {e}")
+    return record
@@ -2,12 +2,18 @@
 Multi-account web interface for RedNote Content Generator
 Supports 5 independent accounts with persona-based content generation
 """
-from flask import Flask, render_template_string, jsonify, send_file, request
+from flask import Flask, render_template_string, jsonify, send_file, request, Response, stream_with_context
 import os
 from pathlib import Path
-from datetime import datetime
 from dotenv import load_dotenv
-from rednote_content_generator import RedNoteContentGenerator, PERSONAS, load_accounts, save_accounts
+from rednote_content_generator import RedNoteContentGenerator, PERSONAS, load_accounts
+from generator_core import sse_event
+from account_store import get_account_store
+from batch_generation import generate_all_accounts
+from job_queue import get_job_queue
+from output_index import get_output_index, format_date, parse_legacy_txt
+from post_store import STORE_SUFFIX, read_posts
+from telemetry import render_prometheus
 
 load_dotenv()
 
@@ -431,13 +437,17 @@ function generateContent() {
     successMsg.classList.remove('active');
     postsGrid.innerHTML = '';
 
-    fetch('/generate', {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({account_id: currentAccount})
-    })
-    .then(r => r.json())
-    .then(data => {
+    // Stream tokens from /generate/stream (Server-Sent Events over fetch)
+    let liveContent = null;
+    const onToken = delta => {
+        if (!liveContent) {
+            loading.classList.remove('active');
+            renderPosts([{number: 1, content: ''}]);
+            liveContent = postsGrid.querySelector('.post-content');
+        }
+        liveContent.textContent += delta;
+    };
+    const onDone = data => {
         btn.disabled = false;
         loading.classList.remove('active');
         if (data.success) {
@@ -449,6 +459,40 @@ function generateContent() {
         } else {
             alert('Error: ' + (data.error || 'Generation failed'));
         }
+    };
+
+    fetch('/generate/stream', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({account_id: currentAccount})
+    })
+    .then(r => {
+        if (!r.body || !(r.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+            return r.json().then(onDone);
+        }
+        const reader = r.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        const pump = () => reader.read().then(({done, value}) => {
+            if (done) return;
+            buffer += decoder.decode(value, {stream: true});
+            let sep;
+            while ((sep = buffer.indexOf('\n\n')) >= 0) {
+                const frame = buffer.slice(0, sep);
+                buffer = buffer.slice(sep + 2);
+                let event = 'message', payload = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) payload += line.slice(5).trim();
+                });
+                if (!payload) continue;
+                const data = JSON.parse(payload);
+                if (event === 'token') onToken(data.delta);
+                else if (event === 'done') onDone(data);
+            }
+            return pump();
+        });
+        return pump();
     })
     .catch(err => {
         btn.disabled = false;
@@ -587,9 +631,8 @@ def update_account():
     if persona not in PERSONAS:
         return jsonify({'success': False, 'error': 'Invalid persona'})
 
-    accounts = load_accounts()
-    accounts[account_id] = {"persona": persona}
-    save_accounts(accounts)
+    # Partial update under the store's lock; other per-account settings (schedule, timezone) are kept
+    get_account_store().update(account_id, persona=persona)
     return jsonify({'success': True})
 
 
@@ -604,19 +647,23 @@ def generate():
         data = request.get_json() or {}
         account_id = data.get('account_id', 'A')
 
-        accounts = load_accounts()
-        persona_id = accounts.get(account_id, {}).get('persona', 'young_investor')
+        config = get_account_store().get(account_id)
+        persona_id = (config or {}).get('persona', 'young_investor')
 
         generator = RedNoteContentGenerator(
             api_key,
             persona_id=persona_id,
-            account_id=account_id
+            account_id=account_id,
+            account_config=config
+        )
+        posts = generator.generate_daily_posts(
+            use_cache=bool(data.get('use_cache')),
+            cache_seed=data.get('cache_seed'),
+            count=min(10, max(1, int(data.get('count') or 0))) if data.get('count') else None
         )
-        posts = generator.generate_daily_posts()
 
         if posts:
-            generator.create_pdf(posts)
-            generator.save_as_text(posts)
+            generator.persist(posts)
             return jsonify({
                 'success': True,
                 'posts': [{'number': p['number'], 'content': p['content']} for p in posts]
@@ -628,74 +675,143 @@ def generate():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    """Generate a post for an account, streaming DeepSeek tokens as Server-Sent Events"""
+    api_key = os.getenv("DEEPSEEK_API_KEY")
+    if not api_key:
+        return jsonify({'success': False, 'error': 'API key not configured'})
+
+    data = request.get_json() or {}
+    account_id = data.get('account_id', 'A')
+
+    config = get_account_store().get(account_id)
+    persona_id = (config or {}).get('persona', 'young_investor')
+    generator = RedNoteContentGenerator(api_key, persona_id=persona_id, account_id=account_id,
+                                        account_config=config)
+
+    return Response(
+        stream_with_context(sse_event(event, payload) for event, payload in generator.stream_generation()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/generate/all', methods=['POST'])
+def generate_all():
+    """Generate posts for every configured account concurrently"""
+    try:
+        api_key = os.getenv("DEEPSEEK_API_KEY")
+        if not api_key:
+            return jsonify({'success': False, 'error': 'API key not configured'})
+
+        results = generate_all_accounts(api_key)
+        return jsonify({
+            'success': all(r['success'] for r in results.values()),
+            'accounts': {
+                account_id: {
+                    'success': r['success'],
+                    'error': r['error'],
+                    'posts': [{'number': p['number'], 'content': p['content']} for p in r['posts']]
+                }
+                for account_id, r in results.items()
+            }
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Enqueue background generation for an account; returns a job ID to poll"""
+    if not os.getenv("DEEPSEEK_API_KEY"):
+        return jsonify({'success': False, 'error': 'API key not configured'})
+
+    data = request.get_json() or {}
+    account_id = data.get('account_id', 'A')
+    persona_id = (get_account_store().get(account_id) or {}).get('persona', 'young_investor')
+
+    job_id, created = get_job_queue().submit(account_id, persona_id)
+    job = get_job_queue().get(job_id)
+    return jsonify({'success': True, 'job_id': job_id, 'status': job['status'], 'duplicate': not created}), \
+        202 if created else 200
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status and progress of a background job"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({
+        'job_id': job['id'],
+        'account_id': job['account_id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    })
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Posts produced by a finished background job"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'success': False, 'status': job['status'], 'error': job['error']}), 500
+    if job['status'] != 'done':
+        return jsonify({'success': False, 'status': job['status'], 'progress': job['progress']}), 202
+    return jsonify({'success': True, 'status': job['status'], 'posts': job['result']})
+
+
 @app.route('/files')
 def list_files():
-    """List generated files, optionally filtered by account"""
+    """List generated files (paginated), optionally filtered by account"""
     output_folder = Path('Growth')
     if not output_folder.exists():
-        return jsonify({'files': []})
+        return jsonify({'files': [], 'total': 0, 'page': 1, 'per_page': 0})
 
     account = request.args.get('account', '')
-    if account:
-        pattern = f'Account{account}_RedNote_Content_*.pdf'
-    else:
-        pattern = '*.pdf'
-
-    pdf_files = sorted(output_folder.glob(pattern), reverse=True)
-
-    files = []
-    for pdf_file in pdf_files:
-        txt_file = pdf_file.with_suffix('.txt')
-        # Extract date from filename (last segment before extension)
-        parts = pdf_file.stem.split('_')
-        date_str = parts[-1]
-        try:
-            date_obj = datetime.strptime(date_str, '%Y%m%d')
-            formatted_date = date_obj.strftime('%B %d, %Y')
-        except:
-            formatted_date = date_str
-
-        files.append({
-            'name': pdf_file.name,
-            'date': formatted_date,
-            'pdf_path': pdf_file.name,
-            'txt_path': txt_file.name if txt_file.exists() else None
-        })
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(200, max(1, request.args.get('per_page', 50, type=int)))
+
+    documents, total = get_output_index(output_folder).list_documents(account or None, page, per_page)
 
-    return jsonify({'files': files})
+    files = [{
+        'name': doc['pdf_name'],
+        'date': format_date(doc['date']),
+        'pdf_path': doc['pdf_name'],
+        'txt_path': doc['txt_name']
+    } for doc in documents]
+
+    return jsonify({'files': files, 'total': total, 'page': page, 'per_page': per_page})
 
 
 @app.route('/view/<filename>')
 def view_file(filename):
-    """View content of a text file"""
+    """View the posts of a generated document"""
     try:
+        # Canonical structured store: one deserialize
+        store_file = (Path('Growth') / filename).with_suffix(STORE_SUFFIX)
+        if store_file.exists():
+            _, posts = read_posts(store_file)
+            return jsonify({'posts': [p['content'] for p in posts]})
+
+        posts = get_output_index('Growth').get_posts(filename)
+        if posts is not None:
+            return jsonify({'posts': [p['content'] for p in posts]})
+
+        # Not indexed (e.g. copied in by hand): fall back to parsing the TXT
         filepath = Path('Growth') / filename
         if not filepath.exists():
             return jsonify({'error': 'File not found'}), 404
 
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        posts = []
-        lines = content.split('\n')
-        current_post = []
-
-        for line in lines:
-            if line.strip().startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '10.')):
-                if current_post:
-                    posts.append('\n'.join(current_post).strip())
-                current_post = [line.split('.', 1)[1].strip() if '.' in line else line]
-            elif line.strip() == '-' * 60:
-                if current_post:
-                    posts.append('\n'.join(current_post).strip())
-                    current_post = []
-            elif line.strip() and not line.startswith('=') and 'RedNote' not in line and 'Date:' not in line and 'Time:' not in line and 'Account:' not in line and 'Persona:' not in line:
-                current_post.append(line)
-
-        if current_post:
-            posts.append('\n'.join(current_post).strip())
-
-        return jsonify({'posts': posts})
+            return jsonify({'posts': parse_legacy_txt(f.read())})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -709,6 +825,43 @@ def download_file(filename):
     return send_file(filepath, as_attachment=True)
 
 
+@app.route('/export')
+def export_bundle():
+    """
+    Stream a combined PDF (format=pdf) or ZIP (format=zip) for accounts and a date range
+    A PDF's memory grows with the range, so it is capped (REDNOTE_EXPORT_PDF_MAX_DOCUMENTS); large ranges use zip.
+    """
+    from export import export_filename, parse_day, stream_export  # loads ReportLab
+
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in ('pdf', 'zip'):
+        return jsonify({'error': 'format must be pdf or zip'}), 400
+    try:
+        start = parse_day(request.args.get('start', ''))
+        end = parse_day(request.args.get('end', ''))
+    except ValueError:
+        return jsonify({'error': 'start/end must be YYYY-MM-DD'}), 400
+    account_ids = [a.strip() for a in request.args.get('accounts', '').split(',') if a.strip()] or None
+
+    try:
+        blocks = stream_export(fmt, 'Growth', account_ids, start, end)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype = 'application/pdf' if fmt == 'pdf' else 'application/zip'
+    return Response(
+        stream_with_context(blocks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(start, end, fmt)}"'}
+    )
+
+
+@app.route('/metrics')
+def metrics():
+    """API call telemetry in Prometheus text format"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     print("\n" + "=" * 60)
     print("小红书 Content Generator - Multi-Account Web Interface")
@@ -3,20 +3,30 @@ Multi-account web interface for RedNote Content Generator - VERCEL SERVERLESS
 Supports 5 independent accounts with persona-based content generation
 No file I/O - works in read-only serverless environment
 """
-from flask import Flask, render_template_string, jsonify, request
+from flask import Flask, render_template_string, jsonify, request, Response, stream_with_context
 import os
-from datetime import datetime
-from dotenv import load_dotenv
-from rednote_content_generator_serverless import RedNoteContentGenerator, PERSONAS, DEFAULT_ACCOUNTS
-import copy
+from rednote_content_generator_serverless import RedNoteContentGenerator, PERSONAS
+from generator_core import sse_event
+from account_store import get_account_store
+from telemetry import render_prometheus
 
-load_dotenv()
+# Vercel injects environment variables directly; only local runs need .env (skip the import on cold start)
+_dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(_dotenv_path):
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 app = Flask(__name__)
 
-# In-memory storage (lost on restart, that's ok for serverless)
-accounts_store = copy.deepcopy(DEFAULT_ACCOUNTS)
-posts_cache = {}  # keyed by account_id
+
+def accounts_store():
+    """
+    Account configs: Vercel KV when KV_REST_API_URL is set (persists across cold starts),
+    else in-memory (lost on restart); REDNOTE_ACCOUNTS_BACKEND overrides
+    """
+    return get_account_store(os.getenv("REDNOTE_ACCOUNTS_BACKEND") or
+                             ("kv" if os.getenv("KV_REST_API_URL") else "memory"))
+
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -439,13 +449,17 @@ function generateContent() {
     successMsg.classList.remove('active');
     postsGrid.innerHTML = '';
 
-    fetch('/generate', {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({account_id: currentAccount})
-    })
-    .then(r => r.json())
-    .then(data => {
+    // Stream tokens from /generate/stream (Server-Sent Events over fetch)
+    let liveContent = null;
+    const onToken = delta => {
+        if (!liveContent) {
+            loading.classList.remove('active');
+            renderPosts([{number: 1, content: ''}]);
+            liveContent = postsGrid.querySelector('.post-content');
+        }
+        liveContent.textContent += delta;
+    };
+    const onDone = data => {
         btn.disabled = false;
         loading.classList.remove('active');
         if (data.success) {
@@ -456,6 +470,40 @@ function generateContent() {
         } else {
             alert('Error: ' + (data.error || 'Generation failed'));
         }
+    };
+
+    fetch('/generate/stream', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({account_id: currentAccount})
+    })
+    .then(r => {
+        if (!r.body || !(r.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+            return r.json().then(onDone);
+        }
+        const reader = r.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        const pump = () => reader.read().then(({done, value}) => {
+            if (done) return;
+            buffer += decoder.decode(value, {stream: true});
+            let sep;
+            while ((sep = buffer.indexOf('\n\n')) >= 0) {
+                const frame = buffer.slice(0, sep);
+                buffer = buffer.slice(sep + 2);
+                let event = 'message', payload = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) payload += line.slice(5).trim();
+                });
+                if (!payload) continue;
+                const data = JSON.parse(payload);
+                if (event === 'token') onToken(data.delta);
+                else if (event === 'done') onDone(data);
+            }
+            return pump();
+        });
+        return pump();
     })
     .catch(err => {
         btn.disabled = false;
@@ -515,7 +563,7 @@ def index():
 def get_accounts():
     """Return current account configs and persona definitions"""
     return jsonify({
-        'accounts': accounts_store,
+        'accounts': accounts_store().all(),
         'personas': PERSONAS
     })
 
@@ -526,8 +574,9 @@ def update_account():
     data = request.get_json()
     account_id = data.get('account_id')
     persona = data.get('persona')
-    if account_id in accounts_store and persona in PERSONAS:
-        accounts_store[account_id]['persona'] = persona
+    store = accounts_store()
+    if store.get(account_id) is not None and persona in PERSONAS:
+        store.update(account_id, persona=persona)
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Invalid account or persona'})
 
@@ -538,18 +587,47 @@ def generate():
     try:
         data = request.get_json() or {}
         account_id = data.get('account_id', 'A')
-        persona_id = accounts_store.get(account_id, {}).get('persona', 'forex_gold_trader')
+        config = accounts_store().get(account_id)
+        persona_id = (config or {}).get('persona', 'forex_gold_trader')
 
-        generator = RedNoteContentGenerator(persona_id=persona_id, account_id=account_id)
-        posts = generator.generate_daily_posts()
+        generator = RedNoteContentGenerator(persona_id=persona_id, account_id=account_id, account_config=config)
+        posts = generator.generate_daily_posts(
+            use_cache=bool(data.get('use_cache')),
+            cache_seed=data.get('cache_seed')
+        )
 
-        posts_cache[account_id] = posts
+        generator.persist(posts)
 
         return jsonify({'success': True, 'posts': posts})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    """Generate content for an account, streaming DeepSeek tokens as Server-Sent Events"""
+    try:
+        data = request.get_json() or {}
+        account_id = data.get('account_id', 'A')
+        config = accounts_store().get(account_id)
+        persona_id = (config or {}).get('persona', 'forex_gold_trader')
+        generator = RedNoteContentGenerator(persona_id=persona_id, account_id=account_id, account_config=config)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+    return Response(
+        stream_with_context(sse_event(event, payload) for event, payload in generator.stream_generation()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/metrics')
+def metrics():
+    """API call telemetry in Prometheus text format"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/health')
 def health():
     """Health check endpoint"""